@@ -1,11 +1,229 @@
-import os
-import json
+import asyncio
 import re
-from typing import List, Dict, Any
-from groq import Groq
+import threading
+import time
+import weakref
+from typing import AsyncIterator, List, Dict, Any, Optional
 
-# Initialize clean Groq client
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+from fastapi.concurrency import run_in_threadpool
+
+from backend_app.ai.providers import close_provider, get_provider
+from backend_app.ai.slide_parser import IncompleteSlidesError, SlideArrayParser, salvage_slides, validate_slide
+from backend_app.core.config import settings
+from backend_app.core.metrics import register_metrics
+from backend_app.core.resilience import CircuitBreaker, CircuitOpenError, LatencyWindow, hedged
+from backend_app.rag.context_packer import pack_context
+
+# Caps concurrent completions so a burst cannot exhaust the connection pool or rate limit.
+# One semaphore per event loop: a semaphore is bound to the first loop that waits on it, and
+# tests, the warm-up CLI and the load test each run their own loops.
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+_semaphores_lock = threading.Lock()
+
+# Stops calling the provider while it keeps failing; callers fall back immediately instead
+_breaker = CircuitBreaker(
+    failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=settings.LLM_BREAKER_RESET_SECONDS,
+)
+# Recent successful latencies per max_tokens (tutor and lesson calls differ by an order of magnitude)
+_latencies: Dict[int, LatencyWindow] = {}
+_counters_lock = threading.Lock()
+_counters = {"calls": 0, "deadline_exceeded": 0, "hedges_fired": 0, "partial_lessons": 0, "rejected_slides": 0}
+
+# Quality recorded for lessons salvaged from truncated or partly malformed output
+PARTIAL_QUALITY_SCORE = 0.6
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """The provider did not answer within the per-call deadline."""
+
+
+class _QueueTimeout(asyncio.TimeoutError):
+    """The deadline passed while waiting for a concurrency slot; the provider was never called."""
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _counters_lock:
+        _counters[name] += amount
+
+
+def llm_available() -> bool:
+    """False while the circuit breaker is rejecting LLM calls."""
+    return _breaker.available()
+
+
+def llm_stats() -> Dict[str, Any]:
+    with _counters_lock:
+        stats = dict(_counters)
+    stats["provider"] = get_provider().name
+    stats["breaker"] = _breaker.stats()
+    stats["hedge_after_seconds"] = {str(k): _hedge_delay(k) for k in sorted(_latencies)}
+    return stats
+
+
+register_metrics("llm", llm_stats)
+
+
+def _deadline(deadline: Optional[float]) -> Optional[float]:
+    deadline = settings.LLM_DEADLINE_SECONDS if deadline is None else deadline
+    return deadline if deadline > 0 else None
+
+
+def _remaining(expires: Optional[float]) -> Optional[float]:
+    """Seconds left until the absolute perf_counter() deadline expires (None: no deadline)."""
+    if expires is None:
+        return None
+    remaining = expires - time.perf_counter()
+    if remaining <= 0:
+        raise asyncio.TimeoutError()
+    return remaining
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """The running event loop's LLM_MAX_CONCURRENCY semaphore, created on first use."""
+    loop = asyncio.get_running_loop()
+    with _semaphores_lock:
+        semaphore = _semaphores.get(loop)
+        if semaphore is None:
+            semaphore = _semaphores[loop] = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        return semaphore
+
+
+async def _acquire_slot(expires: Optional[float]) -> asyncio.Semaphore:
+    """Wait for a concurrency slot, but no longer than the call's deadline; returns the semaphore to release."""
+    semaphore = _get_semaphore()
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=_remaining(expires))
+    except asyncio.TimeoutError:
+        raise _QueueTimeout() from None
+    return semaphore
+
+
+def _hedge_delay(max_tokens: int) -> Optional[float]:
+    """Seconds after which a duplicate request is fired, or None when hedging is off or unwarmed."""
+    if settings.LLM_HEDGE_PERCENTILE <= 0:
+        return None
+    window = _latencies.get(max_tokens)
+    if window is None or len(window) < settings.LLM_HEDGE_MIN_SAMPLES:
+        return None
+    return window.percentile(settings.LLM_HEDGE_PERCENTILE)
+
+
+async def close_client() -> None:
+    """Close the active provider's pooled HTTP connections (called on app shutdown)."""
+    await close_provider()
+
+
+async def stream_chat_completion(
+    messages: List[Dict[str, str]], temperature: float = 0.4, max_tokens: int = 250, deadline: Optional[float] = None
+) -> AsyncIterator[str]:
+    """Stream a chat completion token by token under the concurrency limit.
+
+    The first token must arrive within LLM_FIRST_TOKEN_SECONDS of the provider
+    call and the whole stream within the deadline (LLM_DEADLINE_SECONDS by
+    default, counted from entry including the wait for a slot); otherwise
+    LLMDeadlineExceeded is raised. Raises CircuitOpenError without calling the
+    provider while the circuit breaker is open.
+    """
+    if not _breaker.allow():
+        raise CircuitOpenError("LLM provider unavailable (circuit open)")
+    _count("calls")
+    total = _deadline(deadline)
+    expires = None if total is None else time.perf_counter() + total
+    first_token = settings.LLM_FIRST_TOKEN_SECONDS if settings.LLM_FIRST_TOKEN_SECONDS > 0 else None
+    got_token = False
+    try:
+        semaphore = await _acquire_slot(expires)
+        try:
+            # The first-token limit measures the provider, so it starts once a slot is held
+            first_token_by = None if first_token is None else time.perf_counter() + first_token
+            stream = get_provider().stream(messages, temperature, max_tokens)
+            try:
+                while True:
+                    limits = [t for t in (expires, None if got_token else first_token_by) if t is not None]
+                    timeout = _remaining(min(limits) if limits else None)
+                    try:
+                        delta = await asyncio.wait_for(stream.__anext__(), timeout=timeout)
+                    except StopAsyncIteration:
+                        break
+                    got_token = True
+                    yield delta
+            finally:
+                await stream.aclose()
+        finally:
+            semaphore.release()
+    except _QueueTimeout:
+        _count("deadline_exceeded")
+        _breaker.release()  # never reached the provider; says nothing about its health
+        raise LLMDeadlineExceeded("LLM stream timed out waiting for a concurrency slot")
+    except asyncio.TimeoutError:
+        _count("deadline_exceeded")
+        _breaker.record_failure()
+        raise LLMDeadlineExceeded("LLM stream missed its first-token or total deadline")
+    except Exception:
+        _breaker.record_failure()
+        raise
+    except BaseException:
+        _breaker.release()  # the consumer went away; says nothing about provider health
+        raise
+    _breaker.record_success()
+
+
+async def _complete_once(messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                         expires: Optional[float]) -> str:
+    """One attempt that queues for a slot and calls the provider within what is left of the deadline."""
+    semaphore = await _acquire_slot(expires)
+    try:
+        started = time.perf_counter()
+        text = await asyncio.wait_for(get_provider().complete(messages, temperature, max_tokens),
+                                      timeout=_remaining(expires))
+    finally:
+        semaphore.release()
+    # Latencies feed the hedge delay, so they measure the provider alone
+    _latencies.setdefault(max_tokens, LatencyWindow()).add(time.perf_counter() - started)
+    return text
+
+
+async def chat_completion(
+    messages: List[Dict[str, str]], temperature: float = 0.4, max_tokens: int = 250, deadline: Optional[float] = None
+) -> str:
+    """Run one chat completion under the concurrency limit and return the message text.
+
+    Gives up with LLMDeadlineExceeded after the deadline (LLM_DEADLINE_SECONDS
+    by default), counted from entry including the wait for a slot. With
+    LLM_HEDGE_PERCENTILE set, a duplicate request is fired once the call
+    outlives that percentile of recent latencies and the first answer wins;
+    the duplicate only gets what is left of the same deadline. Raises
+    CircuitOpenError without calling the provider while the circuit breaker
+    is open.
+    """
+    if not _breaker.allow():
+        raise CircuitOpenError("LLM provider unavailable (circuit open)")
+    _count("calls")
+    total = _deadline(deadline)
+    expires = None if total is None else time.perf_counter() + total
+    try:
+        text = await hedged(
+            lambda: _complete_once(messages, temperature, max_tokens, expires),
+            _hedge_delay(max_tokens),
+            on_hedge=lambda: _count("hedges_fired"),
+        )
+    except _QueueTimeout:
+        _count("deadline_exceeded")
+        _breaker.release()  # never reached the provider; says nothing about its health
+        raise LLMDeadlineExceeded(f"LLM call spent its {total:.0f}s deadline waiting for a concurrency slot")
+    except asyncio.TimeoutError:
+        _count("deadline_exceeded")
+        _breaker.record_failure()
+        raise LLMDeadlineExceeded(f"LLM call exceeded its {total:.0f}s deadline")
+    except Exception:
+        _breaker.record_failure()
+        raise
+    except BaseException:
+        _breaker.release()
+        raise
+    _breaker.record_success()
+    return text
 
 def clean_math_text(text: str) -> str:
     """Post-process text/math to remove artifacts and normalize symbols."""
@@ -39,13 +257,15 @@ def fallback_generator(chapter_title: str, topic: str, context_text: str) -> Dic
     ]
     return {"topic": exact_topic, "slides": slides, "is_fallback": True, "quality_score": 0.2}
 
-def generate_lesson_slides(chapter_title: str, retrieved_context: List[Dict[str, Any]], topic: str = None) -> Dict[str, Any]:
-    """Generation function using Groq's high-speed API with explicit constraint handling."""
+def build_lesson_messages(chapter_title: str, retrieved_context: List[Dict[str, Any]], topic: str = None):
+    """Build the (exact_topic, packed_context, messages) triple shared by the lesson generators."""
     exact_topic = topic if topic else chapter_title
     
-    # Token Control: limit to 4000 chars exactly as instructed
-    raw_context = "\n\n".join([e.get("text", "") for e in retrieved_context])
-    context_text = raw_context[:4000]
+    # Token Control: merge overlapping chunks and fill a real token budget by relevance
+    packed = pack_context(retrieved_context, token_budget=settings.LESSON_CONTEXT_TOKEN_BUDGET)
+    context_text = packed["text"]
+    print(f"📦 Lesson context: {packed['tokens']}/{packed['budget']} tokens "
+          f"from {packed['chunks_used']}/{packed['chunks_total']} chunks in {packed['passages']} passages")
 
     prompt = f"""
 STRICT RULES:
@@ -71,46 +291,82 @@ CONTEXT INFO:
 
 TOPIC: {exact_topic}
     """
+    messages = [
+        {"role": "system", "content": "You are a math teacher. Generate structured lesson content."},
+        {"role": "user", "content": prompt.strip()}
+    ]
+    return exact_topic, packed, messages
+
+def process_slide(slide: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize one raw LLM slide into the schema the frontend renders."""
+    return {
+        "title": clean_math_text(slide.get("title", "Algebra Focus")),
+        "bullets": [clean_math_text(b) for b in slide.get("bullets", [])],
+        "formula": clean_math_text(slide.get("formula", "")),
+        "example_steps": [clean_math_text(s) for s in slide.get("example_steps", [])],
+        "practice_questions": [clean_math_text(q) for q in slide.get("practice_questions", [])],
+        "narration": clean_math_text(slide.get("narration", ""))
+    }
+
+async def generate_lesson_slides(chapter_title: str, retrieved_context: List[Dict[str, Any]], topic: str = None) -> Dict[str, Any]:
+    """Generation function using Groq's high-speed API with explicit constraint handling."""
+    # Packing counts tokens over every retrieved chunk: keep it off the event loop
+    exact_topic, packed, messages = await run_in_threadpool(build_lesson_messages, chapter_title, retrieved_context, topic)
     
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "You are a math teacher. Generate structured lesson content."},
-                {"role": "user", "content": prompt.strip()}
-            ],
-            temperature=0.4,
-            max_tokens=2500
-        )
+        content = await chat_completion(messages, temperature=0.4, max_tokens=2500)
+
+        # Tolerant parse: keep every complete, schema-valid slide even if the array was
+        # cut off at max_tokens or one slide is malformed (fences/prose are skipped)
+        slides, report = salvage_slides(content)
+        if not slides:
+            raise ValueError(f"No usable slides in LLM output ({report['rejected']} rejected)")
+        is_partial = not report["complete"] or report["rejected"] > 0
+        if is_partial:
+            _count("partial_lessons")
+            _count("rejected_slides", report["rejected"])
+            print(f"🩹 Salvaged {report['recovered']} slides (rejected {report['rejected']}, "
+                  f"array {'complete' if report['complete'] else 'truncated'})")
 
-        content = response.choices[0].message.content.strip()
-        
-        # Important Output Cleaning
-        content = content.replace("```json", "").replace("```", "").strip()
-        
-        slides = json.loads(content)
-        
-        if not isinstance(slides, list):
-            raise ValueError("Parsed content is not a list")
-
-        processed_slides = []
-        for slide in slides:
-            processed_slides.append({
-                "title": clean_math_text(slide.get("title", "Algebra Focus")),
-                "bullets": [clean_math_text(b) for b in slide.get("bullets", [])],
-                "formula": clean_math_text(slide.get("formula", "")),
-                "example_steps": [clean_math_text(s) for s in slide.get("example_steps", [])],
-                "practice_questions": [clean_math_text(q) for q in slide.get("practice_questions", [])],
-                "narration": clean_math_text(slide.get("narration", ""))
-            })
+        processed_slides = [process_slide(slide) for slide in slides]
 
         return {
             "topic": exact_topic,
             "slides": processed_slides,
             "is_fallback": False,
-            "quality_score": 1.0
+            "is_partial": is_partial,
+            "quality_score": PARTIAL_QUALITY_SCORE if is_partial else 1.0,
+            "context_tokens": packed["tokens"]
         }
 
     except Exception as e:
         print(f"⚠️ Groq JSON failed: {str(e)}")
-        return fallback_generator(chapter_title, exact_topic, context_text)
+        return fallback_generator(chapter_title, exact_topic, packed["text"])
+
+async def stream_lesson_slides(chapter_title: str, retrieved_context: List[Dict[str, Any]], topic: str = None) -> AsyncIterator[Dict[str, Any]]:
+    """Streaming variant of generate_lesson_slides: yield each slide as soon as its JSON object closes.
+
+    Slides that do not fit the schema are skipped. Raises if the stream fails or
+    produces no slides, and IncompleteSlidesError after the last good slide if
+    the array was truncated or slides were dropped; the caller decides how to
+    store the result.
+    """
+    _, _, messages = await run_in_threadpool(build_lesson_messages, chapter_title, retrieved_context, topic)
+    parser = SlideArrayParser()
+    produced = 0
+    rejected = 0
+    async for token in stream_chat_completion(messages, temperature=0.4, max_tokens=2500):
+        for slide in parser.feed(token):
+            if validate_slide(slide) is not None:
+                rejected += 1
+                continue
+            produced += 1
+            yield process_slide(slide)
+    if produced == 0:
+        raise ValueError("Stream produced no complete slides")
+    rejected += parser.errors
+    if rejected or not parser.closed:
+        _count("partial_lessons")
+        _count("rejected_slides", rejected)
+        raise IncompleteSlidesError(f"Stream kept {produced} slides (rejected {rejected}, "
+                                    f"array {'complete' if parser.closed else 'truncated'})")
@@ -0,0 +1,260 @@
+"""LLM providers behind one streaming interface.
+
+Lesson generation and the AI tutor only call llm_service.chat_completion /
+stream_chat_completion, which delegate to the provider selected by
+LLM_PROVIDER:
+
+  groq      — the live Groq API (default)
+  cassette  — record/replay: LLM_CASSETTE_MODE=record proxies Groq and saves
+              every response to LLM_CASSETTE_PATH; replay serves them back
+              offline, optionally with the recorded timing
+  stub      — deterministic canned responses with configurable first-token
+              latency and token rate, for capacity tests without an API key
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from backend_app.core.config import settings
+
+LLM_MODEL = "llama-3.1-8b-instant"
+
+Messages = List[Dict[str, str]]
+
+
+class LLMProvider(ABC):
+    """Interface of every provider: a token stream and a whole completion."""
+
+    name = "base"
+
+    @abstractmethod
+    def stream(self, messages: Messages, temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        """Yield the completion's text as it is generated."""
+
+    @abstractmethod
+    async def complete(self, messages: Messages, temperature: float, max_tokens: int) -> str:
+        """Return the whole completion text."""
+
+    async def close(self) -> None:
+        """Release network resources (called on app shutdown)."""
+
+
+class StreamingProvider(LLMProvider):
+    """Base for providers that only implement stream(); complete() joins the streamed tokens."""
+
+    async def complete(self, messages: Messages, temperature: float, max_tokens: int) -> str:
+        return "".join([token async for token in self.stream(messages, temperature, max_tokens)])
+
+
+class GroqProvider(LLMProvider):
+    """Groq chat completions over a pooled httpx client (created lazily, so no key is needed to import)."""
+
+    name = "groq"
+
+    def __init__(self, model: str = LLM_MODEL):
+        self.model = model
+        self._client = None
+
+    def get_client(self):
+        if self._client is None:
+            from groq import AsyncGroq
+
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+                ),
+                timeout=settings.LLM_TIMEOUT_SECONDS,
+            )
+            self._client = AsyncGroq(api_key=settings.GROQ_API_KEY, http_client=http_client)
+        return self._client
+
+    async def stream(self, messages: Messages, temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        stream = await self.get_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+    async def complete(self, messages: Messages, temperature: float, max_tokens: int) -> str:
+        response = await self.get_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content or ""
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+class CassetteMiss(LookupError):
+    """Replay was asked for a request that is not on the cassette."""
+
+
+def request_key(messages: Messages, temperature: float, max_tokens: int, model: str = LLM_MODEL) -> str:
+    """Stable identity of a completion request, used as the cassette key."""
+    canonical = json.dumps([model, messages, round(float(temperature), 4), int(max_tokens)],
+                           ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CassetteProvider(StreamingProvider):
+    """Record/replay provider backed by a JSON file of {request_key: recording}.
+
+    A recording keeps the streamed chunks and their offsets (seconds since the
+    request started), so replay can reproduce the original timing when
+    realtime=True or return instantly otherwise.
+    """
+
+    name = "cassette"
+
+    def __init__(self, path: str, mode: str = "replay", upstream: Optional[LLMProvider] = None,
+                 realtime: bool = False):
+        if mode not in ("replay", "record"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.realtime = realtime
+        self.upstream = upstream if upstream is not None else (GroqProvider() if mode == "record" else None)
+        self._lock = threading.Lock()
+        self._recordings: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._recordings = json.load(f)
+
+    def __len__(self) -> int:
+        return len(self._recordings)
+
+    async def stream(self, messages: Messages, temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        key = request_key(messages, temperature, max_tokens)
+        recording = self._recordings.get(key)
+        if recording is not None:
+            started = time.perf_counter()
+            for chunk, offset in zip(recording["chunks"], recording["offsets"]):
+                if self.realtime:
+                    await asyncio.sleep(max(0.0, offset - (time.perf_counter() - started)))
+                yield chunk
+            return
+        if self.mode == "replay":
+            raise CassetteMiss(f"No recording for request {key[:12]} in {self.path}")
+
+        chunks, offsets = [], []
+        started = time.perf_counter()
+        async for chunk in self.upstream.stream(messages, temperature, max_tokens):
+            chunks.append(chunk)
+            offsets.append(round(time.perf_counter() - started, 4))
+            yield chunk
+        self._record(key, {"chunks": chunks, "offsets": offsets})
+
+    def _record(self, key: str, recording: Dict) -> None:
+        with self._lock:
+            self._recordings[key] = recording
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._recordings, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    async def close(self) -> None:
+        if self.upstream is not None:
+            await self.upstream.close()
+
+
+class StubProvider(StreamingProvider):
+    """Deterministic offline provider with a configurable first-token latency and token rate.
+
+    Lesson prompts (those carrying a TOPIC: line) get a valid slide array for
+    that topic; anything else gets a short tutor-style answer. The text depends
+    only on the request, so runs are reproducible.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_seconds: float = 0.5, tokens_per_second: float = 200.0, slides: int = 3):
+        self.latency_seconds = latency_seconds
+        self.tokens_per_second = tokens_per_second
+        self.slides = slides
+
+    def respond(self, messages: Messages) -> str:
+        prompt = messages[-1]["content"] if messages else ""
+        digest = request_key(messages, 0, 0)[:8]
+        topic_match = re.search(r"^TOPIC:\s*(.+)$", prompt, flags=re.MULTILINE)
+        if topic_match:
+            topic = topic_match.group(1).strip()
+            return json.dumps([
+                {
+                    "title": f"{topic.title()} — part {i + 1}",
+                    "bullets": [f"Key idea {i + 1} of {topic}", f"Stub response {digest}"],
+                    "formula": "p(x) = ax^2 + bx + c",
+                    "example_steps": ["Write the expression", "Substitute the value", "Simplify"],
+                    "practice_questions": [f"Practice {i + 1}: explain {topic}."],
+                    "narration": f"In this part we look at {topic} step by step.",
+                }
+                for i in range(self.slides)
+            ])
+        return f"This is a stub answer ({digest}). A zero of p(x) is a value k where p(k) = 0."
+
+    async def stream(self, messages: Messages, temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        tokens = re.findall(r"\S+\s*", self.respond(messages))[:max(1, max_tokens)]
+        if self.latency_seconds > 0:
+            await asyncio.sleep(self.latency_seconds)
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        for i, token in enumerate(tokens):
+            if delay and i:
+                await asyncio.sleep(delay)
+            yield token
+
+
+def build_provider(name: Optional[str] = None) -> LLMProvider:
+    """Create the provider named by LLM_PROVIDER (or name) from settings."""
+    name = (name or settings.LLM_PROVIDER).lower()
+    if name == "groq":
+        return GroqProvider()
+    if name == "cassette":
+        return CassetteProvider(settings.LLM_CASSETTE_PATH, mode=settings.LLM_CASSETTE_MODE,
+                                realtime=settings.LLM_CASSETTE_REALTIME)
+    if name == "stub":
+        return StubProvider(latency_seconds=settings.LLM_STUB_LATENCY_MS / 1000.0,
+                            tokens_per_second=settings.LLM_STUB_TOKENS_PER_SECOND)
+    raise ValueError(f"Unknown LLM_PROVIDER: {name}")
+
+
+_provider: Optional[LLMProvider] = None
+
+
+def get_provider() -> LLMProvider:
+    """The process-wide provider, built from settings on first use."""
+    global _provider
+    if _provider is None:
+        _provider = build_provider()
+    return _provider
+
+
+def set_provider(provider: Optional[LLMProvider]) -> None:
+    """Swap the process-wide provider (load tests, benchmarks); None rebuilds from settings."""
+    global _provider
+    _provider = provider
+
+
+async def close_provider() -> None:
+    global _provider
+    if _provider is not None:
+        await _provider.close()
+        _provider = None
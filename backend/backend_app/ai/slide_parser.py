@@ -0,0 +1,149 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# The slide schema rendered by the frontend (see llm_service.process_slide)
+SLIDE_TEXT_FIELDS = ("title", "formula", "narration")
+SLIDE_LIST_FIELDS = ("bullets", "example_steps", "practice_questions")
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_INVALID_ESCAPE = re.compile(r'(?<!\\)\\(?!["\\/bfnrtu])')
+
+
+class IncompleteSlidesError(ValueError):
+    """The LLM output ended early or contained unusable slides; the good slides were still returned."""
+
+
+def repair_json(raw: str) -> str:
+    """Fix the two slips LLMs make most: trailing commas and unescaped LaTeX backslashes (\\( \\sqrt ...)."""
+    raw = _TRAILING_COMMA.sub(r"\1", raw)
+    return _INVALID_ESCAPE.sub(r"\\\\", raw)
+
+
+def validate_slide(obj: Any) -> Optional[str]:
+    """Return why obj does not fit the slide schema, or None if it does."""
+    if not isinstance(obj, dict):
+        return "not an object"
+    title = obj.get("title")
+    if not isinstance(title, str) or not title.strip():
+        return "missing title"
+    for field in SLIDE_TEXT_FIELDS:
+        if field in obj and not isinstance(obj[field], str):
+            return f"{field} is not a string"
+    for field in SLIDE_LIST_FIELDS:
+        if field in obj and not (isinstance(obj[field], list) and all(isinstance(v, str) for v in obj[field])):
+            return f"{field} is not a list of strings"
+    if not any(obj.get(field) for field in ("bullets", "formula", "narration", "example_steps")):
+        return "no content"
+    return None
+
+
+class SlideArrayParser:
+    """Incrementally extract complete objects from a streamed JSON array.
+
+    Feed raw LLM text as it arrives; every time a top-level ``{...}`` element of
+    the array closes, it is decoded and returned. Text before the opening ``[``
+    (e.g. a stray ```json fence) is ignored, and string contents are tracked so
+    braces inside LaTeX or narration do not confuse the depth count.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0            # next unscanned index in _buf
+        self._in_array = False
+        self._depth = 0          # nesting depth inside the current element
+        self._obj_start = -1     # index of the current element's opening brace
+        self._in_string = False
+        self._escape = False
+        self.errors = 0          # elements that closed but failed to decode
+        self.repaired = 0        # elements that only decoded after repair_json
+        self.closed = False      # saw the closing bracket of the top-level array
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume a chunk of text and return any slide objects it completed."""
+        self._buf += text
+        completed = []
+        buf = self._buf
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if not self._in_array:
+                if ch == "[":
+                    self._in_array = True
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0 and ch == "{":
+                    self._obj_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    if ch == "]":
+                        self._in_array = False  # end of the top-level array
+                        self.closed = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0 and self._obj_start >= 0:
+                        obj = self._decode(buf[self._obj_start:i + 1])
+                        if obj is not None:
+                            completed.append(obj)
+                        self._obj_start = -1
+            i += 1
+
+        # Drop text that can no longer be part of an element to keep the buffer small
+        keep_from = self._obj_start if self._obj_start >= 0 else i
+        self._buf = buf[keep_from:]
+        if self._obj_start >= 0:
+            self._obj_start = 0
+        self._pos = i - keep_from
+        return completed
+
+    @property
+    def in_element(self) -> bool:
+        """True while the text fed so far stops inside an element (or a string) of the array."""
+        return self._depth > 0 or self._in_string
+
+    def _decode(self, raw: str):
+        try:
+            obj = json.loads(raw)
+        except ValueError:
+            try:
+                obj = json.loads(repair_json(raw))
+            except ValueError:
+                self.errors += 1
+                return None
+            self.repaired += 1
+        return obj if isinstance(obj, dict) else None
+
+
+def salvage_slides(text: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Recover every complete, schema-valid slide from a possibly truncated or malformed array.
+
+    Returns (slides, report) where report counts recovered, rejected
+    (undecodable or invalid) and repaired slides, and says whether the array
+    was complete. A bare object without the surrounding array is accepted too.
+    """
+    parser = SlideArrayParser()
+    first_object, first_array = text.find("{"), text.find("[")
+    bare = first_object >= 0 and (first_array < 0 or first_object < first_array)
+    if bare:
+        # Lists inside the object (bullets) must not be taken for the slide array
+        text = "[" + text[first_object:]
+    candidates = parser.feed(text)
+    if bare and not parser.in_element:
+        candidates += parser.feed("]")  # the object closed, so the implied array did too
+    slides = [obj for obj in candidates if validate_slide(obj) is None]
+    report = {
+        "recovered": len(slides),
+        "rejected": parser.errors + len(candidates) - len(slides),
+        "repaired": parser.repaired,
+        "complete": parser.closed,
+    }
+    return slides, report
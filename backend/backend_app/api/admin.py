@@ -0,0 +1,39 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+
+from backend_app.core.security import get_current_admin
+from backend_app.rag.index_snapshots import current_snapshot
+from backend_app.rag.vector_service import get_vector_manager, snapshot_root
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def _index_status() -> Dict[str, Any]:
+    manager = get_vector_manager()
+    stats = manager.stats()
+    return {
+        "snapshot": stats["snapshot"],
+        "published_snapshot": current_snapshot(snapshot_root()),
+        "version": stats["version"],
+        "index_type": stats["index_type"],
+        "vectors": stats["vectors"],
+    }
+
+
+@router.get("/index")
+async def index_status(_=Depends(get_current_admin)) -> Dict[str, Any]:
+    """Active index snapshot of this worker next to the latest published one (admin-only)."""
+    return await run_in_threadpool(_index_status)
+
+
+@router.post("/index/reload")
+async def reload_index(_=Depends(get_current_admin)) -> Dict[str, Any]:
+    """Swap in the latest published index snapshot in this worker (admin-only).
+
+    The snapshot is loaded on a worker thread while searches continue on the
+    old one. Other workers pick it up through their snapshot watcher.
+    """
+    reloaded = await run_in_threadpool(lambda: get_vector_manager().reload_index())
+    return {"reloaded": reloaded, **await run_in_threadpool(_index_status)}
@@ -1,14 +1,23 @@
-import os
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 from typing import List, Optional
 import traceback
 
-import json
-from backend_app.ai.llm_service import client
+from backend_app.ai.llm_service import chat_completion, stream_chat_completion
+from backend_app.core.resilience import CircuitOpenError
+from backend_app.core.sse import SSE_HEADERS, sse_event
+from backend_app.db.session import SessionLocal, get_db
+from backend_app.rag.vector_service import get_vector_manager
+from backend_app.services.tutor_cache import context_hash, normalize_question, tutor_cache
 
 router = APIRouter()
 
+# Similar-question matching reuses the shared sentence embedding model
+tutor_cache.configure_encoder(lambda texts: get_vector_manager().embed_queries(texts))
+
 class SlideContext(BaseModel):
     title: Optional[str] = ""
     bullets: Optional[List[str]] = []
@@ -18,20 +27,23 @@ class SlideContext(BaseModel):
 class AskRequest(BaseModel):
     question: str
     context: SlideContext
+    bypass_cache: Optional[bool] = False  # force a fresh LLM answer (the cache is still refreshed)
 
-@router.post("/ask")
-def ask_ai_tutor(request: AskRequest):
-    try:
-        # Format context for the tutor
-        bullets_text = " ".join(request.context.bullets) if request.context.bullets else "None"
-        context_str = (
-            f"Slide Title: {request.context.title}\n"
-            f"Bullets: {bullets_text}\n"
-            f"Formula: {request.context.formula}\n"
-            f"Narration: {request.context.narration}"
-        )
-        
-        prompt = f"""
+NO_ANSWER = "I don't see that in the current lesson"
+
+
+def build_tutor_messages(request: AskRequest) -> List[dict]:
+    """Prompt shared by the JSON and streaming tutor endpoints."""
+    # Format context for the tutor
+    bullets_text = " ".join(request.context.bullets) if request.context.bullets else "None"
+    context_str = (
+        f"Slide Title: {request.context.title}\n"
+        f"Bullets: {bullets_text}\n"
+        f"Formula: {request.context.formula}\n"
+        f"Narration: {request.context.narration}"
+    )
+    
+    prompt = f"""
 You are a helpful math tutor.
 
 Context:
@@ -45,28 +57,103 @@ Rules:
 - Stay within the provided context.
 - Keep the response concise.
 """
-        
-        # Call Groq
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "You are a helpful math tutor."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.4,
-            max_tokens=250
-        )
-        
-        answer = response.choices[0].message.content.strip()
+    return [
+        {"role": "system", "content": "You are a helpful math tutor."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+async def _lookup_cached_answer(request: AskRequest, db: Session):
+    """Return (context hash, normalized question, cached answer or None)."""
+    # Repeat questions on the same slide are answered from the cache
+    ctx_hash = context_hash(request.context.title, request.context.bullets,
+                            request.context.formula, request.context.narration)
+    question_key = normalize_question(request.question)
+    if request.bypass_cache:
+        tutor_cache.note_bypass()
+        return ctx_hash, question_key, None
+    cached = tutor_cache.lookup_memory(ctx_hash, question_key) or \
+        await run_in_threadpool(tutor_cache.lookup, db, ctx_hash, question_key)
+    return ctx_hash, question_key, cached
+
+
+@router.post("/ask")
+async def ask_ai_tutor(request: AskRequest, db: Session = Depends(get_db)):
+    try:
+        ctx_hash, question_key, cached = await _lookup_cached_answer(request, db)
+        if cached:
+            return {"answer": cached, "cached": True}
+
+        # Call Groq (async, under the shared concurrency limit)
+        answer = await chat_completion(build_tutor_messages(request), temperature=0.4, max_tokens=250)
+        answer = answer.strip()
         
         if not answer:
-            return {"answer": "I don't see that in the current lesson"}
-            
-        return {"answer": answer}
-        
+            return {"answer": NO_ANSWER}
+
+        try:
+            await run_in_threadpool(tutor_cache.store, db, ctx_hash, question_key, answer)
+        except Exception:
+            # The answer is already paid for; a failed cache write must not turn it into a 500
+            traceback.print_exc()
+        return {"answer": answer, "cached": False}
+
+    except CircuitOpenError:
+        # Fail fast while the LLM is down instead of holding the request open
+        raise HTTPException(status_code=503, detail="AI tutor is temporarily unavailable, please retry shortly")
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/ask/stream")
+async def ask_ai_tutor_stream(request: AskRequest, db: Session = Depends(get_db)):
+    """Stream the tutor answer as Server-Sent Events.
+
+    Emits a `token` event per Groq delta as it arrives, then a `done` event with
+    the full answer (or an `error` event). Same prompt and answer cache as /ask,
+    which keeps its JSON contract for older clients.
+    """
+    try:
+        ctx_hash, question_key, cached = await _lookup_cached_answer(request, db)
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+    messages = build_tutor_messages(request)
+
+    async def event_stream():
+        if cached:
+            yield sse_event("token", {"text": cached})
+            yield sse_event("done", {"answer": cached, "cached": True})
+            return
+
+        parts = []
+        try:
+            async for token in stream_chat_completion(messages, temperature=0.4, max_tokens=250):
+                parts.append(token)
+                yield sse_event("token", {"text": token})
+        except Exception as e:
+            traceback.print_exc()
+            yield sse_event("error", {"detail": str(e)})
+            return
+
+        answer = "".join(parts).strip()
+        if not answer:
+            yield sse_event("token", {"text": NO_ANSWER})
+            yield sse_event("done", {"answer": NO_ANSWER, "cached": False})
+            return
+
+        # The request-scoped session may already be closed once streaming starts
+        store_db = SessionLocal()
+        try:
+            await run_in_threadpool(tutor_cache.store, store_db, ctx_hash, question_key, answer)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            store_db.close()
+        yield sse_event("done", {"answer": answer, "cached": False})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 class TopicQuery(BaseModel):
     query: str
@@ -10,5 +10,83 @@ class Settings:
     SECRET_KEY: str = os.getenv("SECRET_KEY", "change_this_secret_key_for_production")
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 
+    # LLM backend: groq (live API), cassette (record/replay file) or stub (offline, deterministic)
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "groq")
+    LLM_CASSETTE_PATH: str = os.getenv("LLM_CASSETTE_PATH", "llm_cassette.json")
+    LLM_CASSETTE_MODE: str = os.getenv("LLM_CASSETTE_MODE", "replay")
+    LLM_CASSETTE_REALTIME: bool = os.getenv("LLM_CASSETTE_REALTIME", "false").lower() in ("1", "true", "yes")
+    LLM_STUB_LATENCY_MS: float = float(os.getenv("LLM_STUB_LATENCY_MS", "500"))
+    LLM_STUB_TOKENS_PER_SECOND: float = float(os.getenv("LLM_STUB_TOKENS_PER_SECOND", "200"))
+
+    # LLM client: cap on concurrent in-flight completions and pooled HTTP connections
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+    # Per-call deadline (s, 0 = none) and max wait for the first streamed token
+    LLM_DEADLINE_SECONDS: float = float(os.getenv("LLM_DEADLINE_SECONDS", "25"))
+    LLM_FIRST_TOKEN_SECONDS: float = float(os.getenv("LLM_FIRST_TOKEN_SECONDS", "10"))
+    # Hedging: fire a duplicate call past this latency percentile of recent calls (0 disables)
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "0"))
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    # Circuit breaker: open after N consecutive failures, probe again after the reset period
+    LLM_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    LLM_BREAKER_RESET_SECONDS: float = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+    # Prompt tokens reserved for retrieved textbook context in lesson generation
+    LESSON_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("LESSON_CONTEXT_TOKEN_BUDGET", "1000"))
+
+    # Sentence embedding model (hub name or local path) and how it runs on CPU:
+    # torch, torch_int8 (dynamic int8 quantization), onnx or onnx_int8 (VECTOR_ONNX_FILE)
+    VECTOR_EMBEDDING_MODEL: str = os.getenv("VECTOR_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    VECTOR_EMBEDDING_BACKEND: str = os.getenv("VECTOR_EMBEDDING_BACKEND", "torch")
+    VECTOR_ONNX_FILE: str = os.getenv("VECTOR_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
+    # FAISS index built at ingest: flat (exact), ivf_flat, hnsw or ivf_pq
+    VECTOR_INDEX_TYPE: str = os.getenv("VECTOR_INDEX_TYPE", "flat")
+    # Memory-map the saved index and chunk store (shared by all workers) instead of reading them into RAM
+    VECTOR_INDEX_MMAP: bool = os.getenv("VECTOR_INDEX_MMAP", "true").lower() in ("1", "true", "yes")
+    # Published index snapshots kept on disk, and how often workers check for a new one (0 = never;
+    # POST /admin/index/reload still works)
+    VECTOR_SNAPSHOT_KEEP: int = int(os.getenv("VECTOR_SNAPSHOT_KEEP", "3"))
+    VECTOR_RELOAD_POLL_SECONDS: float = float(os.getenv("VECTOR_RELOAD_POLL_SECONDS", "10"))
+    # LRU sizes for query embeddings and search results (results are dropped whenever the index changes)
+    VECTOR_EMBEDDING_CACHE_SIZE: int = int(os.getenv("VECTOR_EMBEDDING_CACHE_SIZE", "2048"))
+    VECTOR_RESULT_CACHE_SIZE: int = int(os.getenv("VECTOR_RESULT_CACHE_SIZE", "1024"))
+    # Micro-batching of concurrent query embeddings: max texts per model call (<= 1 disables) and
+    # how long the first request waits for company (ms)
+    VECTOR_EMBED_MAX_BATCH: int = int(os.getenv("VECTOR_EMBED_MAX_BATCH", "64"))
+    VECTOR_EMBED_BATCH_WAIT_MS: float = float(os.getenv("VECTOR_EMBED_BATCH_WAIT_MS", "2"))
+    # Load the embedding model and index on a background thread at startup (else on the first search);
+    # /health/ready reports 503 until this finishes
+    VECTOR_WARM_ON_STARTUP: bool = os.getenv("VECTOR_WARM_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+    # IVF cells (0 = ~4*sqrt(corpus size)) and cells probed per query
+    VECTOR_IVF_NLIST: int = int(os.getenv("VECTOR_IVF_NLIST", "0"))
+    VECTOR_IVF_NPROBE: int = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+    # HNSW graph degree and build/query beam widths
+    VECTOR_HNSW_M: int = int(os.getenv("VECTOR_HNSW_M", "32"))
+    VECTOR_HNSW_EF_CONSTRUCTION: int = int(os.getenv("VECTOR_HNSW_EF_CONSTRUCTION", "40"))
+    VECTOR_HNSW_EF_SEARCH: int = int(os.getenv("VECTOR_HNSW_EF_SEARCH", "64"))
+    # IVF-PQ code size: sub-quantizers per vector and bits per sub-quantizer
+    VECTOR_PQ_M: int = int(os.getenv("VECTOR_PQ_M", "48"))
+    VECTOR_PQ_NBITS: int = int(os.getenv("VECTOR_PQ_NBITS", "8"))
+
+    # Ingest: processes extracting/splitting PDFs (0 = one per CPU) and chunks per embedding batch and DB commit
+    INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", "0"))
+    INGEST_EMBED_BATCH_SIZE: int = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "128"))
+
+    # In-process lesson cache in front of the lesson_content table
+    LESSON_MEMORY_CACHE_SIZE: int = int(os.getenv("LESSON_MEMORY_CACHE_SIZE", "256"))
+    LESSON_MEMORY_CACHE_TTL_SECONDS: float = float(os.getenv("LESSON_MEMORY_CACHE_TTL_SECONDS", "600"))
+    # zlib level for the stored, pre-serialized lesson payloads
+    LESSON_COMPRESSION_LEVEL: int = int(os.getenv("LESSON_COMPRESSION_LEVEL", "6"))
+
+    # Reuse a cached lesson whose topic embedding is at least this cosine-similar
+    # (0, the default, disables; close topics such as "sum of zeroes" and "product of zeroes" can match, so opt in)
+    TOPIC_SIMILARITY_THRESHOLD: float = float(os.getenv("TOPIC_SIMILARITY_THRESHOLD", "0"))
+
+    # Tutor answer cache: row cap, age limit, and question-similarity threshold
+    # (0, the default, = exact match only; similar questions can need different answers, so opt in)
+    TUTOR_CACHE_MAX_ROWS: int = int(os.getenv("TUTOR_CACHE_MAX_ROWS", "5000"))
+    TUTOR_CACHE_TTL_HOURS: float = float(os.getenv("TUTOR_CACHE_TTL_HOURS", "168"))
+    TUTOR_CACHE_SEMANTIC_THRESHOLD: float = float(os.getenv("TUTOR_CACHE_SEMANTIC_THRESHOLD", "0"))
+
 
 settings = Settings()
@@ -0,0 +1,20 @@
+from typing import Any, Callable, Dict
+
+# name -> callable returning a JSON-serializable snapshot of that component's counters
+_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_metrics(name: str, snapshot: Callable[[], Dict[str, Any]]) -> None:
+    """Expose a component's counters under `name` on the /metrics endpoint."""
+    _sources[name] = snapshot
+
+
+def collect_metrics() -> Dict[str, Any]:
+    """Snapshot every registered component; a failing source reports its error instead."""
+    out = {}
+    for name, snapshot in _sources.items():
+        try:
+            out[name] = snapshot()
+        except Exception as e:
+            out[name] = {"error": str(e)}
+    return out
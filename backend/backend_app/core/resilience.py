@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency the breaker considers unhealthy."""
+
+
+class CircuitBreaker:
+    """Classic three-state circuit breaker.
+
+    After failure_threshold consecutive failures the circuit opens and calls are
+    rejected for reset_seconds. Then a single probe call is let through
+    (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._consecutive_failures = 0
+        self.counters = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+            self._state = HALF_OPEN
+        return self._state
+
+    def available(self) -> bool:
+        """True unless calls would currently be rejected (does not claim the half-open probe)."""
+        with self._lock:
+            state = self._current_state()
+            return state == CLOSED or (state == HALF_OPEN and not self._probe_in_flight)
+
+    def allow(self) -> bool:
+        """Claim permission for one call; every allowed call must end in record_success/failure/release."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.counters["rejected"] += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.counters["successes"] += 1
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            self._state = CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.counters["failures"] += 1
+            self._consecutive_failures += 1
+            was_probe = self._probe_in_flight
+            self._probe_in_flight = False
+            if was_probe or (self._state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self.counters["opened"] += 1
+
+    def release(self) -> None:
+        """End an allowed call that neither succeeded nor failed (e.g. the caller went away)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            stats = dict(self.counters)
+            stats.update(state=state, consecutive_failures=self._consecutive_failures,
+                         failure_threshold=self.failure_threshold, reset_seconds=self.reset_seconds)
+            if state == OPEN:
+                stats["retry_in_seconds"] = round(self.reset_seconds - (self._clock() - self._opened_at), 2)
+        return stats
+
+
+class LatencyWindow:
+    """Rolling window of recent call latencies (seconds) for percentile estimates."""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            values = sorted(self._samples)
+        if not values:
+            return None
+        index = min(len(values) - 1, max(0, int(round(pct / 100.0 * len(values))) - 1))
+        return values[index]
+
+
+async def hedged(call: Callable[[], Awaitable[T]], hedge_after: Optional[float],
+                 on_hedge: Optional[Callable[[], None]] = None) -> T:
+    """Await call(); if it has not finished after hedge_after seconds, start a second
+    identical call and return whichever succeeds first, cancelling the other.
+
+    Raises the last error if both attempts fail. hedge_after=None disables hedging.
+    """
+    primary = asyncio.ensure_future(call())
+    if hedge_after is None:
+        return await primary
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            if on_hedge is not None:
+                on_hedge()
+            tasks.add(asyncio.ensure_future(call()))
+        error: Optional[BaseException] = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
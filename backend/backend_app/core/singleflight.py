@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _LeaderCancelled(Exception):
+    """Raised to followers when the leader was cancelled before finishing."""
+
+
+class SingleFlight:
+    """Coalesce concurrent coroutine calls that share a key into one execution.
+
+    The first caller for a key (the leader) awaits ``fn``; every caller that
+    arrives while it is still running awaits the same result (or the same
+    exception). Once the call finishes the key is released, so the next caller
+    starts a fresh execution. If the leader is cancelled (e.g. its client
+    disconnected), one of the waiting followers takes over as the new leader.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            fut = self._calls.get(key)
+            if fut is None:
+                break
+            try:
+                # shield: a cancelled follower must not cancel the shared future
+                return await asyncio.shield(fut)
+            except _LeaderCancelled:
+                continue
+
+        self.start(key)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.finish(key, error=e)
+            raise
+        self.finish(key, result=result)
+        return result
+
+    def start(self, key: str) -> bool:
+        """Register the caller as leader for key without running a callable.
+
+        Used by producers that cannot be expressed as a single awaitable (e.g.
+        a streaming generator). Returns False if another leader is in flight.
+        Every successful start() must be paired with finish().
+        """
+        if key in self._calls:
+            return False
+        self._calls[key] = asyncio.get_running_loop().create_future()
+        return True
+
+    def finish(self, key: str, result: Any = None, error: BaseException = None) -> None:
+        """Release key and hand result (or error) to every waiting follower."""
+        fut = self._calls.pop(key, None)
+        if fut is None or fut.done():
+            return
+        if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            error = _LeaderCancelled()
+        if error is not None:
+            fut.set_exception(error)
+            # Mark the exception as retrieved so a flight without followers does not log a warning
+            fut.exception()
+        else:
+            fut.set_result(result)
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
@@ -0,0 +1,11 @@
+import json
+from typing import Any
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# Headers that stop proxies (nginx) and browsers from buffering an event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
@@ -0,0 +1,78 @@
+"""Startup timings and the readiness of components warmed in the background.
+
+main.py records how long importing the app and running the lifespan startup
+took; warm_in_background() loads a heavy component (the embedding model and
+FAISS index) on a daemon thread so the server accepts connections meanwhile,
+and records its state and duration. Everything is exposed under "startup" on
+/metrics, and /health/ready reports ready once every warm-up has finished.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from backend_app.core.metrics import register_metrics
+
+# Reference point for import_seconds and ready_after_seconds: main.py imports this module first
+_origin = time.perf_counter()
+_lock = threading.Lock()
+_timings: Dict[str, float] = {}
+# name -> {"state": "loading" | "ready" | "failed", "seconds", "ready_after_seconds", "error"}
+_components: Dict[str, Dict[str, Any]] = {}
+
+
+def seconds_since_import() -> float:
+    return time.perf_counter() - _origin
+
+
+def record_timing(name: str, seconds: float) -> None:
+    with _lock:
+        _timings[name] = round(seconds, 3)
+
+
+def warm_in_background(name: str, load: Callable[[], Any]) -> threading.Thread:
+    """Run load() on a daemon thread, tracking `name` as loading until it returns or raises."""
+    with _lock:
+        _components[name] = {"state": "loading"}
+
+    def run():
+        started = time.perf_counter()
+        try:
+            load()
+        except Exception as e:
+            print(f"⚠️ Warm-up of {name} failed: {e}")
+            status = {"state": "failed", "error": str(e)}
+        else:
+            status = {"state": "ready"}
+        finished = time.perf_counter()
+        status["seconds"] = round(finished - started, 3)
+        status["ready_after_seconds"] = round(seconds_since_import(), 3)
+        with _lock:
+            _components[name] = status
+
+    thread = threading.Thread(target=run, name=f"warm-{name}", daemon=True)
+    thread.start()
+    return thread
+
+
+def readiness() -> Tuple[bool, Dict[str, Dict[str, Any]]]:
+    """(every warm-up finished successfully, per-component status)."""
+    with _lock:
+        components = {name: dict(status) for name, status in _components.items()}
+    return all(status["state"] == "ready" for status in components.values()), components
+
+
+def startup_stats() -> Dict[str, Any]:
+    ready, components = readiness()
+    with _lock:
+        timings = dict(_timings)
+    return {"ready": ready, "timings": timings, "components": components}
+
+
+def reset() -> None:
+    """Forget recorded timings and warm-ups (tests)."""
+    with _lock:
+        _timings.clear()
+        _components.clear()
+
+
+register_metrics("startup", startup_stats)
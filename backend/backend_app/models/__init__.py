@@ -4,5 +4,6 @@ from .chapter_content import ChapterContent
 from .attention_log import AttentionLog
 from .learning_session import LearningSession
 from .lesson_content import LessonContent
+from .tutor_answer import TutorAnswer
 
-__all__ = ["User", "Subject", "ChapterContent", "AttentionLog", "LearningSession", "LessonContent"]
+__all__ = ["User", "Subject", "ChapterContent", "AttentionLog", "LearningSession", "LessonContent", "TutorAnswer"]
@@ -10,3 +10,5 @@ class ChapterContent(Base):
     content = Column(Text, nullable=False)
     page_number = Column(Integer, nullable=True)
     source = Column(String, nullable=True)
+    # sha256 of content; re-ingesting skips chunks whose hash the chapter already has
+    content_hash = Column(String(64), index=True, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, LargeBinary
 from backend_app.db.base import Base
 import datetime
 
@@ -7,7 +7,12 @@ class LessonContent(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     chapter_id = Column(String, unique=True, index=True, nullable=False)
-    content_json = Column(Text, nullable=False)
+    # Legacy uncompressed slides JSON; left empty once content_blob is written
+    content_json = Column(Text, nullable=False, default="")
+    # zlib-compressed, response-ready slides JSON (see services/lesson_payload.py)
+    content_blob = Column(LargeBinary, nullable=True)
     is_fallback = Column(Boolean, default=False)
+    # Salvaged from truncated/partly malformed LLM output: served, but fewer slides than asked for
+    is_partial = Column(Boolean, default=False)
     quality_score = Column(Float, default=0.0)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, LargeBinary
+from backend_app.db.base import Base
+import datetime
+
+
+class TutorAnswer(Base):
+    __tablename__ = "tutor_answers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String, unique=True, index=True, nullable=False)  # hash(slide context + question)
+    context_hash = Column(String, index=True, nullable=False)
+    question = Column(Text, nullable=False)  # normalized question text
+    question_embedding = Column(LargeBinary, nullable=True)  # float32 vector for similarity matching
+    answer = Column(Text, nullable=False)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
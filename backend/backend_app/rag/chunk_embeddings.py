@@ -0,0 +1,60 @@
+"""Persistent content_hash -> embedding cache for indexed chunks.
+
+Ingest consults it before calling the model, so re-ingesting a chapter only
+encodes chunks whose text changed. It is kept next to the index and pruned to
+the chunks the index holds when saved; vectors are the exact model output
+(unlike vectors read back from an ivf_pq index). The file records the model
+it was computed with and is ignored when a different model is configured.
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from backend_app.rag.embedding_backends import same_embedding_model
+
+
+class ChunkEmbeddingCache:
+    def __init__(self, model_name: str, vectors: Optional[Dict[str, np.ndarray]] = None):
+        self.model_name = model_name
+        self._vectors: Dict[str, np.ndarray] = dict(vectors or {})
+
+    @classmethod
+    def load(cls, path: str, model_name: str) -> "ChunkEmbeddingCache":
+        """The cache saved at path, or an empty one if it is missing or was built by another model."""
+        if not os.path.exists(path):
+            return cls(model_name)
+        with np.load(path, allow_pickle=False) as saved:
+            if not same_embedding_model(json.loads(str(saved["meta"]))["model"], model_name):
+                print(f"⚠️ {path} was computed with another model; re-encoding every chunk")
+                return cls(model_name)
+            return cls(model_name, dict(zip((str(h) for h in saved["hashes"]), saved["vectors"])))
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._vectors
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        return self._vectors.get(key)
+
+    def put(self, keys: List[str], vectors: np.ndarray) -> None:
+        for key, vector in zip(keys, vectors):
+            self._vectors[key] = vector
+
+    def retain(self, keys: Iterable[str]) -> None:
+        """Drop every vector whose key is not in keys."""
+        keep = set(keys)
+        self._vectors = {key: vector for key, vector in self._vectors.items() if key in keep}
+
+    def save(self, path: str) -> None:
+        """Write the cache to path atomically."""
+        keys = sorted(self._vectors)
+        vectors = np.stack([self._vectors[key] for key in keys]) if keys else np.zeros((0, 0), dtype="float32")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps({"model": self.model_name})),
+                     hashes=np.array(keys, dtype="U64"), vectors=vectors.astype("float32"))
+        os.replace(tmp_path, path)
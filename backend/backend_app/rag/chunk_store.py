@@ -0,0 +1,182 @@
+"""Compact on-disk store for the chunk texts and metadata aligned with the FAISS index.
+
+File layout (little-endian):
+
+  b"CHUNKS1\\0"             magic
+  uint64 count, uint64 meta_len
+  uint64 offsets[count + 1]  record boundaries, relative to the data section
+  meta_len bytes            JSON object for store-level data (e.g. chapter partitions)
+  data                      one UTF-8 JSON record {"text", "metadata"} per entry
+
+The file is memory-mapped, so opening it reads only the header and every
+worker process shares the same pages through the OS cache; an entry is only
+decoded when it is looked up (a search decodes its top-k hits).
+
+Convert a legacy faiss_entries.json:
+  python -m backend_app.rag.chunk_store backend/faiss_entries.json backend/faiss_chunks.bin
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"CHUNKS1\0"
+_HEADER = struct.Struct("<8sQQ")
+
+
+def partition_key(chapter_id: Any) -> str:
+    """Normalize a chapter id so API ids ("chapter_2") and ingest metadata ("2") name the same partition."""
+    key = str(chapter_id).strip()
+    return key[len("chapter_"):] if key.startswith("chapter_") else key
+
+
+def content_hash(text: str) -> str:
+    """Key of a chunk's text: identical chunks share it across runs, so re-ingesting can skip them."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def entry_hash(entry: Dict[str, Any]) -> str:
+    """content_hash of an entry (recorded in its metadata at ingest; computed for older entries)."""
+    return (entry.get("metadata") or {}).get("content_hash") or content_hash(entry["text"])
+
+
+def add_partitions(partitions: Dict[str, List[Tuple[int, int]]], start: int,
+                   metadatas: Iterable[Optional[Dict[str, Any]]]) -> None:
+    """Extend {partition_key: [(start, end), ...]} runs of positions with entries added at start.."""
+    for position, metadata in enumerate(metadatas, start):
+        chapter_id = (metadata or {}).get("chapter_id")
+        if chapter_id is None:
+            continue
+        runs = partitions.setdefault(partition_key(chapter_id), [])
+        if runs and runs[-1][1] == position:
+            runs[-1] = (runs[-1][0], position + 1)
+        else:
+            runs.append((position, position + 1))
+
+
+def _encode(entry: Dict[str, Any]) -> bytes:
+    return json.dumps({"text": entry["text"], "metadata": entry.get("metadata")},
+                      ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ChunkStore:
+    """Sequence of {"text", "metadata"} entries: an optional mapped file plus entries appended in memory."""
+
+    def __init__(self, entries: Optional[Iterable[Dict[str, Any]]] = None, meta: Optional[Dict[str, Any]] = None):
+        self.meta: Dict[str, Any] = dict(meta or {})
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._offsets = np.zeros(1, dtype="<u8")
+        self._data_start = 0
+        self._appended: List[Dict[str, Any]] = list(entries or [])
+
+    @classmethod
+    def open(cls, path: str) -> "ChunkStore":
+        store = cls()
+        store._file = open(path, "rb")
+        store._map = mmap.mmap(store._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, meta_len = _HEADER.unpack_from(store._map, 0)
+        if magic != MAGIC:
+            store.close()
+            raise ValueError(f"{path} is not a chunk store")
+        offsets_start = _HEADER.size
+        meta_start = offsets_start + 8 * (count + 1)
+        store._offsets = np.frombuffer(store._map, dtype="<u8", count=count + 1, offset=offsets_start)
+        store.meta = json.loads(store._map[meta_start:meta_start + meta_len].decode("utf-8"))
+        store._data_start = meta_start + meta_len
+        return store
+
+    @classmethod
+    def from_json(cls, path: str) -> "ChunkStore":
+        """Load a legacy faiss_entries.json list into memory."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @property
+    def mapped_count(self) -> int:
+        return len(self._offsets) - 1
+
+    def __len__(self) -> int:
+        return self.mapped_count + len(self._appended)
+
+    def _raw(self, i: int) -> bytes:
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return self._map[self._data_start + int(start):self._data_start + int(end)]
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        if i < self.mapped_count:
+            return json.loads(self._raw(i).decode("utf-8"))
+        return self._appended[i - self.mapped_count]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        self._appended.append(entry)
+
+    def save(self, path: str) -> None:
+        """Write every entry to path atomically (mapped records are copied without decoding)."""
+        tmp_path = f"{path}.tmp"
+        self.write(tmp_path)
+        # Readers that still map the old file keep reading the old inode
+        os.replace(tmp_path, path)
+
+    def write(self, path: str, meta: Optional[Dict[str, Any]] = None) -> None:
+        """Write every entry to path in place (with meta instead of self.meta if given); save() is the atomic variant."""
+        appended = [_encode(e) for e in self._appended]
+        mapped_bytes = int(self._offsets[-1])
+        offsets = np.concatenate([
+            self._offsets, mapped_bytes + np.cumsum([len(r) for r in appended], dtype="<u8"),
+        ]).astype("<u8")
+        meta = json.dumps(self.meta if meta is None else meta, ensure_ascii=False).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(offsets) - 1, len(meta)))
+            f.write(offsets.tobytes())
+            f.write(meta)
+            if mapped_bytes:
+                f.write(self._map[self._data_start:self._data_start + mapped_bytes])
+            for record in appended:
+                f.write(record)
+
+    def close(self) -> None:
+        self._offsets = np.zeros(1, dtype="<u8")
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_entries(path: str) -> ChunkStore:
+    """Open a chunk store file, or load a legacy JSON entries list into memory."""
+    with open(path, "rb") as f:
+        is_store = f.read(len(MAGIC)) == MAGIC
+    return ChunkStore.open(path) if is_store else ChunkStore.from_json(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert faiss_entries.json to the mmap chunk store")
+    parser.add_argument("source", help="Legacy JSON entries file")
+    parser.add_argument("target", help="Chunk store file to write")
+    args = parser.parse_args()
+    store = ChunkStore.from_json(args.source)
+    partitions: Dict[str, List[Tuple[int, int]]] = {}
+    add_partitions(partitions, 0, (entry.get("metadata") for entry in store))
+    store.meta["partitions"] = partitions
+    store.save(args.target)
+    print(f"Wrote {len(store)} entries to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import re
+import threading
+from typing import Any, Dict, List
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+# Longest overlap searched when stitching adjacent chunks (ingest uses chunk_overlap=150)
+_MAX_OVERLAP_CHARS = 400
+
+
+# BPE encoding set by load_encoding(); never loaded on the request path
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def load_encoding() -> bool:
+    """Load the BPE encoding used by count_tokens (called once at startup); True if it loaded.
+
+    cl100k is close to the Llama 3 tokenizer Groq serves. Its BPE file may be
+    fetched over the network on first load; until it is loaded, or if that
+    fails, count_tokens uses its estimate.
+    """
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:  # not installed, or the BPE file cannot be fetched offline
+                print(f"⚠️ Token encoding unavailable, estimating token counts: {e}")
+                return False
+    return True
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text for the LLM prompt (BPE once load_encoding() ran, else a close estimate)."""
+    if not text:
+        return 0
+    encoding = _encoding
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # Estimate: one token per word/symbol, plus one per extra 6 characters in long words
+    return sum(1 + (len(tok) - 1) // 6 for tok in _TOKEN_PATTERN.findall(text))
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of left that is also a prefix of right."""
+    limit = min(len(left), len(right), _MAX_OVERLAP_CHARS)
+    for size in range(limit, 0, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _span(chunk: Dict[str, Any]):
+    metadata = chunk["metadata"]
+    start = metadata.get("chunk_start", metadata["chunk_index"])
+    return start, metadata.get("chunk_end", start)
+
+
+def _passage(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    start, end = _span(chunk)
+    metadata = dict(chunk["metadata"], chunk_start=start, chunk_end=end)
+    parts = chunk.get("parts") or [{"text": chunk["text"], "metadata": dict(metadata), "score": chunk.get("score", 0.0)}]
+    return {"text": chunk["text"], "metadata": metadata, "score": chunk.get("score", 0.0), "parts": list(parts)}
+
+
+def merge_adjacent_chunks(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Stitch retrieved chunks that were consecutive in the source into single passages.
+
+    Chunks of the same chapter with consecutive `chunk_index` metadata are joined
+    with their shared overlap removed; the merged passage keeps the best score
+    and its original chunks under "parts". Exact duplicate texts are dropped.
+    Chunks without an index pass through. Already-merged passages (carrying
+    chunk_start/chunk_end) can be merged again.
+    """
+    seen_texts = set()
+    indexed: Dict[Any, List[Dict[str, Any]]] = {}
+    passthrough = []
+    for result in results:
+        text = result.get("text", "")
+        if not text or text in seen_texts:
+            continue
+        seen_texts.add(text)
+        metadata = result.get("metadata") or {}
+        if metadata.get("chunk_index") is None:
+            passthrough.append(dict(result))
+            continue
+        group = (metadata.get("chapter_id"), metadata.get("source"))
+        indexed.setdefault(group, []).append(result)
+
+    merged = []
+    for chunks in indexed.values():
+        chunks.sort(key=lambda r: _span(r)[0])
+        current = None
+        for chunk in chunks:
+            start, end = _span(chunk)
+            if current is not None and start == current["metadata"]["chunk_end"] + 1:
+                size = _overlap(current["text"], chunk["text"])
+                joiner = "" if size else "\n"
+                current["text"] = current["text"] + joiner + chunk["text"][size:]
+                current["metadata"]["chunk_end"] = end
+                current["score"] = max(current["score"], chunk.get("score", 0.0))
+                current["parts"].extend(_passage(chunk)["parts"])
+                continue
+            if current is not None:
+                merged.append(current)
+            current = _passage(chunk)
+        if current is not None:
+            merged.append(current)
+    return merged + passthrough
+
+
+def _trim_to_budget(text: str, budget: int) -> str:
+    """Cut text to fit budget tokens at a line (or sentence) boundary, never mid-line.
+
+    Each line (or sentence) is counted once and kept in a running total.
+    """
+    lines = text.split("\n")
+    newline = count_tokens("\n")
+    costs = [count_tokens(line) for line in lines]
+    total = sum(costs) + newline * (len(lines) - 1)
+    while lines and total > budget:
+        lines.pop()
+        total -= costs.pop() + (newline if lines else 0)
+    if lines:
+        return "\n".join(lines)
+    space = count_tokens(" ")
+    kept = []
+    total = 0
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        cost = count_tokens(sentence) + (space if kept else 0)
+        if total + cost > budget:
+            break
+        kept.append(sentence)
+        total += cost
+    return " ".join(kept)
+
+
+def pack_context(results: List[Dict[str, Any]], token_budget: int = 1000, separator: str = "\n\n") -> Dict[str, Any]:
+    """Build the prompt context from retrieved chunks under a token budget.
+
+    Adjacent chunks are merged first, then passages are admitted best-score-first
+    while they fit. A merged passage that does not fit competes again as its
+    original chunks; anything else that does not fit is skipped whole rather
+    than cut, so formulas are never split. The admitted passages are emitted in
+    document order. Only if nothing fits is the best chunk trimmed at a line
+    boundary.
+
+    Returns {"text", "tokens", "passages", "chunks_used", "chunks_total", "budget"}.
+    """
+    passages = merge_adjacent_chunks(results)
+    ranked = sorted(passages, key=lambda p: p.get("score", 0.0), reverse=True)
+    sep_tokens = count_tokens(separator)
+    top_chunk = (ranked[0].get("parts") or [ranked[0]])[0] if ranked else None
+
+    chosen = []
+    used = 0
+    while ranked:
+        passage = ranked.pop(0)
+        cost = count_tokens(passage["text"]) + (sep_tokens if chosen else 0)
+        if used + cost <= token_budget:
+            chosen.append(passage)
+            used += cost
+        elif len(passage.get("parts", [])) > 1:
+            ranked = sorted(ranked + passage["parts"], key=lambda p: p.get("score", 0.0), reverse=True)
+
+    if not chosen and top_chunk is not None:
+        best = dict(top_chunk, text=_trim_to_budget(top_chunk["text"], token_budget))
+        if best["text"]:
+            chosen = [best]
+
+    def _doc_order(passage):
+        metadata = passage.get("metadata") or {}
+        return (str(metadata.get("chapter_id")), metadata.get("chunk_start", float("inf")))
+
+    def _chunk_count(passage):
+        metadata = passage.get("metadata") or {}
+        if "chunk_start" not in metadata:
+            return 1
+        return metadata["chunk_end"] - metadata["chunk_start"] + 1
+
+    # Parts admitted separately may be neighbours again — drop their shared overlap
+    chosen = merge_adjacent_chunks(chosen)
+    chosen.sort(key=_doc_order)
+    text = separator.join(p["text"] for p in chosen)
+    return {
+        "text": text,
+        "tokens": count_tokens(text),
+        "passages": len(chosen),
+        "chunks_used": sum(_chunk_count(p) for p in chosen),
+        "chunks_total": sum(_chunk_count(p) for p in passages),
+        "budget": token_budget,
+    }
@@ -0,0 +1,195 @@
+"""Compare embedding backends (VECTOR_EMBEDDING_BACKEND) against full-precision PyTorch.
+
+Each backend is loaded in its own subprocess so resident memory is measured in
+isolation. Per backend: model load time, RSS added by the model, single-query
+encode latency (p50/p95), corpus encode throughput, and how well its query
+vectors agree with the torch backend's when searched against an index of torch
+corpus vectors (what an index built by ingest holds): mean top-k overlap,
+top-1 agreement and mean cosine to the torch query vectors.
+
+Run, e.g.:
+  python -m backend_app.rag.embedding_backend_benchmark --backends torch,torch_int8,onnx,onnx_int8
+
+The corpus is the first --corpus chunks of the saved chunk store (synthetic
+text if there is none); queries are the opening words of other chunks.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import faiss
+import numpy as np
+
+from backend_app.rag.embedding_backends import EMBEDDING_BACKENDS
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def rss_mb() -> float:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def load_texts(entries_path: str, corpus_size: int, query_count: int):
+    """(corpus texts, query texts) from a chunk store, or synthetic ones."""
+    texts: List[str] = []
+    if os.path.exists(entries_path):
+        from backend_app.rag.chunk_store import load_entries
+
+        store = load_entries(entries_path)
+        texts = [store[i]["text"] for i in range(min(len(store), corpus_size + query_count))]
+    if len(texts) < corpus_size + query_count:
+        from backend_app.rag.embedding_benchmark import SAMPLE_QUERIES
+
+        texts += [f"{SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]} worked example {i} with steps and a practice question"
+                  for i in range(corpus_size + query_count - len(texts))]
+    corpus, rest = texts[:corpus_size], texts[corpus_size:corpus_size + query_count]
+    return corpus, [" ".join(text.split()[:12]) for text in rest]
+
+
+def run_worker(backend: str, model_name: str, onnx_file: str, texts_path: str, vectors_path: str) -> Dict[str, Any]:
+    """Load one backend, time it and save its normalized corpus and query vectors."""
+    with open(texts_path, "r", encoding="utf-8") as f:
+        texts = json.load(f)
+    from sentence_transformers import SentenceTransformer
+
+    from backend_app.rag.embedding_backends import load_embedding_model
+
+    baseline = rss_mb()
+    started = time.perf_counter()
+    model = load_embedding_model(SentenceTransformer, model_name, backend, onnx_file=onnx_file)
+    load_seconds = time.perf_counter() - started
+    loaded = rss_mb()
+
+    encode = lambda batch: model.encode(batch, convert_to_numpy=True, show_progress_bar=False)  # noqa: E731
+    encode(texts["queries"][:8])  # warm up
+    latencies = []
+    query_vectors = []
+    for query in texts["queries"]:
+        started = time.perf_counter()
+        query_vectors.append(encode([query])[0])
+        latencies.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    corpus_vectors = encode(texts["corpus"])
+    corpus_seconds = time.perf_counter() - started
+
+    queries = np.ascontiguousarray(query_vectors, dtype="float32")
+    corpus = np.ascontiguousarray(corpus_vectors, dtype="float32")
+    faiss.normalize_L2(queries)
+    faiss.normalize_L2(corpus)
+    np.savez(vectors_path, queries=queries, corpus=corpus)
+    ms = np.asarray(latencies) * 1000
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "model_rss_mb": round(loaded - baseline, 1),
+        "rss_mb": round(rss_mb(), 1),
+        "query_p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "query_p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "corpus_texts_per_second": round(len(corpus) / corpus_seconds, 1),
+    }
+
+
+def agreement(reference: Dict[str, np.ndarray], vectors: Dict[str, np.ndarray], k: int) -> Dict[str, float]:
+    """Top-k agreement of `vectors` queries with the reference queries over the reference corpus index."""
+    index = faiss.IndexFlatIP(reference["corpus"].shape[1])
+    index.add(reference["corpus"])
+    _, expected = index.search(reference["queries"], k)
+    _, got = index.search(vectors["queries"], k)
+    overlap = [len(set(e) & set(g)) / k for e, g in zip(expected, got)]
+    return {
+        f"top{k}_overlap": round(float(np.mean(overlap)), 4),
+        "top1_agreement": round(float(np.mean(expected[:, 0] == got[:, 0])), 4),
+        "mean_query_cosine": round(float(np.mean(np.sum(reference["queries"] * vectors["queries"], axis=1))), 5),
+    }
+
+
+def benchmark(backends: List[str], model_name: str, onnx_file: str, corpus: List[str], queries: List[str],
+              k: int = 5) -> List[Dict[str, Any]]:
+    backends = ["torch"] + [b for b in backends if b != "torch"]
+    rows = []
+    vectors: Dict[str, Dict[str, np.ndarray]] = {}
+    with tempfile.TemporaryDirectory(prefix="embed-backends-") as tmp:
+        texts_path = os.path.join(tmp, "texts.json")
+        with open(texts_path, "w", encoding="utf-8") as f:
+            json.dump({"corpus": corpus, "queries": queries}, f)
+        for backend in backends:
+            vectors_path = os.path.join(tmp, f"{backend}.npz")
+            cmd = [sys.executable, "-m", "backend_app.rag.embedding_backend_benchmark", "--worker", backend,
+                   "--model", model_name, "--onnx-file", onnx_file, "--texts", texts_path, "--vectors", vectors_path]
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"⚠️ {backend} failed:\n{proc.stderr[-1500:]}")
+                if backend == "torch":
+                    raise RuntimeError("the torch reference backend failed")
+                continue
+            row = json.loads(proc.stdout.strip().splitlines()[-1])
+            with np.load(vectors_path) as saved:
+                vectors[backend] = {"queries": saved["queries"], "corpus": saved["corpus"]}
+            row.update(agreement(vectors["torch"], vectors[backend], k))
+            rows.append(row)
+    return rows
+
+
+def print_rows(rows: List[Dict[str, Any]], k: int) -> None:
+    header = (f"{'backend':<12}{'load s':>8}{'model MB':>10}{'RSS MB':>9}{'p50 ms':>9}{'p95 ms':>9}"
+              f"{'corpus/s':>10}{f'top{k}':>8}{'top1':>7}{'cosine':>9}")
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['backend']:<12}{row['load_seconds']:>8}{row['model_rss_mb']:>10}{row['rss_mb']:>9}"
+              f"{row['query_p50_ms']:>9}{row['query_p95_ms']:>9}{row['corpus_texts_per_second']:>10}"
+              f"{row[f'top{k}_overlap']:>8}{row['top1_agreement']:>7}{row['mean_query_cosine']:>9}")
+
+
+def main():
+    from backend_app.rag.vector_service import current_index_paths
+
+    parser = argparse.ArgumentParser(description="Latency, memory and top-k agreement of embedding backends")
+    parser.add_argument("--backends", default="torch,torch_int8",
+                        help=f"Comma-separated, from {','.join(EMBEDDING_BACKENDS)} (torch is always the reference)")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--onnx-file", default="onnx/model_quint8_avx2.onnx", help="Quantized file for onnx_int8")
+    parser.add_argument("--entries", default=current_index_paths()[2], help="Chunk store to take texts from")
+    parser.add_argument("--corpus", type=int, default=2000, help="Indexed texts")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--out", help="Also write the rows as JSON here")
+    parser.add_argument("--worker", choices=EMBEDDING_BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--texts", help=argparse.SUPPRESS)
+    parser.add_argument("--vectors", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.model, args.onnx_file, args.texts, args.vectors)))
+        return
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    unknown = set(backends) - set(EMBEDDING_BACKENDS)
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(sorted(unknown))}")
+    corpus, queries = load_texts(args.entries, args.corpus, args.queries)
+    rows = benchmark(backends, args.model, args.onnx_file, corpus, queries, k=args.k)
+    print_rows(rows, args.k)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"Saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
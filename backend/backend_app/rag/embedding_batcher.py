@@ -0,0 +1,131 @@
+"""Micro-batching for embedding requests.
+
+Searches run on threadpool workers and each embeds a single query, which
+leaves the model's batched matrix throughput unused. EmbeddingBatcher queues
+encode calls from any number of threads; one dispatcher thread takes
+everything queued (waiting up to max_wait_ms for more, and stopping once the
+batch holds max_batch_size texts), runs a single encode over the batch and
+hands each caller its rows. Requests that arrive while a batch is encoding form
+the next batch, so under load batches grow without any added wait; and while
+requests come one at a time (the last batch had a single caller) the wait is
+skipped, so a lone query pays nothing for batching.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_STOP = object()
+# How often a waiting caller checks that the dispatcher thread is still alive
+_LIVENESS_CHECK_SECONDS = 1.0
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent encode(texts) calls into batched calls of the wrapped encoder."""
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], max_batch_size: int = 64,
+                 max_wait_ms: float = 2.0):
+        self._encode = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self._last_batch_requests = 0
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as part of the next batch; blocks until its rows are ready."""
+        if not texts:
+            return self._encode(texts)
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((list(texts), future))
+        while True:
+            try:
+                return future.result(timeout=_LIVENESS_CHECK_SECONDS)
+            except FutureTimeout:
+                # A dead dispatcher would strand this request: start a new one to drain the queue
+                self._ensure_started()
+
+    def _ensure_started(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._thread.start()
+
+    def _collect(self, first: Tuple[List[str], Future]) -> List[Tuple[List[str], Future]]:
+        batch = [first]
+        size = len(first[0])
+        wait = self.max_wait_seconds if self._last_batch_requests > 1 else 0.0
+        deadline = time.monotonic() + wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Past the wait window, still take whatever queued up during the previous encode
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            try:
+                batch = self._collect(first)
+                self._serve(batch)
+            except BaseException as e:
+                # Whatever escapes (even KeyboardInterrupt or SystemExit) goes to the callers, and the
+                # dispatcher keeps serving later batches
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _serve(self, batch: List[Tuple[List[str], Future]]) -> None:
+        self._last_batch_requests = len(batch)
+        texts = [text for item_texts, _ in batch for text in item_texts]
+        vectors = self._encode(texts)
+        offset = 0
+        for item_texts, future in batch:
+            future.set_result(vectors[offset:offset + len(item_texts)])
+            offset += len(item_texts)
+        with self._stats_lock:
+            self.requests += len(batch)
+            self.texts += len(texts)
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, len(texts))
+
+    def close(self) -> None:
+        """Stop the dispatcher thread after the queued requests are served."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "texts": self.texts,
+                "batches": self.batches,
+                "mean_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_seconds * 1000,
+            }
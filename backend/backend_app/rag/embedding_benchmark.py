@@ -0,0 +1,140 @@
+"""Throughput of single-query embedding with and without micro-batching.
+
+Each of N concurrent threads (standing in for threadpool workers serving
+searches) embeds one query at a time, either calling the model directly or
+through EmbeddingBatcher. Reports queries/s, per-query latency percentiles and
+the mean batch size the batcher achieved at each concurrency level.
+
+Run, e.g.:
+  python -m backend_app.rag.embedding_benchmark --concurrency 1,4,16,64 --requests 1000
+
+--simulate replaces the model with a sleep of (call overhead + per-text cost)
+that only one call can run at a time, like a forward pass that already uses
+every core. Use it to compare batching settings without the model files.
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from backend_app.rag.embedding_batcher import EmbeddingBatcher
+
+SAMPLE_QUERIES = [
+    "zeroes of a polynomial", "relationship between zeroes and coefficients", "division algorithm for polynomials",
+    "graph of a quadratic polynomial", "cubic polynomials", "pair of linear equations in two variables",
+    "arithmetic progressions nth term", "sum of first n terms", "similar triangles", "pythagoras theorem proof",
+]
+
+
+def make_queries(count: int) -> List[str]:
+    """Distinct query strings (distinct so no cache could short-circuit the model)."""
+    return [f"{SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]} ({i})" for i in range(count)]
+
+
+def simulated_encoder(call_ms: float, per_text_ms: float, dim: int = 384) -> Callable[[List[str]], np.ndarray]:
+    busy = threading.Lock()
+
+    def encode(texts: List[str]) -> np.ndarray:
+        with busy:
+            time.sleep((call_ms + per_text_ms * len(texts)) / 1000.0)
+        return np.ones((len(texts), dim), dtype="float32")
+    return encode
+
+
+def model_encoder(model_name: str) -> Callable[[List[str]], np.ndarray]:
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name)
+
+    def encode(texts: List[str]) -> np.ndarray:
+        return model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+    return encode
+
+
+def run_level(encode: Callable[[List[str]], np.ndarray], queries: List[str], concurrency: int) -> Dict[str, Any]:
+    """Embed every query, one per call, from `concurrency` threads."""
+    latencies = []
+
+    def one(query: str):
+        started = time.perf_counter()
+        encode([query])
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, queries))
+    elapsed = time.perf_counter() - started
+    ms = np.asarray(latencies) * 1000
+    return {
+        "queries_per_second": round(len(queries) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+    }
+
+
+def benchmark(encode: Callable[[List[str]], np.ndarray], levels: List[int], requests: int,
+              max_batch_size: int = 64, max_wait_ms: float = 2.0) -> List[Dict[str, Any]]:
+    rows = []
+    encode(make_queries(8))  # warm up
+    for concurrency in levels:
+        queries = make_queries(requests)
+        direct = run_level(encode, queries, concurrency)
+        batcher = EmbeddingBatcher(encode, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        try:
+            batched = run_level(batcher.encode, queries, concurrency)
+            batched["mean_batch_size"] = batcher.stats()["mean_batch_size"]
+        finally:
+            batcher.close()
+        rows.append({
+            "concurrency": concurrency,
+            "direct": direct,
+            "batched": batched,
+            "speedup": round(batched["queries_per_second"] / direct["queries_per_second"], 2),
+        })
+    return rows
+
+
+def print_rows(rows: List[Dict[str, Any]]) -> None:
+    header = (f"{'conc':>5}{'direct q/s':>12}{'p50 ms':>9}{'p95 ms':>9}"
+              f"{'batched q/s':>13}{'p50 ms':>9}{'p95 ms':>9}{'batch':>7}{'speedup':>9}")
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        d, b = row["direct"], row["batched"]
+        print(f"{row['concurrency']:>5}{d['queries_per_second']:>12}{d['p50_ms']:>9}{d['p95_ms']:>9}"
+              f"{b['queries_per_second']:>13}{b['p50_ms']:>9}{b['p95_ms']:>9}{b['mean_batch_size']:>7}"
+              f"{row['speedup']:>8}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding throughput with and without micro-batching")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Comma-separated thread counts")
+    parser.add_argument("--requests", type=int, default=500, help="Queries per level and mode")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--wait-ms", type=float, default=2.0)
+    parser.add_argument("--simulate", metavar="CALL_MS,PER_TEXT_MS",
+                        help="Use a sleeping stand-in for the model, e.g. 8,0.3")
+    parser.add_argument("--out", help="Also write the rows as JSON here")
+    args = parser.parse_args()
+
+    if args.simulate:
+        call_ms, per_text_ms = (float(v) for v in args.simulate.split(","))
+        encode = simulated_encoder(call_ms, per_text_ms)
+    else:
+        encode = model_encoder(args.model)
+    levels = [int(v) for v in args.concurrency.split(",") if v.strip()]
+    rows = benchmark(encode, levels, args.requests, max_batch_size=args.max_batch, max_wait_ms=args.wait_ms)
+    print_rows(rows)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"Saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
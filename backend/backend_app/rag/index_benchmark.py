@@ -0,0 +1,156 @@
+"""Compare FAISS index types on synthetic embedding corpora.
+
+For each corpus size and index configuration, reports build time, index
+memory, recall@k against exact (flat) search and single-query latency
+percentiles. Like real sentence embeddings, the corpus has a low intrinsic
+dimension and is clustered (one cluster per ~100 chunks, i.e. per topic); it
+is L2-normalized at the MiniLM dimension. Queries are fresh points drawn
+around the same clusters. Indexes are built with all cores, while queries run
+on --threads cores, as in the per-request search path.
+
+Run, e.g.:
+  python -m backend_app.rag.index_benchmark --sizes 10000,50000,200000 \\
+      --types flat,ivf_flat,hnsw,ivf_pq --nprobe 4,16 --ef-search 32,128 --out bench.json
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+import faiss
+import numpy as np
+
+from backend_app.rag.index_factory import INDEX_TYPES, build_index, configure_search, index_memory_bytes
+
+
+def synthetic_corpus(n_vectors: int, dim: int = 384, n_queries: int = 200, latent_dim: int = 64,
+                     spread: float = 0.5, seed: int = 0):
+    """Clustered, normalized (corpus, queries) float32 arrays projected up from latent_dim."""
+    rng = np.random.default_rng(seed)
+    projection = rng.standard_normal((latent_dim, dim)).astype("float32")
+    centers = rng.standard_normal((max(1, n_vectors // 100), latent_dim)).astype("float32")
+
+    def _sample(count):
+        latent = centers[rng.integers(0, len(centers), count)]
+        latent = latent + spread * rng.standard_normal((count, latent_dim)).astype("float32")
+        points = latent @ projection + spread * rng.standard_normal((count, dim)).astype("float32")
+        points = np.ascontiguousarray(points, dtype="float32")
+        faiss.normalize_L2(points)
+        return points
+
+    return _sample(n_vectors), _sample(n_queries)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Mean fraction of the true top-k ids present in each query's returned top-k."""
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def _latencies_ms(index, queries: np.ndarray, k: int, threads: int) -> np.ndarray:
+    build_threads = faiss.omp_get_max_threads()
+    faiss.omp_set_num_threads(threads)
+    try:
+        timings = []
+        for i in range(len(queries)):
+            started = time.perf_counter()
+            index.search(queries[i:i + 1], k)
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        faiss.omp_set_num_threads(build_threads)
+    return np.asarray(timings)
+
+
+def benchmark_size(n_vectors: int, index_types: List[str], k: int = 5, dim: int = 384, n_queries: int = 200,
+                   nprobes: List[int] = (8,), ef_searches: List[int] = (64,), threads: int = 1, seed: int = 0,
+                   **build_options) -> List[Dict[str, Any]]:
+    """Rows of measurements for one corpus size (one row per type and search setting)."""
+    corpus, queries = synthetic_corpus(n_vectors, dim=dim, n_queries=n_queries, seed=seed)
+    exact = build_index("flat", corpus)
+    _, truth = exact.search(queries, k)
+
+    rows = []
+    for index_type in index_types:
+        started = time.perf_counter()
+        index = build_index(index_type, corpus, **build_options)
+        build_seconds = time.perf_counter() - started
+        if index_type.startswith("ivf"):
+            settings = [{"nprobe": nprobe} for nprobe in nprobes]
+        elif index_type == "hnsw":
+            settings = [{"ef_search": ef} for ef in ef_searches]
+        else:
+            settings = [{}]
+        for search_setting in settings:
+            configure_search(index, **search_setting)
+            _, found = index.search(queries, k)
+            latencies = _latencies_ms(index, queries, k, threads)
+            rows.append({
+                "n_vectors": n_vectors,
+                "index_type": index_type,
+                **search_setting,
+                "build_seconds": round(build_seconds, 3),
+                "memory_mb": round(index_memory_bytes(index) / 1e6, 2),
+                f"recall_at_{k}": round(recall_at_k(found, truth), 4),
+                "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+                "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+                "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+            })
+    return rows
+
+
+def print_rows(rows: List[Dict[str, Any]], k: int) -> None:
+    header = f"{'vectors':>9} {'index':<9}{'setting':<14}{'build s':>9}{'mem MB':>9}{'recall':>8}{'p50 ms':>9}{'p95 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        setting = f"nprobe={row['nprobe']}" if "nprobe" in row else (
+            f"ef={row['ef_search']}" if "ef_search" in row else "exact")
+        print(f"{row['n_vectors']:>9} {row['index_type']:<9}{setting:<14}{row['build_seconds']:>9}"
+              f"{row['memory_mb']:>9}{row[f'recall_at_{k}']:>8}{row['p50_ms']:>9}{row['p95_ms']:>9}")
+
+
+def _int_list(spec: str) -> List[int]:
+    return [int(part) for part in spec.split(",") if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall, latency and memory of FAISS index types")
+    parser.add_argument("--sizes", default="10000,50000", help="Comma-separated corpus sizes")
+    parser.add_argument("--types", default=",".join(INDEX_TYPES), help="Comma-separated index types")
+    parser.add_argument("--k", type=int, default=5, help="Neighbours per query (the service uses 5)")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per configuration")
+    parser.add_argument("--nprobe", default="8", help="IVF cells probed (comma-separated to sweep)")
+    parser.add_argument("--ef-search", default="64", help="HNSW efSearch (comma-separated to sweep)")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF cells (0 = ~4*sqrt(n))")
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--pq-nbits", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=1, help="FAISS threads (1 matches per-request search)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Also write the rows as JSON here")
+    args = parser.parse_args()
+
+    index_types = [t.strip() for t in args.types.split(",") if t.strip()]
+    unknown = set(index_types) - set(INDEX_TYPES)
+    if unknown:
+        parser.error(f"unknown index types: {', '.join(sorted(unknown))}")
+
+    rows = []
+    for n_vectors in _int_list(args.sizes):
+        print(f"Benchmarking {n_vectors} vectors...")
+        rows += benchmark_size(
+            n_vectors, index_types, k=args.k, dim=args.dim, n_queries=args.queries,
+            nprobes=_int_list(args.nprobe), ef_searches=_int_list(args.ef_search), threads=args.threads,
+            seed=args.seed,
+            nlist=args.nlist, hnsw_m=args.hnsw_m, pq_m=args.pq_m, pq_nbits=args.pq_nbits,
+        )
+    print_rows(rows, args.k)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"Saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""FAISS index types for the chunk store.
+
+  flat    — exact inner-product search over float32 vectors (default)
+  ivf_flat — inverted lists over k-means cells; searches nprobe cells, full vectors
+  hnsw    — graph search over full vectors; no training, more memory per vector
+  ivf_pq  — inverted lists with product-quantized codes; smallest, lossy scores
+
+Trained types (ivf_*) are trained on the corpus when it is ingested, sized to
+the number of vectors available at that point.
+"""
+import math
+from typing import Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+
+def index_type_of(index) -> str:
+    """Name (from INDEX_TYPES) of a built or loaded index."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    if isinstance(index, faiss.IndexFlat):
+        return "flat"
+    raise ValueError(f"Unsupported FAISS index: {type(index).__name__}")
+
+
+def auto_nlist(n_vectors: int) -> int:
+    """IVF cell count: ~4*sqrt(n), kept low enough to train with >= 39 points per cell."""
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def _pq_subquantizers(dim: int, wanted: int) -> int:
+    """Largest sub-quantizer count <= wanted that divides dim."""
+    for m in range(min(wanted, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def index_spec(index_type: str, dim: int, n_vectors: int = 0, nlist: int = 0, hnsw_m: int = 32,
+               pq_m: int = 48, pq_nbits: int = 8) -> str:
+    """faiss.index_factory string for index_type; nlist=0 sizes IVF cells from n_vectors."""
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "hnsw":
+        return f"HNSW{hnsw_m}"
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}' (choose from {', '.join(INDEX_TYPES)})")
+    cells = min(nlist, n_vectors) if nlist else auto_nlist(n_vectors)
+    cells = max(1, cells)
+    if index_type == "ivf_flat":
+        return f"IVF{cells},Flat"
+    # PQ training needs at least 2**nbits vectors
+    nbits = max(1, min(pq_nbits, int(math.log2(max(2, n_vectors)))))
+    return f"IVF{cells},PQ{_pq_subquantizers(dim, pq_m)}x{nbits}"
+
+
+def build_index(index_type: str, vectors: np.ndarray, nlist: int = 0, hnsw_m: int = 32,
+                hnsw_ef_construction: int = 40, pq_m: int = 48, pq_nbits: int = 8):
+    """Create an inner-product index of index_type, train it on vectors and add them."""
+    n_vectors, dim = vectors.shape
+    spec = index_spec(index_type, dim, n_vectors, nlist=nlist, hnsw_m=hnsw_m, pq_m=pq_m, pq_nbits=pq_nbits)
+    index = faiss.index_factory(dim, spec, faiss.METRIC_INNER_PRODUCT)
+    if index_type == "hnsw":
+        index.hnsw.efConstruction = hnsw_ef_construction
+    if index_type == "ivf_pq":
+        # Polysemous codes are only used by Hamming-filtered search, and dominate training time
+        index.do_polysemous_training = False
+    if not index.is_trained:
+        index.train(vectors)
+    if n_vectors:
+        index.add(vectors)
+    return index
+
+
+def configure_search(index, nprobe: int = 8, ef_search: int = 64) -> None:
+    """Apply query-time accuracy/speed knobs (IVF cells probed, HNSW beam width)."""
+    index_type = index_type_of(index)
+    if index_type.startswith("ivf"):
+        ivf = faiss.extract_index_ivf(index)
+        ivf.nprobe = max(1, min(nprobe, ivf.nlist))
+    elif index_type == "hnsw":
+        index.hnsw.efSearch = max(1, ef_search)
+
+
+def enable_reconstruct(index) -> None:
+    """Let IVF indexes look vectors up by id (reconstruct_n); other types always can."""
+    if index_type_of(index).startswith("ivf"):
+        ivf = faiss.extract_index_ivf(index)
+        if ivf.direct_map.no():
+            ivf.make_direct_map()
+
+
+def all_vectors(index) -> np.ndarray:
+    """Every stored vector in id order (decoded, so approximate for ivf_pq)."""
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype="float32")
+    enable_reconstruct(index)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def flat_storage(index) -> Optional[faiss.IndexFlat]:
+    """The flat array holding full vectors (flat and hnsw indexes), or None.
+
+    The caller must keep a reference to index while using the result.
+    """
+    index_type = index_type_of(index)
+    if index_type == "flat":
+        return faiss.downcast_index(index)
+    if index_type == "hnsw":
+        return faiss.downcast_index(faiss.downcast_index(index).storage)
+    return None
+
+
+def index_memory_bytes(index) -> int:
+    """Serialized size of index, a close proxy for its resident memory."""
+    return int(faiss.serialize_index(index).nbytes)
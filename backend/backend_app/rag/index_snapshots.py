@@ -0,0 +1,128 @@
+"""Versioned, atomically published FAISS index snapshots.
+
+Layout under a snapshot root (backend/faiss_snapshots next to the index):
+
+  <root>/<snapshot id>/faiss_index.bin    FAISS index
+  <root>/<snapshot id>/faiss_chunks.bin   chunk store aligned with it
+  <root>/CURRENT                          id of the active snapshot
+
+A snapshot directory is written in full under a temporary name and renamed
+into place before CURRENT is switched to it (each step an atomic rename), so a
+reader that resolves CURRENT always finds a complete, matching index/chunks
+pair and never sees a half-written one. Snapshot ids are UTC timestamps, so
+they sort in publication order. Old snapshots are pruned after publishing;
+processes still mapping a pruned snapshot keep reading it until they reload,
+since unlinked files stay valid for existing mappings.
+"""
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+
+INDEX_FILE = "faiss_index.bin"
+ENTRIES_FILE = "faiss_chunks.bin"
+CURRENT_FILE = "CURRENT"
+
+
+def new_snapshot_id() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def snapshot_paths(root: str, snapshot: str) -> Tuple[str, str]:
+    """(index path, entries path) of a snapshot."""
+    return os.path.join(root, snapshot, INDEX_FILE), os.path.join(root, snapshot, ENTRIES_FILE)
+
+
+def current_snapshot(root: str) -> Optional[str]:
+    """Id of the active snapshot under root, or None if none was published."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+            snapshot = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return snapshot or None
+
+
+def list_snapshots(root: str) -> List[str]:
+    """Ids of the complete snapshots under root, oldest first."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root)
+                  if not name.endswith(".tmp") and os.path.isdir(os.path.join(root, name)))
+
+
+def publish_snapshot(root: str, write: Callable[[str, str], None], keep: int = 3) -> str:
+    """Write a new snapshot with write(index_path, entries_path), make it current and prune old ones.
+
+    Returns the new snapshot id. keep is how many snapshots to retain, the new
+    one included (at least 1).
+    """
+    snapshot = new_snapshot_id()
+    staging = os.path.join(root, f"{snapshot}.tmp")
+    os.makedirs(staging)
+    try:
+        write(os.path.join(staging, INDEX_FILE), os.path.join(staging, ENTRIES_FILE))
+        os.replace(staging, os.path.join(root, snapshot))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    pointer = os.path.join(root, f"{CURRENT_FILE}.tmp")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(snapshot)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer, os.path.join(root, CURRENT_FILE))
+    prune_snapshots(root, keep)
+    return snapshot
+
+
+def prune_snapshots(root: str, keep: int) -> List[str]:
+    """Delete all but the newest `keep` snapshots (never the current one); returns the deleted ids."""
+    current = current_snapshot(root)
+    snapshots = [s for s in list_snapshots(root) if s != current]
+    stale = snapshots[:max(0, len(snapshots) - max(keep - 1, 0))]
+    for snapshot in stale:
+        shutil.rmtree(os.path.join(root, snapshot), ignore_errors=True)
+    return stale
+
+
+class SnapshotWatcher:
+    """Daemon thread that calls on_change(snapshot) whenever CURRENT under root() names a new snapshot.
+
+    root is a callable so the location is resolved on every poll. Errors from
+    on_change are printed and retried on the next poll.
+    """
+
+    def __init__(self, root: Callable[[], str], on_change: Callable[[str], None], interval_seconds: float,
+                 active: Optional[str] = None):
+        self._root = root
+        self._on_change = on_change
+        self._interval = interval_seconds
+        self._seen = active
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="index-snapshot-watcher", daemon=True)
+
+    def start(self) -> "SnapshotWatcher":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self._interval + 1)
+
+    def poll(self) -> bool:
+        """Check once; returns True if on_change ran for a new snapshot."""
+        snapshot = current_snapshot(self._root())
+        if snapshot is None or snapshot == self._seen:
+            return False
+        self._on_change(snapshot)
+        self._seen = snapshot
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠️ Index snapshot reload failed: {e}")
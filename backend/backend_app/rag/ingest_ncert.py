@@ -1,68 +1,391 @@
-from typing import List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import argparse
+import json
 import os
+import tempfile
+import time
 
 import fitz  # PyMuPDF
+import numpy as np
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from sqlalchemy.orm import Session
 
-from backend_app.rag.vector_service import VectorStoreManager
-from backend_app.db.session import SessionLocal
+from backend_app.rag.chunk_embeddings import ChunkEmbeddingCache
+from backend_app.rag.chunk_store import content_hash, entry_hash, partition_key
+from backend_app.rag.index_factory import index_type_of
+from backend_app.rag.vector_service import DEFAULT_EMBEDDINGS_PATH, VectorStoreManager
+from backend_app.db.session import SessionLocal, engine
 from backend_app.models import ChapterContent
 from backend_app.core.config import settings
+from backend_app.services.chapter_content_migration import ensure_chapter_content_schema
+
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 150
+
+
+def iter_pages(filepath: str, page_start: int = None, page_end: int = None) -> Iterator[Tuple[int, str]]:
+    """Yield (1-based page number, text) for the page range, one page in memory at a time."""
+    with fitz.open(filepath) as doc:
+        start = page_start or 1
+        end = page_end or doc.page_count
+        for number in range(start, end + 1):
+            yield number, doc.load_page(number - 1).get_text()
 
 
 def extract_text_from_pdf(filepath: str, page_start: int = None, page_end: int = None) -> str:
-    doc = fitz.open(filepath)
-    texts = []
-    start = page_start - 1 if page_start else 0
-    end = page_end - 1 if page_end else (doc.page_count - 1)
-    for pno in range(start, end + 1):
-        page = doc.load_page(pno)
-        texts.append(page.get_text())
-    doc.close()
-    return "\n\n".join(texts)
+    return "\n\n".join(text for _, text in iter_pages(filepath, page_start, page_end))
 
 
-def ingest_pdf(file_path: str, chapter_id: str, page_start: int = None, page_end: int = None):
-    """Extract text from PDF, chunk, save to DB and FAISS index."""
-    raw = extract_text_from_pdf(file_path, page_start, page_end)
+def iter_chunks(pages: Iterable[Tuple[int, str]], chunk_size: int = CHUNK_SIZE,
+                chunk_overlap: int = CHUNK_OVERLAP) -> Iterator[Tuple[str, int]]:
+    """Split pages into (chunk, page number it starts on), holding one page plus a carried chunk.
 
+    Each page is split together with the last chunk of the text before it, and
+    that last chunk is carried over again rather than emitted, so chunks run
+    across page breaks with the usual overlap, much as if the whole joined text
+    were split at once.
+    """
     # Use RecursiveCharacterTextSplitter to preserve math context
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=150)
-    chunks = splitter.split_text(raw)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True)
+    carry, carry_page = "", None
+    for number, text in pages:
+        buffer = f"{carry}\n\n{text}" if carry else text
+        page_offset = len(buffer) - len(text)
+        docs = splitter.create_documents([buffer])
+        if not docs:
+            continue
+        for doc in docs:
+            doc.metadata["page"] = carry_page if doc.metadata["start_index"] < page_offset else number
+        for doc in docs[:-1]:
+            yield doc.page_content, doc.metadata["page"]
+        carry, carry_page = docs[-1].page_content, docs[-1].metadata["page"]
+    if carry:
+        yield carry, carry_page
+
+
+def embed_chunks(manager: VectorStoreManager, cache: ChunkEmbeddingCache, texts: List[str],
+                 hashes: List[str], batch_size: Optional[int] = None) -> Tuple[np.ndarray, int]:
+    """Vectors for texts, encoding only those whose hash is not cached; returns (vectors, encoded)."""
+    missing = [i for i, key in enumerate(hashes) if key not in cache]
+    if missing:
+        cache.put([hashes[i] for i in missing], manager.embed([texts[i] for i in missing], batch_size=batch_size))
+    vectors = np.stack([cache.get(key) for key in hashes]) if hashes else np.zeros((0, manager.dim), dtype="float32")
+    return vectors, len(missing)
+
+
+def _chapter_rows(db: Session, chapter_id: str) -> List[Tuple[int, str]]:
+    """(id, content_hash) of the chapter's rows in insertion order, hashing rows stored before hashes existed."""
+    rows = (
+        db.query(ChapterContent.id, ChapterContent.content_hash)
+        .filter(ChapterContent.chapter_id.in_([chapter_id, partition_key(chapter_id)]))
+        .order_by(ChapterContent.id)
+        .all()
+    )
+    unhashed = [row_id for row_id, key in rows if key is None]
+    if not unhashed:
+        return [tuple(row) for row in rows]
+    hashed = {}
+    for start in range(0, len(unhashed), 500):
+        batch = db.query(ChapterContent.id, ChapterContent.content).filter(
+            ChapterContent.id.in_(unhashed[start:start + 500])).all()
+        mappings = [{"id": row_id, "content_hash": content_hash(content)} for row_id, content in batch]
+        db.bulk_update_mappings(ChapterContent, mappings)
+        hashed.update((m["id"], m["content_hash"]) for m in mappings)
+    db.commit()
+    return [(row_id, key or hashed[row_id]) for row_id, key in rows]
+
+
+def _chunk_batches(chunks: Iterable[Union[str, Tuple[str, Optional[int]]]],
+                   size: int) -> Iterator[List[Tuple[str, Optional[int]]]]:
+    batch = []
+    for chunk in chunks:
+        batch.append((chunk, None) if isinstance(chunk, str) else tuple(chunk))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest_chunks(manager: VectorStoreManager, cache: ChunkEmbeddingCache, db: Session,
+                  chunks: Iterable[Union[str, Tuple[str, Optional[int]]]], chapter_id: str, source: str,
+                  replace: bool = False, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Add a chapter's chunks (texts or (text, page_number) pairs) to the index and DB.
 
-    metadatas = [{"chapter_id": chapter_id, "chunk_index": i} for i in range(len(chunks))]
+    Without replace, ingestion is additive and idempotent: chunks whose content
+    hash the chapter already holds are skipped, and new chunks are numbered
+    after the chapter's existing chunk_index values so they never look adjacent
+    to old ones. With replace the chapter ends up holding exactly these chunks:
+    its old vectors and rows are removed, and unchanged chunks are re-added
+    from the embedding cache without encoding.
 
-    # Persist chunks to DB
-    session = SessionLocal()
-    created = 0
+    chunks is consumed in batches of batch_size: each batch is embedded, added
+    to the index and its rows inserted and committed before the next is read,
+    so apart from the index itself memory does not grow with the book. The
+    index is not saved here.
+    """
+    batch_size = batch_size or settings.INGEST_EMBED_BATCH_SIZE
+    indexed = manager.chapter_hashes(chapter_id)
+    if index_type_of(manager.index) != "ivf_pq":
+        # Chunks indexed before the cache had them: the index holds their exact vectors (ivf_pq only codes)
+        uncached = [key for key in indexed if key not in cache]
+        if uncached:
+            cache.put(uncached, manager.stored_vectors([indexed[key] for key in uncached]))
+    if replace:
+        manager.remove_chapter(chapter_id)
+        first_index = 0
+    else:
+        first_index = manager.next_chunk_index(chapter_id)
+
+    stored_rows = _chapter_rows(db, chapter_id)
+    row_hashes = {key for _, key in stored_rows}
+    seen = set()
+    stats = {"chunks": 0, "unchanged": 0, "added": 0, "removed": 0, "encoded": 0, "rows_inserted": 0,
+             "rows_deleted": 0}
+    for batch in _chunk_batches(chunks, batch_size):
+        texts, metadatas, hashes, new_rows = [], [], [], []
+        for text, page_number in batch:
+            key = content_hash(text)
+            if key in seen:
+                continue
+            seen.add(key)
+            stats["unchanged" if key in indexed else "added"] += 1
+            if replace or key not in indexed:
+                metadatas.append({"chapter_id": chapter_id, "chunk_index": first_index + stats["chunks"],
+                                  "content_hash": key, "page_number": page_number})
+                texts.append(text)
+                hashes.append(key)
+            if key not in row_hashes:
+                row_hashes.add(key)
+                new_rows.append({"chapter_id": chapter_id, "content": text, "page_number": page_number,
+                                 "source": source, "content_hash": key})
+            stats["chunks"] += 1
+        vectors, encoded = embed_chunks(manager, cache, texts, hashes, batch_size=batch_size)
+        manager.add_documents(texts, metadatas, embeddings=vectors)
+        stats["encoded"] += encoded
+        if new_rows:
+            # One bulk INSERT per batch instead of one ORM object per row
+            db.bulk_insert_mappings(ChapterContent, new_rows)
+            db.commit()
+            stats["rows_inserted"] += len(new_rows)
+
+    if replace:
+        stats["removed"] = len(set(indexed) - seen)
+        # Rows whose text is gone, and duplicates left by earlier ingests
+        kept = set()
+        stale_ids = []
+        for row_id, key in stored_rows:
+            if key not in seen or key in kept:
+                stale_ids.append(row_id)
+            kept.add(key)
+        for start in range(0, len(stale_ids), 500):
+            db.query(ChapterContent).filter(ChapterContent.id.in_(stale_ids[start:start + 500])).delete(
+                synchronize_session=False)
+        db.commit()
+        stats["rows_deleted"] = len(stale_ids)
+    return stats
+
+
+class _PageCounter:
+    """Passes pages through, counting them."""
+
+    def __init__(self, pages: Iterable[Tuple[int, str]]):
+        self._pages = pages
+        self.count = 0
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        for page in self._pages:
+            self.count += 1
+            yield page
+
+
+def _remove_quietly(path: str) -> None:
     try:
-        for i, chunk in enumerate(chunks):
-            cc = ChapterContent(chapter_id=chapter_id, content=chunk, page_number=None, source=os.path.basename(file_path))
-            session.add(cc)
-            created += 1
-        session.commit()
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _spool_job(job: Dict[str, Any]) -> Tuple[Dict[str, Any], str, int]:
+    """Chunk one PDF into a temporary JSON-lines file of [text, page]; runs in the ingest worker processes.
+
+    Spooling to disk rather than returning the chunk list keeps a whole book
+    out of both the worker's and the main process's memory.
+    """
+    pages = _PageCounter(iter_pages(job["path"], job.get("start"), job.get("end")))
+    fd, path = tempfile.mkstemp(prefix="ingest-", suffix=".jsonl")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for chunk in iter_chunks(pages):
+                f.write(json.dumps(chunk) + "\n")
+    except BaseException:
+        _remove_quietly(path)
+        raise
+    return job, path, pages.count
+
+
+def _read_spool(path: str) -> Iterator[Tuple[str, int]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            text, page = json.loads(line)
+            yield text, page
+
+
+def jobs_from_directory(directory: str) -> List[Dict[str, Any]]:
+    """One job per PDF in directory (sorted), with the file name minus .pdf as its chapter id."""
+    names = sorted(name for name in os.listdir(directory) if name.lower().endswith(".pdf"))
+    return [{"path": os.path.join(directory, name), "chapter_id": os.path.splitext(name)[0]} for name in names]
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """Jobs from a JSON list of {"path", "chapter_id", "start"?, "end"?}; paths are relative to the manifest."""
+    with open(path, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    for job in jobs:
+        if "path" not in job or "chapter_id" not in job:
+            raise ValueError(f"Manifest entry needs path and chapter_id: {job}")
+        job["path"] = os.path.join(base, job["path"])
+        job["chapter_id"] = str(job["chapter_id"])
+    return jobs
+
+
+def _job_chunks(jobs: List[Dict[str, Any]], futures=None):
+    """Yield (job, chunk iterator, page count function) per PDF, as pool workers finish, or streamed here
+    when futures is None (the page count is then final once the chunks are consumed)."""
+    if futures is None:
+        for job in jobs:
+            pages = _PageCounter(iter_pages(job["path"], job.get("start"), job.get("end")))
+            yield job, iter_chunks(pages), lambda pages=pages: pages.count
+        return
+    for future in as_completed(futures):
+        job, path, pages = future.result()
+        try:
+            yield job, _read_spool(path), lambda pages=pages: pages
+        finally:
+            _remove_quietly(path)
+
+
+def ingest_many(jobs: List[Dict[str, Any]], workers: int = 1, replace: bool = False, retrain: bool = False,
+                batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """Ingest several PDFs into the DB and FAISS index and save the index once at the end.
+
+    Page extraction and splitting run in a pool of `workers` processes while
+    the main process embeds (batch_size texts per forward pass) and writes
+    each finished PDF, so the model is loaded once and never waits on PDF
+    parsing. With one worker pages are read, split, embedded and written in a
+    single stream. Either way a book is never held in memory whole: pages are
+    read one at a time and chunks flow through in batch_size batches. Prints
+    progress with pages/s and chunks/s; returns the totals.
+
+    With replace, each chapter is replaced once: the first of its PDFs to
+    finish replaces it and the chapter's other PDFs are added to it, so
+    several PDFs of one chapter end up holding all their chunks.
+    """
+    started = time.perf_counter()
+    totals = {"pdfs": 0, "pages": 0, "chunks": 0, "encoded": 0, "rows_inserted": 0, "rows_deleted": 0}
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    futures = []
+    try:
+        # Submit before loading the model so workers are forked from a process without its threads
+        if pool is not None:
+            futures = [pool.submit(_spool_job, job) for job in jobs]
+
+        ensure_chapter_content_schema(engine)
+        # Load into RAM: the index is about to grow, so a read-only mapping would be copied anyway
+        manager = VectorStoreManager(mmap=False)
+        cache = ChunkEmbeddingCache.load(DEFAULT_EMBEDDINGS_PATH, manager.model_name)
+        session = SessionLocal()
+        replaced = set()
+        try:
+            for job, chunks, page_count in _job_chunks(jobs, futures if pool is not None else None):
+                chapter = partition_key(job["chapter_id"])
+                stats = ingest_chunks(manager, cache, session, chunks, job["chapter_id"],
+                                      os.path.basename(job["path"]), replace=replace and chapter not in replaced,
+                                      batch_size=batch_size)
+                replaced.add(chapter)
+                pages = page_count()
+                totals["pdfs"] += 1
+                totals["pages"] += pages
+                for key in ("chunks", "encoded", "rows_inserted", "rows_deleted"):
+                    totals[key] += stats[key]
+                elapsed = time.perf_counter() - started
+                print(f"[{totals['pdfs']}/{len(jobs)}] {os.path.basename(job['path'])} -> chapter {job['chapter_id']}: "
+                      f"{pages} pages, {stats['chunks']} chunks ({stats['unchanged']} unchanged, "
+                      f"{stats['added']} added, {stats['removed']} removed), {stats['encoded']} embedded | "
+                      f"{totals['pages'] / elapsed:.1f} pages/s, {totals['chunks'] / elapsed:.1f} chunks/s")
+        finally:
+            session.close()
     finally:
-        session.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+            # Spools of jobs that were finished but never read (an earlier job failed)
+            for future in futures:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    _remove_quietly(future.result()[1])
 
-    # Add to vector store and persist index
-    manager = VectorStoreManager()
-    manager.add_documents(chunks, metadatas)
+    if retrain:
+        manager.rebuild_index()
     # Ensure backend dir exists
     os.makedirs("backend", exist_ok=True)
-    manager.save_index()
+    # Running servers swap the new snapshot in on their next poll (VECTOR_RELOAD_POLL_SECONDS)
+    totals["snapshot"] = manager.publish_snapshot()
+    cache.retain(entry_hash(entry) for entry in manager.entries)
+    cache.save(DEFAULT_EMBEDDINGS_PATH)
+
+    elapsed = time.perf_counter() - started
+    totals["seconds"] = round(elapsed, 2)
+    totals["pages_per_second"] = round(totals["pages"] / elapsed, 1)
+    totals["chunks_per_second"] = round(totals["chunks"] / elapsed, 1)
+    print(f"Ingested {totals['pdfs']} PDFs in {elapsed:.1f}s: {totals['pages']} pages "
+          f"({totals['pages_per_second']}/s), {totals['chunks']} chunks ({totals['chunks_per_second']}/s), "
+          f"{totals['encoded']} embedded; {totals['rows_inserted']} DB rows added, {totals['rows_deleted']} deleted. "
+          f"Published index snapshot {totals['snapshot']}.")
+    return totals
+
 
-    print(f"Ingested {len(chunks)} chunks from {file_path} and saved to DB and FAISS index.")
+def ingest_pdf(file_path: str, chapter_id: str, page_start: int = None, page_end: int = None, retrain: bool = False,
+               replace: bool = False):
+    """Extract text from PDF, chunk, and add the chapter's new chunks to the DB and FAISS index.
+
+    replace makes the chapter hold exactly this PDF's chunks (e.g. a corrected
+    edition); only chunks whose text changed are embedded.
+    retrain rebuilds the whole index afterwards, so IVF cells fit the grown corpus.
+    """
+    job = {"path": file_path, "chapter_id": chapter_id, "start": page_start, "end": page_end}
+    return ingest_many([job], workers=1, replace=replace, retrain=retrain, batch_size=settings.INGEST_EMBED_BATCH_SIZE)
 
 
 def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("filepath", help="Path to NCERT PDF file to ingest")
-    parser.add_argument("chapter_id", help="Chapter identifier")
+    parser = argparse.ArgumentParser(description="Ingest NCERT PDFs into the DB and FAISS index")
+    parser.add_argument("filepath", nargs="?", help="Path to NCERT PDF file to ingest")
+    parser.add_argument("chapter_id", nargs="?", help="Chapter identifier")
     parser.add_argument("--start", type=int, help="Start page number (1-based)")
     parser.add_argument("--end", type=int, help="End page number (1-based)")
+    parser.add_argument("--dir", help="Ingest every PDF in this directory (chapter id = file name without .pdf)")
+    parser.add_argument("--manifest", help='JSON list of {"path", "chapter_id", "start", "end"} to ingest')
+    parser.add_argument("--workers", type=int, default=settings.INGEST_WORKERS or os.cpu_count(),
+                        help="Processes extracting and splitting PDFs (--dir/--manifest)")
+    parser.add_argument("--batch-size", type=int, default=settings.INGEST_EMBED_BATCH_SIZE,
+                        help="Texts per embedding forward pass")
+    parser.add_argument("--retrain", action="store_true", help="Retrain the whole index (IVF types) after adding")
+    parser.add_argument("--replace", action="store_true",
+                        help="Replace the chapter's existing chunks with this PDF's (only changed text is re-embedded)")
     args = parser.parse_args()
-    ingest_pdf(args.filepath, args.chapter_id, args.start, args.end)
+
+    if args.dir or args.manifest:
+        jobs = load_manifest(args.manifest) if args.manifest else jobs_from_directory(args.dir)
+        if not jobs:
+            print(f"No PDFs to ingest in {args.manifest or args.dir}; the index is unchanged.")
+            return
+        ingest_many(jobs, workers=min(args.workers, len(jobs)), replace=args.replace, retrain=args.retrain,
+                    batch_size=args.batch_size)
+    elif args.filepath and args.chapter_id:
+        job = {"path": args.filepath, "chapter_id": args.chapter_id, "start": args.start, "end": args.end}
+        ingest_many([job], workers=1, replace=args.replace, retrain=args.retrain, batch_size=args.batch_size)
+    else:
+        parser.error("give FILEPATH CHAPTER_ID, --dir or --manifest")
 
 
 if __name__ == "__main__":
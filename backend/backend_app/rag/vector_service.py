@@ -1,90 +1,444 @@
 import threading
-from typing import List, Dict, Optional
+import time
+from typing import List, Dict, Optional, Tuple
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import os
-import json
+
+from backend_app.core.cache import TTLLRUCache
+from backend_app.core.config import settings
+from backend_app.core.metrics import register_metrics
+from backend_app.core.rwlock import ReadWriteLock
+from backend_app.rag.chunk_store import (  # noqa: F401 (partition_key re-exported)
+    ChunkStore, add_partitions, entry_hash, load_entries, partition_key,
+)
+from backend_app.rag.embedding_backends import load_embedding_model, same_embedding_model
+from backend_app.rag.embedding_batcher import EmbeddingBatcher
+from backend_app.rag.index_snapshots import SnapshotWatcher, current_snapshot, publish_snapshot, snapshot_paths
+from backend_app.rag.index_factory import (
+    INDEX_TYPES, all_vectors, build_index, configure_search, enable_reconstruct, flat_storage, index_type_of,
+)
 
 
 DEFAULT_INDEX_PATH = os.path.join("backend", "faiss_index.bin")
-DEFAULT_ENTRIES_PATH = os.path.join("backend", "faiss_entries.json")
+DEFAULT_ENTRIES_PATH = os.path.join("backend", "faiss_chunks.bin")
+# content_hash -> chunk embedding, so re-ingest only encodes changed chunks (see chunk_embeddings)
+DEFAULT_EMBEDDINGS_PATH = os.path.join("backend", "faiss_embeddings.npz")
+# Entries format before the chunk store; still loaded when no chunk store exists
+LEGACY_ENTRIES_PATH = os.path.join("backend", "faiss_entries.json")
+
+
+def snapshot_root() -> str:
+    """Directory of the versioned index snapshots (see index_snapshots), next to DEFAULT_INDEX_PATH."""
+    return os.path.join(os.path.dirname(DEFAULT_INDEX_PATH), "faiss_snapshots")
+
+
+def current_index_paths() -> Tuple[Optional[str], str, str]:
+    """(snapshot id, index path, entries path) to load: the current snapshot, else the unversioned
+    files at DEFAULT_INDEX_PATH/DEFAULT_ENTRIES_PATH (snapshot id None)."""
+    snapshot = current_snapshot(snapshot_root())
+    if snapshot is not None:
+        return (snapshot, *snapshot_paths(snapshot_root(), snapshot))
+    entries_path = DEFAULT_ENTRIES_PATH if os.path.exists(DEFAULT_ENTRIES_PATH) else LEGACY_ENTRIES_PATH
+    return None, DEFAULT_INDEX_PATH, entries_path
+
+# sentence_transformers pulls in torch (seconds of import time), so it is imported on first use
+SentenceTransformer = None
+
+
+def _load_model(model_name: str, backend: str):
+    global SentenceTransformer
+    if SentenceTransformer is None:
+        from sentence_transformers import SentenceTransformer
+    return load_embedding_model(SentenceTransformer, model_name, backend, onnx_file=settings.VECTOR_ONNX_FILE)
+
+
+def read_index_mmap(index_path: str):
+    """Read a FAISS index with its vectors/codes memory-mapped instead of copied into RAM."""
+    try:
+        # Flat and HNSW vectors (MMAP_IFC) plus IVF inverted lists (MMAP)
+        return faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_MMAP_IFC)
+    except RuntimeError:
+        # IVF indexes reject the combination; their inverted lists map with IO_FLAG_MMAP alone
+        return faiss.read_index(index_path, faiss.IO_FLAG_MMAP)
 
 
 class VectorStoreManager:
     """Simple FAISS-backed vector store manager using SentenceTransformers.
 
-    This manager keeps an in-memory FAISS index (IndexFlatIP with normalized vectors)
-    and an in-memory list of entries (text + metadata) aligned with index positions.
+    This manager keeps a FAISS index over normalized vectors and a ChunkStore of
+    entries (text + metadata) aligned with index positions. A saved index is
+    loaded memory-mapped by default (VECTOR_INDEX_MMAP) together with the mapped
+    chunk store, so uvicorn workers share one copy through the OS page cache and
+    a search only decodes its top-k entries.
+    The index starts out flat; the first add_documents call builds (and, for IVF
+    types, trains) the configured VECTOR_INDEX_TYPE over everything added so far.
+    A loaded index keeps the type it was saved with.
+    Entries are partitioned by their chapter_id metadata: each chapter maps to the
+    runs of consecutive index positions it occupies, so a chapter-scoped search
+    only scores that chapter's vectors.
+
+    Repeated queries skip the model: query embeddings are kept in an LRU, and
+    search results in a second LRU keyed on the index version, which every
+    add_documents/load_index/rebuild_index bumps.
+    Searches hold the read side of a reader/writer lock while they touch the
+    index and entries, and every mutation the write side, so searches run
+    concurrently but never see a half-applied change. load_index reads the
+    new files before taking the lock and then only swaps references, so
+    reloading a published snapshot (reload_index) does not stall searches.
+    The model runs on the VECTOR_EMBEDDING_BACKEND (see embedding_backends); every
+    backend shares the model's vector space, so the index does not depend on it.
     """
 
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
-        self.lock = threading.Lock()
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name: Optional[str] = None, index_type: Optional[str] = None,
+                 mmap: Optional[bool] = None, embedding_backend: Optional[str] = None):
+        self.lock = ReadWriteLock()
+        self.index_type = (index_type or settings.VECTOR_INDEX_TYPE).lower()
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown VECTOR_INDEX_TYPE '{self.index_type}' (choose from {', '.join(INDEX_TYPES)})")
+        self.model_name = model_name or settings.VECTOR_EMBEDDING_MODEL
+        self.embedding_backend = (embedding_backend or settings.VECTOR_EMBEDDING_BACKEND).lower()
+        self.model = _load_model(self.model_name, self.embedding_backend)
         self.dim = self.model.get_sentence_embedding_dimension()
         # Using inner product on L2-normalized vectors approximates cosine similarity
         self.index = faiss.IndexFlatIP(self.dim)
-        self.entries: List[Dict] = []
+        self.mmap = settings.VECTOR_INDEX_MMAP if mmap is None else mmap
+        # True while self.index is backed by a read-only mapping of the index file
+        self._index_mapped = False
+        self.entries = ChunkStore()
+        # partition_key(chapter_id) -> [(start, end), ...] runs of index positions
+        self.partitions: Dict[str, List[Tuple[int, int]]] = {}
+        # Changes whenever the indexed content does; part of every result cache key
+        self.version = 0
+        # Id of the published snapshot the index was loaded from (None: unversioned files or in-memory changes)
+        self.snapshot: Optional[str] = None
+        # Embeddings depend only on the text (and model), so they survive index changes
+        self._embedding_cache = TTLLRUCache(settings.VECTOR_EMBEDDING_CACHE_SIZE, ttl_seconds=None)
+        self._result_cache = TTLLRUCache(settings.VECTOR_RESULT_CACHE_SIZE, ttl_seconds=None)
+        # Concurrent query embeddings share one model call (VECTOR_EMBED_MAX_BATCH <= 1 disables)
+        self._batcher = None
+        if settings.VECTOR_EMBED_MAX_BATCH > 1:
+            self._batcher = EmbeddingBatcher(self.embed, max_batch_size=settings.VECTOR_EMBED_MAX_BATCH,
+                                             max_wait_ms=settings.VECTOR_EMBED_BATCH_WAIT_MS)
 
         # Try to load persisted index and entries if available
-        if os.path.exists(DEFAULT_INDEX_PATH) and os.path.exists(DEFAULT_ENTRIES_PATH):
+        snapshot, index_path, entries_path = current_index_paths()
+        if os.path.exists(index_path) and os.path.exists(entries_path):
             try:
-                self.load_index(DEFAULT_INDEX_PATH, DEFAULT_ENTRIES_PATH)
+                self.load_index(index_path, entries_path, snapshot=snapshot)
                 print("✅ FAISS loaded successfully")
             except Exception:
                 print("⚠️ FAISS index not found — RAG will fail")
         else:
             print("⚠️ FAISS index not found — RAG will fail")
 
+    def _note_partitions(self, start: int, metadatas: List[Optional[Dict]]):
+        """Extend the chapter partitions with entries added at positions start.. (caller holds the write lock)."""
+        add_partitions(self.partitions, start, metadatas)
+
+    def _bump_version(self):
+        """Mark the indexed content as changed (caller holds the write lock)."""
+        self.version += 1
+        self._result_cache.clear()
+
+    def chapter_ids(self) -> List[str]:
+        """Partition keys of every chapter in the index, sorted."""
+        return sorted(self.partitions)
+
+    def _build(self, vectors: np.ndarray, index_type: str):
+        index = build_index(
+            index_type,
+            vectors,
+            nlist=settings.VECTOR_IVF_NLIST,
+            hnsw_m=settings.VECTOR_HNSW_M,
+            hnsw_ef_construction=settings.VECTOR_HNSW_EF_CONSTRUCTION,
+            pq_m=settings.VECTOR_PQ_M,
+            pq_nbits=settings.VECTOR_PQ_NBITS,
+        )
+        configure_search(index, nprobe=settings.VECTOR_IVF_NPROBE, ef_search=settings.VECTOR_HNSW_EF_SEARCH)
+        enable_reconstruct(index)
+        return index
+
+    def rebuild_index(self, index_type: Optional[str] = None):
+        """Rebuild (and retrain) the index over every stored vector, e.g. after the corpus grew.
+
+        Vectors are read back from the current index, so rebuilding from ivf_pq
+        starts from its approximate, decoded vectors.
+        """
+        with self.lock.write():
+            if index_type is not None:
+                self.index_type = index_type
+            self.index = self._build(all_vectors(self.index), self.index_type)
+            self._index_mapped = False
+            self.snapshot = None
+            self._bump_version()
+
     def _ensure_index_ready(self):
         if self.index is None:
             raise RuntimeError("FAISS index is not initialized")
 
-    def add_documents(self, texts: List[str], metadatas: Optional[List[Dict]] = None):
+    def embed(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """Encode texts into L2-normalized float32 vectors (one row per text).
+
+        batch_size overrides the model's texts per forward pass (e.g. larger for bulk ingest).
+        """
+        kwargs = {"batch_size": batch_size} if batch_size else {}
+        embeddings = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False, **kwargs)
+        embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+        # Normalize for cosine-sim using inner product
+        faiss.normalize_L2(embeddings)
+        return embeddings
+
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        """Like embed(), but served from the query embedding LRU; only unseen texts hit the model,
+        batched together with other threads' concurrent queries."""
+        vectors = [self._embedding_cache.get(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            unseen = list(dict.fromkeys(texts[i] for i in missing))
+            encode = self._batcher.encode if self._batcher is not None else self.embed
+            by_text = dict(zip(unseen, encode(unseen)))
+            for i in missing:
+                vectors[i] = by_text[texts[i]]
+            for text, vector in by_text.items():
+                self._embedding_cache.set(text, vector)
+        if not vectors:
+            return np.zeros((0, self.dim), dtype="float32")
+        return np.vstack(vectors)
+
+    def stats(self) -> Dict:
+        return {
+            "version": self.version,
+            "snapshot": self.snapshot,
+            "index_type": index_type_of(self.index),
+            "vectors": self.index.ntotal,
+            "index_mapped": self._index_mapped,
+            "embedding_backend": self.embedding_backend,
+            "embedding_cache": self._embedding_cache.stats(),
+            "result_cache": self._result_cache.stats(),
+            "embedding_batcher": self._batcher.stats() if self._batcher is not None else None,
+        }
+
+    def add_documents(self, texts: List[str], metadatas: Optional[List[Dict]] = None,
+                      embeddings: Optional[np.ndarray] = None):
         """Embed and add documents to the FAISS index.
 
         texts: list of strings
         metadatas: optional list of dicts aligned with texts
+        embeddings: optional normalized vectors aligned with texts (e.g. from the ingest cache);
+            computed with the model when omitted
         """
         if not texts:
             return
         metadatas = metadatas or [None] * len(texts)
 
-        # Compute embeddings
-        embeddings = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
-        # Normalize for cosine-sim using inner product
-        faiss.normalize_L2(embeddings)
+        # Compute normalized embeddings
+        if embeddings is None:
+            embeddings = self.embed(texts)
+        embeddings = np.ascontiguousarray(embeddings, dtype="float32")
 
-        with self.lock:
+        with self.lock.write():
             # add to index
-            self.index.add(embeddings)
+            start = self.index.ntotal
+            if self._index_mapped:
+                # A mapped index is read-only: copy it into memory before it can grow
+                self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+                enable_reconstruct(self.index)
+                self._index_mapped = False
+            if index_type_of(self.index) != self.index_type:
+                # First ingest into this type: train it on everything added so far plus this batch
+                self.index = self._build(np.vstack([all_vectors(self.index), embeddings]), self.index_type)
+            else:
+                self.index.add(embeddings)
             for t, m in zip(texts, metadatas):
                 self.entries.append({"text": t, "metadata": m})
+            self._note_partitions(start, metadatas)
+            self.snapshot = None
+            self._bump_version()
+
+    def chapter_hashes(self, chapter_id) -> Dict[str, int]:
+        """content_hash -> index position of every entry in the chapter's partition."""
+        # Entries are read under the lock: a reload closes the store it replaces
+        with self.lock.read():
+            runs = self.partitions.get(partition_key(chapter_id), [])
+            return {entry_hash(self.entries[i]): i for start, end in runs for i in range(start, end)}
+
+    def next_chunk_index(self, chapter_id) -> int:
+        """One past the largest chunk_index in the chapter's partition (0 for a new chapter)."""
+        with self.lock.read():
+            runs = self.partitions.get(partition_key(chapter_id), [])
+            indexes = [(self.entries[i].get("metadata") or {}).get("chunk_index")
+                       for start, end in runs for i in range(start, end)]
+        return max((i for i in indexes if i is not None), default=-1) + 1
+
+    def stored_vectors(self, positions: List[int]) -> np.ndarray:
+        """Vectors at index positions as stored (decoded approximations for ivf_pq)."""
+        with self.lock.read():
+            if not positions:
+                return np.zeros((0, self.dim), dtype="float32")
+            return np.vstack([self.index.reconstruct(int(position)) for position in positions])
+
+    def remove_chapter(self, chapter_id) -> int:
+        """Drop a chapter's vectors and entries; returns how many were removed.
+
+        The index is rebuilt over the remaining vectors (read back from it, so
+        approximate for ivf_pq) and keeps its type; an emptied index reverts to
+        flat until the next add_documents.
+        """
+        key = partition_key(chapter_id)
+        with self.lock.write():
+            runs = self.partitions.get(key)
+            if not runs:
+                return 0
+            removed = np.zeros(self.index.ntotal, dtype=bool)
+            for start, end in runs:
+                removed[start:end] = True
+            kept = np.flatnonzero(~removed)
+            vectors = all_vectors(self.index)[kept]
+            if len(kept):
+                self.index = self._build(vectors, index_type_of(self.index))
+            else:
+                self.index = faiss.IndexFlatIP(self.dim)
+            self._index_mapped = False
+            entries = ChunkStore([self.entries[int(i)] for i in kept], meta=self.entries.meta)
+            self.entries.close()
+            self.entries = entries
+            self.partitions = {}
+            self._note_partitions(0, [e.get("metadata") for e in entries])
+            self.snapshot = None
+            self._bump_version()
+            return int(removed.sum())
 
     def save_index(self, index_path: str = DEFAULT_INDEX_PATH, entries_path: str = DEFAULT_ENTRIES_PATH):
-        """Persist FAISS index and entries to disk."""
-        with self.lock:
-            # write FAISS index
-            faiss.write_index(self.index, index_path)
-            # write entries
-            with open(entries_path, "w", encoding="utf-8") as f:
-                json.dump(self.entries, f, ensure_ascii=False)
-
-    def load_index(self, index_path: str = DEFAULT_INDEX_PATH, entries_path: str = DEFAULT_ENTRIES_PATH):
-        """Load FAISS index and entries from disk."""
-        with self.lock:
-            idx = faiss.read_index(index_path)
-            # Ensure dimension matches
-            if idx.d != self.dim:
-                raise ValueError("Index dimension does not match model embedding dimension")
+        """Persist FAISS index and entries (as a chunk store) to disk.
+
+        Both files are written in full before either replaces its predecessor, so
+        a failed save leaves the previous pair intact; processes that map the old
+        files keep reading them. Use publish_snapshot() to hand the index to
+        running servers.
+        """
+        with self.lock.read():
+            # A copy: concurrent saves share the read lock, so the store's own meta is not touched.
+            # Queries must be embedded by the same model (any backend) as the indexed vectors.
+            meta = dict(self.entries.meta, partitions=self.partitions, embedding_model=self.model_name)
+            faiss.write_index(self.index, f"{index_path}.tmp")
+            self.entries.write(f"{entries_path}.tmp", meta=meta)
+            os.replace(f"{index_path}.tmp", index_path)
+            os.replace(f"{entries_path}.tmp", entries_path)
+
+    def publish_snapshot(self) -> str:
+        """Save the index as a new versioned snapshot and make it current; returns its id.
+
+        Servers pick it up through reload_index() (the snapshot watcher or the
+        admin reload endpoint) without restarting.
+        """
+        snapshot = publish_snapshot(snapshot_root(), self.save_index, keep=settings.VECTOR_SNAPSHOT_KEEP)
+        with self.lock.write():
+            self.snapshot = snapshot
+        return snapshot
+
+    def _read_index_files(self, index_path: str, entries_path: str):
+        """Read and validate an index/entries pair; returns (index, entries, partitions). Takes no lock."""
+        idx = read_index_mmap(index_path) if self.mmap else faiss.read_index(index_path)
+        # Ensure dimension matches
+        if idx.d != self.dim:
+            raise ValueError("Index dimension does not match model embedding dimension")
+        configure_search(idx, nprobe=settings.VECTOR_IVF_NPROBE, ef_search=settings.VECTOR_HNSW_EF_SEARCH)
+        enable_reconstruct(idx)
+        entries = load_entries(entries_path)
+        if len(entries) != idx.ntotal:
+            raise ValueError(f"{entries_path} has {len(entries)} entries for {idx.ntotal} vectors")
+        indexed_with = entries.meta.get("embedding_model")
+        if indexed_with is not None and not same_embedding_model(indexed_with, self.model_name):
+            raise ValueError(f"Index was built with {indexed_with}, but queries would be embedded with {self.model_name}")
+        stored = entries.meta.get("partitions")
+        if stored is not None:
+            partitions = {key: [tuple(run) for run in runs] for key, runs in stored.items()}
+        else:
+            partitions = {}
+            add_partitions(partitions, 0, [e.get("metadata") for e in entries])
+        return idx, entries, partitions
+
+    def load_index(self, index_path: str = DEFAULT_INDEX_PATH, entries_path: str = DEFAULT_ENTRIES_PATH,
+                   snapshot: Optional[str] = None):
+        """Load FAISS index and entries from disk (entries_path may be a legacy JSON list).
+
+        The files are read and validated before the lock is taken; searches keep
+        using the current index meanwhile and the swap itself is a few
+        assignments. snapshot records which published snapshot the files are.
+        The replaced chunk store is closed (unmapped) once readers have drained.
+        """
+        idx, entries, partitions = self._read_index_files(index_path, entries_path)
+        with self.lock.write():
             self.index = idx
-            with open(entries_path, "r", encoding="utf-8") as f:
-                self.entries = json.load(f)
+            self._index_mapped = self.mmap
+            self.entries.close()
+            self.entries = entries
+            self.partitions = partitions
+            self.snapshot = snapshot
+            self._bump_version()
+
+    def reload_index(self, snapshot: Optional[str] = None) -> bool:
+        """Load the given (default: current) published snapshot unless it is already active.
+
+        Returns True if a new snapshot was swapped in.
+        """
+        snapshot = snapshot or current_snapshot(snapshot_root())
+        if snapshot is None or snapshot == self.snapshot:
+            return False
+        started = time.perf_counter()
+        self.load_index(*snapshot_paths(snapshot_root(), snapshot), snapshot=snapshot)
+        print(f"✅ FAISS snapshot {snapshot} loaded in {time.perf_counter() - started:.2f}s "
+              f"({self.index.ntotal} vectors)")
+        return True
+
+    def _search_partition(self, q_emb: np.ndarray, runs: List[Tuple[int, int]], top_k: int):
+        """Score only the positions in runs exactly; returns (scores, positions) best first (caller holds the read lock)."""
+        storage = flat_storage(self.index)
+        if storage is not None:
+            # Read the full vectors in place and score just this chapter's slices
+            xb = faiss.rev_swig_ptr(storage.get_xb(), storage.ntotal * storage.d)
+            xb = xb.reshape(storage.ntotal, storage.d)
+            scores = np.concatenate([xb[start:end] @ q_emb[0] for start, end in runs])
+        else:
+            # IVF: look the chapter's vectors up by id (decoded codes for ivf_pq)
+            scores = np.concatenate([self.index.reconstruct_n(start, end - start) @ q_emb[0] for start, end in runs])
+        positions = np.concatenate([np.arange(start, end) for start, end in runs])
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            scores, positions = scores[best], positions[best]
+        order = np.argsort(-scores)
+        return scores[order], positions[order]
+
+    def _search_index(self, query: str, top_k: int, partition: Optional[str]) -> List[Dict]:
+        q_emb = self.embed_queries([query])
+
+        # Index, partitions and entries must come from the same version
+        with self.lock.read():
+            if partition is None:
+                D, I = self.index.search(q_emb, top_k)
+                scores, positions = D[0], I[0]
+            else:
+                runs = self.partitions.get(partition)
+                if runs:
+                    scores, positions = self._search_partition(q_emb, runs, top_k)
+                else:
+                    scores, positions = [], []
+            results = []
+            for score, idx in zip(scores, positions):
+                if idx < 0 or idx >= len(self.entries):
+                    continue
+                entry = self.entries[int(idx)]
+                results.append({"text": entry["text"], "metadata": entry["metadata"], "score": float(score)})
+        return results
 
-    def search(self, query: str, top_k: int = 3) -> List[Dict]:
+    def search(self, query: str, top_k: int = 3, chapter_id: Optional[str] = None) -> List[Dict]:
         """Search the index for the most relevant documents to the query.
 
+        With chapter_id, only that chapter's entries are searched (cost scales with
+        the chapter, not the corpus) and the DB fallback is limited to the chapter.
+
         Returns a list of dicts with keys: text, metadata, score
         """
         self._ensure_index_ready()
@@ -92,17 +446,15 @@ class VectorStoreManager:
             # empty index
             return []
 
-        q_emb = self.model.encode([query], convert_to_numpy=True, show_progress_bar=False)
-        faiss.normalize_L2(q_emb)
+        partition = None if chapter_id is None else partition_key(chapter_id)
+        cache_key = (self.version, query, top_k, partition)
+        results = self._result_cache.get(cache_key)
+        if results is None:
+            results = self._search_index(query, top_k, partition)
+            self._result_cache.set(cache_key, results)
+        # Callers may annotate results; keep the cached copies pristine
+        results = [dict(r, metadata=dict(r["metadata"]) if r["metadata"] is not None else None) for r in results]
 
-        D, I = self.index.search(q_emb, top_k)
-        results = []
-        for score, idx in zip(D[0], I[0]):
-            if idx < 0 or idx >= len(self.entries):
-                continue
-            entry = self.entries[int(idx)]
-            results.append({"text": entry["text"], "metadata": entry["metadata"], "score": float(score)})
-            
         if not results or (results and results[0].get("score", 0) < 0.15):
             print("⚠️ FAISS retrieval empty or weak. Using DB fallback context.")
             from backend_app.db.session import SessionLocal
@@ -110,7 +462,10 @@ class VectorStoreManager:
             db = SessionLocal()
             try:
                 # Pull 3 most recent generic chapter rows as a deterministic fallback
-                fallback_rows = db.query(ChapterContent).order_by(ChapterContent.id.desc()).limit(3).all()
+                query_rows = db.query(ChapterContent)
+                if chapter_id is not None:
+                    query_rows = query_rows.filter(ChapterContent.chapter_id.in_([str(chapter_id), partition_key(chapter_id)]))
+                fallback_rows = query_rows.order_by(ChapterContent.id.desc()).limit(3).all()
                 results = [{"text": r.content, "metadata": {"chapter_id": r.chapter_id}, "score": 1.0} for r in fallback_rows]
                 print(f"✅ Fallback context used: {len(results)} chunks.")
             except Exception as e:
@@ -121,3 +476,47 @@ class VectorStoreManager:
             print(f"✅ Retrieved {len(results)} chunks from FAISS")
             
         return results
+
+
+_shared_manager: Optional[VectorStoreManager] = None
+_shared_lock = threading.Lock()
+
+
+def get_vector_manager() -> VectorStoreManager:
+    """Process-wide VectorStoreManager, so the model and index are loaded once per worker."""
+    global _shared_manager
+    if _shared_manager is None:
+        with _shared_lock:
+            if _shared_manager is None:
+                _shared_manager = VectorStoreManager()
+                register_metrics("vector_store", _shared_manager.stats)
+    return _shared_manager
+
+
+_watcher: Optional[SnapshotWatcher] = None
+
+
+def _reload_shared_manager(snapshot: str) -> None:
+    # Not loaded yet: it will load the current snapshot when first used
+    if _shared_manager is not None:
+        _shared_manager.reload_index(snapshot)
+
+
+def start_snapshot_watcher(interval_seconds: float) -> SnapshotWatcher:
+    """Reload the shared manager in the background whenever ingest publishes a new snapshot."""
+    global _watcher
+    if _watcher is None:
+        _watcher = SnapshotWatcher(snapshot_root, _reload_shared_manager, interval_seconds).start()
+    return _watcher
+
+
+def stop_snapshot_watcher() -> None:
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
+
+
+def warm_vector_manager() -> None:
+    """Load the shared manager and run one embedding, so the first search pays for neither."""
+    get_vector_manager().embed(["warm up"])
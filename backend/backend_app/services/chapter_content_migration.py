@@ -0,0 +1,27 @@
+"""Schema additions to chapter_contents for incremental ingestion.
+
+ensure_chapter_content_schema() adds the content_hash column (and its index)
+to databases created before it existed; it runs at app startup and before
+every ingest. Rows stored earlier get their hash filled in by the first ingest
+that touches their chapter.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from backend_app.models.chapter_content import ChapterContent
+
+
+def ensure_chapter_content_schema(engine: Engine) -> bool:
+    """Add chapter_contents.content_hash if missing. Returns True if the table was altered."""
+    inspector = inspect(engine)
+    if not inspector.has_table(ChapterContent.__tablename__):
+        return False
+    columns = {column["name"] for column in inspector.get_columns(ChapterContent.__tablename__)}
+    if "content_hash" in columns:
+        return False
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE chapter_contents ADD COLUMN content_hash VARCHAR(64)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_chapter_contents_content_hash "
+                          "ON chapter_contents (content_hash)"))
+        print("🛠️ Added chapter_contents.content_hash")
+    return True
@@ -0,0 +1,61 @@
+import json
+import zlib
+from typing import Any, Dict, List, Optional
+
+from backend_app.models.lesson_content import LessonContent
+
+
+class LessonPayload:
+    """A lesson's slides kept as ready-to-send JSON bytes.
+
+    Cache hits write `raw` straight into the response body; the parsed slide
+    list is only built (once) for callers that need Python objects, such as
+    the SSE stream.
+    """
+
+    __slots__ = ("raw", "_slides")
+
+    def __init__(self, raw: bytes, slides: Optional[List[Dict[str, Any]]] = None):
+        self.raw = raw
+        self._slides = slides
+
+    @classmethod
+    def from_slides(cls, slides: List[Dict[str, Any]]) -> "LessonPayload":
+        raw = json.dumps(slides, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return cls(raw, slides)
+
+    @property
+    def slides(self) -> List[Dict[str, Any]]:
+        if self._slides is None:
+            self._slides = json.loads(self.raw)
+        return self._slides
+
+    def compress(self, level: int = 6) -> bytes:
+        return zlib.compress(self.raw, level)
+
+    def response_body(self, chapter_title: str) -> bytes:
+        """The /generate response {"chapter_title": ..., "slides": [...]} without re-encoding the slides."""
+        title = json.dumps(chapter_title, ensure_ascii=False).encode("utf-8")
+        return b'{"chapter_title":' + title + b',"slides":' + self.raw + b"}"
+
+
+def payload_from_row(row: LessonContent) -> Optional[LessonPayload]:
+    """Decode a stored lesson, or None if the row holds no usable slides.
+
+    Compressed rows are trusted as written by save_lesson (a compact JSON list)
+    apart from being empty; legacy content_json rows are parsed once to
+    validate them.
+    """
+    if row.content_blob:
+        try:
+            raw = zlib.decompress(row.content_blob)
+        except zlib.error:
+            return None
+        return LessonPayload(raw) if raw.strip() != b"[]" else None
+    try:
+        parsed = json.loads(row.content_json or "")
+    except Exception:
+        return None  # Bad JSON, caller should regenerate
+    if isinstance(parsed, list) and len(parsed) > 0:
+        return LessonPayload.from_slides(parsed)
+    return None
@@ -0,0 +1,376 @@
+import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend_app.ai.llm_service import PARTIAL_QUALITY_SCORE, fallback_generator, generate_lesson_slides, llm_available, stream_lesson_slides
+from backend_app.core.cache import TTLLRUCache
+from backend_app.core.config import settings
+from backend_app.core.metrics import register_metrics
+from backend_app.core.singleflight import SingleFlight
+from backend_app.db.session import SessionLocal
+from backend_app.models.learning_session import LearningSession
+from backend_app.models.lesson_content import LessonContent
+from backend_app.services.lesson_payload import LessonPayload, payload_from_row
+from backend_app.services.topic_index import TopicIndex
+
+# One generation per cache_key at a time; concurrent misses wait for the leader
+_lesson_flight = SingleFlight()
+
+# Hot lessons served from memory: cache_key -> LessonPayload (non-fallback only)
+_lesson_memory = TTLLRUCache(
+    max_entries=settings.LESSON_MEMORY_CACHE_SIZE,
+    ttl_seconds=settings.LESSON_MEMORY_CACHE_TTL_SECONDS,
+)
+register_metrics("lesson_memory_cache", _lesson_memory.stats)
+
+# Semantic topic canonicalization; set up by configure_topic_index() once an encoder is available
+_topic_index: Optional[TopicIndex] = None
+
+
+def configure_topic_index(encode: Callable[[List[str]], Any]) -> None:
+    """Enable topic canonicalization using encode (texts -> L2-normalized vectors)."""
+    global _topic_index
+    if settings.TOPIC_SIMILARITY_THRESHOLD <= 0:
+        return
+    _topic_index = TopicIndex(encode, threshold=settings.TOPIC_SIMILARITY_THRESHOLD)
+    register_metrics("topic_index", _topic_index.stats)
+
+
+def get_cached_payload(db: Session, cache_key: str) -> Optional[LessonPayload]:
+    """Return the cached lesson for cache_key, or None if missing, fallback or unreadable.
+
+    Checks the in-process tier first and fills it from the database on a hit.
+    """
+    payload = _lesson_memory.get(cache_key)
+    if payload is not None:
+        return payload
+    return _load_payload(db, cache_key)
+
+
+def get_cached_slides(db: Session, cache_key: str) -> Optional[List[Dict[str, Any]]]:
+    """Like get_cached_payload, but returns the parsed slide list."""
+    payload = get_cached_payload(db, cache_key)
+    return payload.slides if payload is not None else None
+
+
+def _load_payload(db: Session, cache_key: str, include_fallback: bool = False) -> Optional[LessonPayload]:
+    cached_lesson = db.query(LessonContent).filter(LessonContent.chapter_id == cache_key).first()
+    if not cached_lesson or (cached_lesson.is_fallback and not include_fallback):
+        return None
+    payload = payload_from_row(cached_lesson)
+    if payload is not None and not cached_lesson.is_fallback:
+        _lesson_memory.set(cache_key, payload)
+    return payload
+
+
+async def _stored_while_unavailable(db: Session, cache_key: str) -> Optional[LessonPayload]:
+    """While the LLM circuit is open, any stored lesson (even a fallback) beats waiting on a dead provider."""
+    if llm_available():
+        return None
+    payload = await run_in_threadpool(_load_payload, db, cache_key, True)
+    if payload is not None:
+        print(f"⚡ LLM unavailable — serving stored lesson for '{cache_key}'")
+    return payload
+
+
+async def _lookup_payload(db: Session, cache_key: str) -> Optional[LessonPayload]:
+    # Memory hits are answered on the event loop; only misses hop to the threadpool
+    payload = _lesson_memory.get(cache_key)
+    if payload is None:
+        payload = await run_in_threadpool(_load_payload, db, cache_key)
+    return payload
+
+
+def save_lesson(db: Session, cache_key: str, result: Dict[str, Any]) -> LessonPayload:
+    """Upsert a generated lesson into the LessonContent cache and refresh the memory tier.
+
+    The slides are serialized once and stored zlib-compressed; the returned
+    payload is what later cache hits send as the response body. A result
+    without slides is returned but not stored, so the next request
+    regenerates instead of being served an empty lesson from the cache.
+    """
+    payload = LessonPayload.from_slides(result["slides"])
+    if not result["slides"]:
+        print(f"⚠️ Not caching lesson '{cache_key}': no slides")
+        return payload
+    blob = payload.compress(settings.LESSON_COMPRESSION_LEVEL)
+    is_fallback = result.get("is_fallback", False)
+    is_partial = result.get("is_partial", False)
+    quality_score = result.get("quality_score", 0.0)
+
+    # Drop the old entry first so no reader sees it once the row is replaced
+    _lesson_memory.invalidate(cache_key)
+
+    def _update(record: LessonContent):
+        record.content_json = ""
+        record.content_blob = blob
+        record.is_fallback = is_fallback
+        record.is_partial = is_partial
+        record.quality_score = quality_score
+        record.created_at = datetime.datetime.utcnow()
+
+    cached_record = db.query(LessonContent).filter(LessonContent.chapter_id == cache_key).first()
+    if cached_record:
+        _update(cached_record)
+        db.commit()
+    else:
+        db.add(LessonContent(
+            chapter_id=cache_key,
+            content_json="",
+            content_blob=blob,
+            is_fallback=is_fallback,
+            is_partial=is_partial,
+            quality_score=quality_score
+        ))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker inserted the same key first — overwrite its row instead
+            db.rollback()
+            cached_record = db.query(LessonContent).filter(LessonContent.chapter_id == cache_key).first()
+            _update(cached_record)
+            db.commit()
+
+    if not is_fallback:
+        _lesson_memory.set(cache_key, payload)
+    if _topic_index is not None:
+        try:
+            _topic_index.note_saved(cache_key, is_fallback)
+        except Exception as e:
+            # The lesson is stored; only its topic misses canonicalization until the index reloads
+            print(f"⚠️ Topic index update failed: {e}")
+    return payload
+
+
+def invalidate_lesson(cache_key: str) -> None:
+    """Drop cache_key from the in-process tier (the database row is left alone)."""
+    _lesson_memory.invalidate(cache_key)
+
+
+def clear_lessons(db: Session) -> int:
+    """Delete every cached lesson from the database and the in-process tier."""
+    num_deleted = db.query(LessonContent).delete()
+    db.commit()
+    _lesson_memory.clear()
+    if _topic_index is not None:
+        _topic_index.clear()
+    return num_deleted
+
+
+def lesson_cache_key(chapter_id: str, topic: Optional[str]) -> Tuple[Optional[str], str]:
+    """Normalize topic — strip whitespace, lowercase for consistent caching — and build the cache key."""
+    clean_topic = topic.strip().lower() if topic and topic.strip() else None
+    cache_key = f"{chapter_id}::{clean_topic}" if clean_topic else chapter_id
+    return clean_topic, cache_key
+
+
+async def resolve_lesson_key(
+    db: Session, chapter_id: str, clean_topic: Optional[str], cache_key: str
+) -> Tuple[Optional[str], str]:
+    """Map a topic onto an already-cached, semantically equivalent topic of the same chapter.
+
+    Exact hits are kept as they are (and are now in the memory tier, so the
+    following generate call is cheap). Otherwise the topic is embedded and
+    compared against the chapter's cached topics; above the threshold the
+    existing lesson's topic and cache key are returned instead.
+    """
+    if not clean_topic or _topic_index is None:
+        return clean_topic, cache_key
+    if await _lookup_payload(db, cache_key) is not None:
+        return clean_topic, cache_key
+    try:
+        match = await run_in_threadpool(_topic_index.match, db, chapter_id, clean_topic)
+    except Exception as e:
+        print(f"⚠️ Topic canonicalization failed: {e}")
+        return clean_topic, cache_key
+    if match is None:
+        return clean_topic, cache_key
+    print(f"♻️ Topic '{clean_topic}' reuses cached lesson for '{match}'")
+    return lesson_cache_key(chapter_id, match)
+
+
+async def _retrieve(retriever: Callable[[str], List[Dict[str, Any]]], query: str) -> List[Dict[str, Any]]:
+    try:
+        return await run_in_threadpool(retriever, query)
+    except Exception:
+        return []
+
+
+async def _generate_and_store(
+    db: Session,
+    chapter_id: str,
+    cache_key: str,
+    clean_topic: Optional[str],
+    retriever: Callable[[str], List[Dict[str, Any]]],
+    force_refresh: bool,
+) -> LessonPayload:
+    # Re-check: a leader that finished just before us may already have stored the lesson
+    if not force_refresh:
+        payload = await _lookup_payload(db, cache_key)
+        if payload is not None:
+            return payload
+
+    payload = await _stored_while_unavailable(db, cache_key)
+    if payload is not None:
+        return payload
+
+    print(f"🔄 Generating lesson for topic='{clean_topic or chapter_id}'...")
+    retrieved = await _retrieve(retriever, clean_topic or chapter_id)
+
+    result = await generate_lesson_slides(chapter_id, retrieved, topic=clean_topic)
+    payload = await run_in_threadpool(save_lesson, db, cache_key, result)
+    print(f"✅ Lesson cached (Quality: {result.get('quality_score')}, Fallback: {result.get('is_fallback')}, "
+          f"Partial: {result.get('is_partial', False)})")
+    return payload
+
+
+async def generate_lesson_payload(
+    db: Session,
+    chapter_id: str,
+    cache_key: str,
+    clean_topic: Optional[str],
+    retriever: Callable[[str], List[Dict[str, Any]]],
+    force_refresh: bool = False,
+) -> LessonPayload:
+    """Return the lesson for cache_key, generating it at most once across concurrent callers.
+
+    Blocking work (SQLite queries, FAISS search) runs in the threadpool so the
+    event loop stays free while the LLM call is awaited.
+    """
+    if force_refresh:
+        invalidate_lesson(cache_key)
+    else:
+        payload = await _lookup_payload(db, cache_key)
+        if payload is not None:
+            return payload
+
+    return await _lesson_flight.do(
+        cache_key,
+        lambda: _generate_and_store(db, chapter_id, cache_key, clean_topic, retriever, force_refresh),
+    )
+
+
+async def generate_lesson_cached(
+    db: Session,
+    chapter_id: str,
+    cache_key: str,
+    clean_topic: Optional[str],
+    retriever: Callable[[str], List[Dict[str, Any]]],
+    force_refresh: bool = False,
+) -> List[Dict[str, Any]]:
+    """Like generate_lesson_payload, but returns the parsed slide list."""
+    payload = await generate_lesson_payload(db, chapter_id, cache_key, clean_topic, retriever, force_refresh)
+    return payload.slides
+
+
+async def stream_lesson_cached(
+    chapter_id: str,
+    cache_key: str,
+    clean_topic: Optional[str],
+    retriever: Callable[[str], List[Dict[str, Any]]],
+    force_refresh: bool = False,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Yield ("slide", slide) events as soon as each slide is available, then one ("done", summary).
+
+    Cache hits and requests that join another in-flight generation emit all
+    slides at once; otherwise this request leads the generation, streams slides
+    straight from the LLM token stream and persists the assembled lesson just
+    like generate_lesson_cached. Uses its own session because it outlives the
+    request-scoped one.
+    """
+    db = SessionLocal()
+    try:
+        payload = None
+        if force_refresh:
+            invalidate_lesson(cache_key)
+        else:
+            payload = await _lookup_payload(db, cache_key)
+        if payload is None and not _lesson_flight.start(cache_key):
+            # Someone else is generating this lesson — wait for their result
+            payload = await _lesson_flight.do(
+                cache_key,
+                lambda: _generate_and_store(db, chapter_id, cache_key, clean_topic, retriever, force_refresh),
+            )
+        if payload is not None:
+            slides = payload.slides
+            for slide in slides:
+                yield "slide", slide
+            yield "done", {"chapter_title": cache_key, "slide_count": len(slides), "streamed": False}
+            return
+
+        # This request is the leader for cache_key
+        try:
+            payload = await _stored_while_unavailable(db, cache_key)
+        except BaseException as e:
+            _lesson_flight.finish(cache_key, error=e)
+            raise
+        if payload is not None:
+            _lesson_flight.finish(cache_key, result=payload)
+            for slide in payload.slides:
+                yield "slide", slide
+            yield "done", {"chapter_title": cache_key, "slide_count": len(payload.slides), "streamed": False}
+            return
+
+        try:
+            print(f"🔄 Streaming lesson for topic='{clean_topic or chapter_id}'...")
+            retrieved = await _retrieve(retriever, clean_topic or chapter_id)
+            streamed = []
+            try:
+                async for slide in stream_lesson_slides(chapter_id, retrieved, topic=clean_topic):
+                    streamed.append(slide)
+                    yield "slide", slide
+                if not streamed:
+                    raise ValueError("No usable slides in the LLM stream")
+                result = {"topic": clean_topic or chapter_id, "slides": streamed, "is_fallback": False, "quality_score": 1.0}
+            except Exception as e:
+                print(f"⚠️ Groq stream failed: {str(e)}")
+                if streamed:
+                    # The client already has these slides; keep them as a partial lesson rather than paying again
+                    result = {"topic": clean_topic or chapter_id, "slides": streamed, "is_fallback": False,
+                              "is_partial": True, "quality_score": PARTIAL_QUALITY_SCORE}
+                else:
+                    result = fallback_generator(chapter_id, clean_topic, "")
+                    for slide in result["slides"]:
+                        yield "slide", slide
+
+            payload = await run_in_threadpool(save_lesson, db, cache_key, result)
+            print(f"✅ Lesson cached (Quality: {result.get('quality_score')}, Fallback: {result.get('is_fallback')}, "
+                  f"Partial: {result.get('is_partial', False)})")
+        except BaseException as e:
+            _lesson_flight.finish(cache_key, error=e)
+            raise
+        _lesson_flight.finish(cache_key, result=payload)
+        yield "done", {"chapter_title": cache_key, "slide_count": len(result["slides"]), "streamed": True}
+    finally:
+        db.close()
+
+
+def record_learning_session(db: Session, user, chapter_id: str, clean_topic: Optional[str]) -> None:
+    """History tracking — one LearningSession per unique (user, chapter, topic)."""
+    # Build a human-readable chapter name
+    if clean_topic:
+        c_name = clean_topic.title()
+    elif chapter_id == "chapter_2":
+        c_name = "Polynomials"
+    else:
+        c_name = f"Chapter {chapter_id.replace('chapter_', '')}"
+
+    session_record = db.query(LearningSession).filter(
+        LearningSession.user_id == user.id,
+        LearningSession.chapter_id == chapter_id,
+        LearningSession.topic == clean_topic
+    ).first()
+
+    if session_record:
+        session_record.last_accessed = datetime.datetime.utcnow()
+    else:
+        db.add(LearningSession(
+            user_id=user.id,
+            chapter_id=chapter_id,
+            chapter_name=c_name,
+            topic=clean_topic
+        ))
+    db.commit()
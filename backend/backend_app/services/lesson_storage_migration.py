@@ -0,0 +1,103 @@
+"""Migrate lesson_content rows to the compressed, pre-serialized payload format.
+
+ensure_lesson_storage_schema() adds the content_blob and is_partial columns
+to databases created before they existed (create_all never alters tables)
+and runs at app startup. The backfill re-encodes every legacy content_json row into
+content_blob and empties content_json:
+
+  python -m backend_app.services.lesson_storage_migration --vacuum
+
+Rows whose JSON cannot be read are left untouched (they are regenerated on
+their next request). The migration is idempotent and can be re-run safely;
+--vacuum rewrites the SQLite file so the freed space is returned to disk.
+"""
+import argparse
+import json
+from typing import Dict
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend_app.core.config import settings
+from backend_app.db.session import SessionLocal, engine as default_engine
+from backend_app.models.lesson_content import LessonContent
+from backend_app.services.lesson_payload import payload_from_row
+
+
+# Columns added to lesson_content after its first release, with their DDL
+_ADDED_COLUMNS = {
+    "content_blob": "BLOB",
+    "is_partial": "BOOLEAN DEFAULT 0",
+}
+
+
+def ensure_lesson_storage_schema(engine: Engine) -> bool:
+    """Add any missing lesson_content columns. Returns True if the table was altered."""
+    inspector = inspect(engine)
+    if not inspector.has_table(LessonContent.__tablename__):
+        return False
+    columns = {column["name"] for column in inspector.get_columns(LessonContent.__tablename__)}
+    missing = [name for name in _ADDED_COLUMNS if name not in columns]
+    if not missing:
+        return False
+    with engine.begin() as conn:
+        for name in missing:
+            conn.execute(text(f"ALTER TABLE lesson_content ADD COLUMN {name} {_ADDED_COLUMNS[name]}"))
+            print(f"🛠️ Added lesson_content.{name}")
+    return True
+
+
+def backfill_lesson_payloads(db: Session, batch_size: int = 200) -> Dict[str, int]:
+    """Compress every legacy row in batches; returns row and byte counts."""
+    stats = {"migrated": 0, "unreadable": 0, "bytes_before": 0, "bytes_after": 0}
+    last_id = 0
+    while True:
+        rows = (
+            db.query(LessonContent)
+            .filter(LessonContent.id > last_id, LessonContent.content_blob.is_(None))
+            .order_by(LessonContent.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        for row in rows:
+            last_id = row.id
+            payload = payload_from_row(row)
+            if payload is None:
+                stats["unreadable"] += 1
+                continue
+            blob = payload.compress(settings.LESSON_COMPRESSION_LEVEL)
+            stats["bytes_before"] += len((row.content_json or "").encode("utf-8"))
+            stats["bytes_after"] += len(blob)
+            row.content_blob = blob
+            row.content_json = ""
+            stats["migrated"] += 1
+        db.commit()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress legacy lesson_content rows")
+    parser.add_argument("--batch-size", type=int, default=200, help="Rows re-encoded per commit")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the SQLite database afterwards")
+    args = parser.parse_args()
+
+    if not inspect(default_engine).has_table(LessonContent.__tablename__):
+        print("No lesson_content table yet — nothing to migrate")
+        return
+    ensure_lesson_storage_schema(default_engine)
+    db = SessionLocal()
+    try:
+        report = backfill_lesson_payloads(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    if args.vacuum and default_engine.dialect.name == "sqlite":
+        with default_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Pre-generate and cache lessons for the whole curriculum (cache warm-up job).
+
+Enumerates every chapter known from ChapterContent rows and the FAISS entry
+metadata, crosses them with an optional topic list, and generates the missing
+LessonContent rows through generate_lesson_slides with a bounded worker pool.
+
+Run off-peak, e.g.:
+  python -m backend_app.services.lesson_warmup --workers 4 --rpm 25 --topics-file topics.json
+
+topics.json is either a list of topics applied to every chapter, or a mapping
+{"<chapter_id>": ["topic", ...]}. Keys that already hold non-fallback content
+are skipped, so an interrupted run can simply be restarted.
+
+Lessons are cached under the chapter ids the API is called with ("chapter_2",
+as sent by the frontend), while ingest stores bare ids ("2"); every id is
+turned into the API form before its cache key is built, so warmed lessons are
+the ones /lessons/chapter_2/generate reads.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from backend_app.ai.llm_service import generate_lesson_slides
+from backend_app.db.session import SessionLocal
+from backend_app.models.chapter_content import ChapterContent
+from backend_app.rag.chunk_store import partition_key
+from backend_app.rag.context_packer import load_encoding
+from backend_app.services.lesson_service import get_cached_slides, lesson_cache_key, save_lesson
+
+
+def api_chapter_id(chapter_id: Any) -> str:
+    """The id the API and frontend use for a chapter ("2" and "chapter_2" both give "chapter_2")."""
+    return f"chapter_{partition_key(chapter_id)}"
+
+
+def collect_chapter_ids(db: Session, index_partitions: Iterable[str]) -> List[str]:
+    """API ids of all chapters in ChapterContent rows and the FAISS chapter partitions, sorted.
+
+    index_partitions are partition keys (VectorStoreManager.chapter_ids(), "chapter_"
+    stripped); they are never used as chapter ids as they are.
+    """
+    chapter_ids = {api_chapter_id(row[0]) for row in db.query(ChapterContent.chapter_id).distinct().all()}
+    chapter_ids.update(api_chapter_id(key) for key in index_partitions if key)
+    return sorted(chapter_ids)
+
+
+def build_targets(chapter_ids: List[str], topics: Any = None) -> List[Tuple[str, Optional[str]]]:
+    """Cross chapters with topics: each chapter's base lesson plus one lesson per topic.
+
+    topics: None, a list applied to every chapter, or a {chapter_id: [topics]} mapping.
+    Chapter ids (in chapter_ids and the mapping) may be bare or in API form;
+    targets always use the API form.
+    """
+    chapter_ids = list(dict.fromkeys(api_chapter_id(chapter_id) for chapter_id in chapter_ids))
+    if isinstance(topics, dict):
+        merged: Dict[str, List[str]] = {}
+        for chapter_id, chapter_topics in topics.items():
+            merged.setdefault(api_chapter_id(chapter_id), []).extend(chapter_topics)
+        topics = merged
+    targets = []
+    seen = set()
+    for chapter_id in chapter_ids:
+        if isinstance(topics, dict):
+            chapter_topics = topics.get(chapter_id, [])
+        else:
+            chapter_topics = topics or []
+        for topic in [None] + list(chapter_topics):
+            clean_topic, cache_key = lesson_cache_key(chapter_id, topic)
+            if cache_key not in seen:
+                seen.add(cache_key)
+                targets.append((chapter_id, clean_topic))
+    # Chapters that only appear in the topic mapping still get their topic lessons
+    if isinstance(topics, dict):
+        for chapter_id, chapter_topics in topics.items():
+            if chapter_id not in chapter_ids:
+                for topic in chapter_topics:
+                    clean_topic, cache_key = lesson_cache_key(chapter_id, topic)
+                    if cache_key not in seen:
+                        seen.add(cache_key)
+                        targets.append((chapter_id, clean_topic))
+    return targets
+
+
+class _Pacer:
+    """Spaces request starts to stay under a requests-per-minute budget.
+
+    backoff() pauses every worker at once, which is what a provider rate limit
+    needs: hammering it from the other workers would only extend the penalty.
+    """
+
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_start = 0.0
+        self._cooldown_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            start = max(now, self._next_start, self._cooldown_until)
+            self._next_start = start + self.interval
+        await asyncio.sleep(start - now)
+
+    def backoff(self, seconds: float):
+        self._cooldown_until = max(self._cooldown_until, asyncio.get_running_loop().time() + seconds)
+
+
+async def run_warmup(
+    targets: List[Tuple[str, Optional[str]]],
+    retriever,
+    workers: int = 4,
+    requests_per_minute: float = 25,
+    max_retries: int = 2,
+    backoff_seconds: float = 10.0,
+    force: bool = False,
+) -> Dict[str, Any]:
+    """Generate and store a lesson for every target that is not cached yet.
+
+    retriever(query, chapter_id) returns the context chunks for one lesson.
+
+    A fallback result counts as a failed attempt (it is what generate_lesson_slides
+    returns on rate limits and timeouts); the job backs off and retries it, and
+    never overwrites the cache with fallback content.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for target in targets:
+        queue.put_nowait(target)
+
+    pacer = _Pacer(requests_per_minute)
+    stats = {"total": len(targets), "generated": 0, "skipped": 0, "failed": 0, "retries": 0, "failed_keys": [], "llm_seconds": 0.0}
+    started = time.perf_counter()
+
+    def _report(cache_key: str, status: str, seconds: float = None):
+        done = stats["generated"] + stats["skipped"] + stats["failed"]
+        elapsed = time.perf_counter() - started
+        rate = stats["generated"] / elapsed * 60 if elapsed > 0 else 0.0
+        took = f" in {seconds:.1f}s" if seconds is not None else ""
+        print(f"[{done}/{stats['total']}] {status:9} {cache_key}{took} ({rate:.1f} lessons/min)")
+
+    async def _worker():
+        db = SessionLocal()
+        try:
+            while True:
+                try:
+                    chapter_id, clean_topic = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                _, cache_key = lesson_cache_key(chapter_id, clean_topic)
+
+                if not force and await run_in_threadpool(get_cached_slides, db, cache_key):
+                    stats["skipped"] += 1
+                    _report(cache_key, "skipped")
+                    continue
+
+                try:
+                    retrieved = await run_in_threadpool(retriever, clean_topic or chapter_id, chapter_id)
+                except Exception:
+                    retrieved = []
+
+                for attempt in range(max_retries + 1):
+                    await pacer.wait()
+                    t0 = time.perf_counter()
+                    result = await generate_lesson_slides(chapter_id, retrieved, topic=clean_topic)
+                    took = time.perf_counter() - t0
+                    stats["llm_seconds"] += took
+                    if not result.get("is_fallback"):
+                        await run_in_threadpool(save_lesson, db, cache_key, result)
+                        stats["generated"] += 1
+                        _report(cache_key, "generated", took)
+                        break
+                    if attempt < max_retries:
+                        stats["retries"] += 1
+                        print(f"⚠️ Fallback for {cache_key}, backing off {backoff_seconds * (2 ** attempt):.0f}s")
+                    pacer.backoff(backoff_seconds * (2 ** attempt))
+                else:
+                    stats["failed"] += 1
+                    stats["failed_keys"].append(cache_key)
+                    _report(cache_key, "failed", took)
+        finally:
+            db.close()
+
+    await asyncio.gather(*(_worker() for _ in range(max(1, workers))))
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed_seconds"] = round(elapsed, 2)
+    stats["llm_seconds"] = round(stats["llm_seconds"], 2)
+    stats["lessons_per_minute"] = round(stats["generated"] / elapsed * 60, 2) if elapsed > 0 else 0.0
+    return stats
+
+
+def _load_topics(path: Optional[str], cli_topics: Optional[List[str]]):
+    topics = None
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            topics = json.load(f)
+    if cli_topics:
+        if isinstance(topics, dict):
+            topics = {k: list(v) + cli_topics for k, v in topics.items()}
+        else:
+            topics = list(topics or []) + cli_topics
+    return topics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate cached lessons for every known chapter")
+    parser.add_argument("--topics-file", help="JSON list of topics, or {chapter_id: [topics]} mapping")
+    parser.add_argument("--topic", action="append", help="Extra topic applied to every chapter (repeatable)")
+    parser.add_argument("--chapter", action="append",
+                        help="Restrict to these chapters, as the API names them (chapter_2; a bare 2 also works; repeatable)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent generations")
+    parser.add_argument("--rpm", type=float, default=25, help="Max LLM requests per minute (0 = unpaced)")
+    parser.add_argument("--retries", type=int, default=2, help="Retries per lesson after a fallback result")
+    parser.add_argument("--force", action="store_true", help="Regenerate even lessons that are already cached")
+    parser.add_argument("--dry-run", action="store_true", help="List the cache keys that would be generated")
+    args = parser.parse_args()
+
+    from backend_app.rag.vector_service import VectorStoreManager
+    manager = VectorStoreManager()
+
+    db = SessionLocal()
+    try:
+        if args.chapter:
+            chapter_ids = list(dict.fromkeys(api_chapter_id(chapter_id) for chapter_id in args.chapter))
+        else:
+            chapter_ids = collect_chapter_ids(db, manager.chapter_ids())
+    finally:
+        db.close()
+    targets = build_targets(chapter_ids, _load_topics(args.topics_file, args.topic))
+
+    if args.dry_run:
+        for chapter_id, clean_topic in targets:
+            print(lesson_cache_key(chapter_id, clean_topic)[1])
+        return
+
+    load_encoding()
+    print(f"Warming {len(targets)} lessons across {len(chapter_ids)} chapters "
+          f"({args.workers} workers, {args.rpm} req/min)")
+    report = asyncio.run(run_warmup(
+        targets,
+        retriever=lambda query, chapter_id: manager.search(query, top_k=5, chapter_id=chapter_id),
+        workers=args.workers,
+        requests_per_minute=args.rpm,
+        max_retries=args.retries,
+        force=args.force,
+    ))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
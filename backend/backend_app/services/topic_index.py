@@ -0,0 +1,105 @@
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from backend_app.models.lesson_content import LessonContent
+
+
+class TopicIndex:
+    """Per-chapter vector index of the topics that already have a cached lesson.
+
+    Used to map a free-text topic ("cubic polynomials") onto an existing cached
+    topic ("cubic polynomial") when their embeddings are at least `threshold`
+    cosine-similar, so near-duplicates share one lesson instead of triggering a
+    new generation. A chapter's topics are loaded from lesson_content on first
+    use and kept current through note_saved().
+    """
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], threshold: float = 0.85):
+        # encode must return L2-normalized float32 vectors, one row per text
+        self._encode = encode
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._chapters: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        self.matches = 0
+        self.lookups = 0
+
+    def match(self, db: Session, chapter_id: str, topic: str) -> Optional[str]:
+        """Return the most similar cached topic for chapter_id, or None below the threshold."""
+        topics, vectors = self._ensure_loaded(db, chapter_id)
+        if not topics:
+            return None
+        query = self._encode([topic])[0]
+        sims = vectors @ query
+        best = int(np.argmax(sims))
+        with self._lock:
+            self.lookups += 1
+            if sims[best] >= self.threshold:
+                self.matches += 1
+                return topics[best]
+        return None
+
+    def note_saved(self, cache_key: str, is_fallback: bool) -> None:
+        """Keep a loaded chapter in sync after a lesson row was written."""
+        if "::" not in cache_key:
+            return
+        chapter_id, topic = cache_key.split("::", 1)
+        vector = None
+        if not is_fallback:
+            with self._lock:
+                loaded = self._chapters.get(chapter_id)
+                if loaded is None or topic in loaded[0]:
+                    return  # unloaded chapters are picked up from the database on first use
+            vector = np.asarray(self._encode([topic]), dtype="float32")
+
+        with self._lock:
+            loaded = self._chapters.get(chapter_id)
+            if loaded is None:
+                return
+            topics, vectors = loaded
+            if is_fallback and topic in topics:
+                keep = [i for i, t in enumerate(topics) if t != topic]
+                self._chapters[chapter_id] = ([topics[i] for i in keep], vectors[keep])
+            elif vector is not None and topic not in topics:
+                vectors = np.vstack([vectors, vector]) if topics else vector
+                self._chapters[chapter_id] = (topics + [topic], vectors)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chapters.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "chapters_loaded": len(self._chapters),
+                "topics": sum(len(t) for t, _ in self._chapters.values()),
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "matches": self.matches,
+            }
+
+    def _ensure_loaded(self, db: Session, chapter_id: str) -> Tuple[List[str], np.ndarray]:
+        with self._lock:
+            loaded = self._chapters.get(chapter_id)
+        if loaded is not None:
+            return loaded
+
+        prefix = f"{chapter_id}::"
+        rows = (
+            db.query(LessonContent.chapter_id)
+            .filter(LessonContent.chapter_id.startswith(prefix, autoescape=True))
+            .filter(LessonContent.is_fallback.is_(False))
+            .all()
+        )
+        topics = [row[0][len(prefix):] for row in rows]
+        if topics:
+            vectors = np.asarray(self._encode(topics), dtype="float32")
+        else:
+            vectors = np.zeros((0, 0), dtype="float32")
+        loaded = (topics, vectors)
+        with self._lock:
+            # Another thread may have loaded (and extended) it meanwhile — keep theirs
+            loaded = self._chapters.setdefault(chapter_id, loaded)
+        return loaded
@@ -0,0 +1,210 @@
+import datetime
+import hashlib
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend_app.core.cache import TTLLRUCache
+from backend_app.core.config import settings
+from backend_app.core.metrics import register_metrics
+from backend_app.models.tutor_answer import TutorAnswer
+
+
+def context_hash(title: str, bullets: List[str], formula: str, narration: str) -> str:
+    """Stable hash of the slide the question was asked on."""
+    canonical = json.dumps([title or "", list(bullets or []), formula or "", narration or ""], ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation so trivial variants match."""
+    text = " ".join(question.lower().split())
+    return re.sub(r"[\s?!.]+$", "", text)
+
+
+class TutorAnswerCache:
+    """Persistent cache of tutor answers keyed on (slide context, normalized question).
+
+    Lookups go memory tier -> exact row in tutor_answers -> (optionally) the most
+    similar question already answered on the same slide. Rows older than the TTL
+    are ignored and pruned; past max_rows the least recently used rows are evicted.
+    Hits only note their use in memory; hit counts and last-used times are
+    written with the next store or prune, so lookups never write.
+    """
+
+    def __init__(
+        self,
+        max_rows: int = 5000,
+        ttl_hours: float = 168,
+        semantic_threshold: float = 0.0,
+        memory_entries: int = 1024,
+        prune_every: int = 100,
+    ):
+        self.max_rows = max_rows
+        self.ttl = datetime.timedelta(hours=ttl_hours) if ttl_hours > 0 else None
+        self.semantic_threshold = semantic_threshold
+        self.prune_every = prune_every
+        self._memory = TTLLRUCache(max_entries=memory_entries, ttl_seconds=min(ttl_hours * 3600, 3600) or None)
+        self._encode: Optional[Callable[[List[str]], np.ndarray]] = None
+        self._lock = threading.Lock()
+        self._stores_since_prune = 0
+        # cache_key -> (hits, last used) not yet written to tutor_answers
+        self._pending_touches: Dict[str, Tuple[int, datetime.datetime]] = {}
+        self.counters = {"memory_hits": 0, "exact_hits": 0, "semantic_hits": 0, "misses": 0,
+                         "bypassed": 0, "stores": 0, "evicted": 0}
+
+    def configure_encoder(self, encode: Callable[[List[str]], np.ndarray]) -> None:
+        """Enable similarity matching (encode: texts -> L2-normalized float32 vectors)."""
+        self._encode = encode
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self._encode is not None and self.semantic_threshold > 0
+
+    @staticmethod
+    def make_key(ctx_hash: str, question: str) -> str:
+        return hashlib.sha256(f"{ctx_hash}\n{question}".encode("utf-8")).hexdigest()
+
+    def lookup_memory(self, ctx_hash: str, question: str) -> Optional[str]:
+        """Memory tier only — cheap enough to call on the event loop."""
+        answer = self._memory.get(self.make_key(ctx_hash, question))
+        if answer is not None:
+            self._count("memory_hits")
+        return answer
+
+    def lookup(self, db: Session, ctx_hash: str, question: str) -> Optional[str]:
+        """Database tier: exact match first, then the closest question on the same slide."""
+        key = self.make_key(ctx_hash, question)
+        row = db.query(TutorAnswer).filter(TutorAnswer.cache_key == key).first()
+        if row is not None and not self._expired(row):
+            self._touch(row)
+            self._memory.set(key, row.answer)
+            self._count("exact_hits")
+            return row.answer
+
+        if self.semantic_enabled:
+            row = self._closest(db, ctx_hash, question)
+            if row is not None:
+                self._touch(row)
+                self._memory.set(key, row.answer)
+                self._count("semantic_hits")
+                return row.answer
+
+        self._count("misses")
+        return None
+
+    def store(self, db: Session, ctx_hash: str, question: str, answer: str) -> None:
+        key = self.make_key(ctx_hash, question)
+        embedding = None
+        if self.semantic_enabled:
+            embedding = np.asarray(self._encode([question])[0], dtype="float32").tobytes()
+        now = datetime.datetime.utcnow()
+
+        row = db.query(TutorAnswer).filter(TutorAnswer.cache_key == key).first()
+        if row is None:
+            db.add(TutorAnswer(cache_key=key, context_hash=ctx_hash, question=question,
+                               question_embedding=embedding, answer=answer, created_at=now, last_used_at=now))
+        else:
+            row.answer = answer
+            row.question_embedding = embedding if embedding is not None else row.question_embedding
+            row.created_at = now
+            row.last_used_at = now
+        self._flush_touches(db)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # a concurrent request stored the same answer first
+        self._memory.set(key, answer)
+        self._count("stores")
+
+        with self._lock:
+            self._stores_since_prune += 1
+            due = self._stores_since_prune >= self.prune_every
+            if due:
+                self._stores_since_prune = 0
+        if due:
+            self.prune(db)
+
+    def prune(self, db: Session) -> int:
+        """Delete expired rows, then the least recently used rows beyond max_rows."""
+        self._flush_touches(db)
+        removed = 0
+        if self.ttl is not None:
+            cutoff = datetime.datetime.utcnow() - self.ttl
+            removed += db.query(TutorAnswer).filter(TutorAnswer.created_at < cutoff).delete(synchronize_session=False)
+        excess = db.query(TutorAnswer).count() - self.max_rows
+        if excess > 0:
+            stale_ids = [r[0] for r in db.query(TutorAnswer.id).order_by(TutorAnswer.last_used_at.asc()).limit(excess)]
+            removed += db.query(TutorAnswer).filter(TutorAnswer.id.in_(stale_ids)).delete(synchronize_session=False)
+        db.commit()
+        if removed:
+            self._count("evicted", removed)
+        return removed
+
+    def note_bypass(self) -> None:
+        self._count("bypassed")
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        hits = counters["memory_hits"] + counters["exact_hits"] + counters["semantic_hits"]
+        lookups = hits + counters["misses"]
+        counters["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        counters["semantic_enabled"] = self.semantic_enabled
+        counters["memory"] = self._memory.stats()
+        return counters
+
+    def _closest(self, db: Session, ctx_hash: str, question: str) -> Optional[TutorAnswer]:
+        rows = (
+            db.query(TutorAnswer)
+            .filter(TutorAnswer.context_hash == ctx_hash, TutorAnswer.question_embedding.isnot(None))
+            .all()
+        )
+        rows = [r for r in rows if not self._expired(r)]
+        if not rows:
+            return None
+        query = np.asarray(self._encode([question])[0], dtype="float32")
+        matrix = np.vstack([np.frombuffer(r.question_embedding, dtype="float32") for r in rows])
+        sims = matrix @ query
+        best = int(np.argmax(sims))
+        return rows[best] if sims[best] >= self.semantic_threshold else None
+
+    def _expired(self, row: TutorAnswer) -> bool:
+        return self.ttl is not None and row.created_at is not None and \
+            row.created_at < datetime.datetime.utcnow() - self.ttl
+
+    def _touch(self, row: TutorAnswer) -> None:
+        with self._lock:
+            hits, _ = self._pending_touches.get(row.cache_key, (0, None))
+            self._pending_touches[row.cache_key] = (hits + 1, datetime.datetime.utcnow())
+
+    def _flush_touches(self, db: Session) -> None:
+        """Add the pending hit counts and last-used times to db's transaction (the caller commits)."""
+        with self._lock:
+            pending, self._pending_touches = self._pending_touches, {}
+        for key, (hits, last_used) in pending.items():
+            db.query(TutorAnswer).filter(TutorAnswer.cache_key == key).update(
+                {TutorAnswer.hit_count: func.coalesce(TutorAnswer.hit_count, 0) + hits,
+                 TutorAnswer.last_used_at: last_used},
+                synchronize_session=False)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+
+tutor_cache = TutorAnswerCache(
+    max_rows=settings.TUTOR_CACHE_MAX_ROWS,
+    ttl_hours=settings.TUTOR_CACHE_TTL_HOURS,
+    semantic_threshold=settings.TUTOR_CACHE_SEMANTIC_THRESHOLD,
+)
+register_metrics("tutor_answer_cache", tutor_cache.stats)
@@ -0,0 +1,75 @@
+"""Shared pytest fixtures: a throwaway SQLite database per test, a clean lesson memory tier and a
+fake embedding model for the vector store."""
+import hashlib
+import sys
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import backend_app.models  # noqa: F401 (registers every table with Base)
+from backend_app.db.base import Base
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """SQLite engine on a fresh file under tmp_path with every table created."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+
+@pytest.fixture
+def db_session(session_factory):
+    db = session_factory()
+    yield db
+    db.close()
+
+
+@pytest.fixture(autouse=True)
+def clear_lesson_memory():
+    """Empty the process-wide lesson memory tier around every test that loaded it."""
+    lesson_service = sys.modules.get("backend_app.services.lesson_service")
+    if lesson_service is not None:
+        lesson_service._lesson_memory.clear()
+    yield
+    lesson_service = sys.modules.get("backend_app.services.lesson_service")
+    if lesson_service is not None:
+        lesson_service._lesson_memory.clear()
+
+
+FAKE_EMBEDDING_DIM = 16
+
+
+class FakeEncoder:
+    """Stands in for SentenceTransformer: a seeded random vector per text, so equal texts embed equally."""
+
+    def __init__(self, model_name):
+        pass
+
+    def get_sentence_embedding_dimension(self):
+        return FAKE_EMBEDDING_DIM
+
+    def encode(self, texts, convert_to_numpy=True, show_progress_bar=False, batch_size=32):
+        seeds = [int(hashlib.md5(t.encode("utf-8")).hexdigest()[:8], 16) for t in texts]
+        return np.asarray([np.random.default_rng(s).standard_normal(FAKE_EMBEDDING_DIM) for s in seeds],
+                          dtype="float32")
+
+
+@pytest.fixture
+def fake_vector_model(tmp_path, monkeypatch):
+    """Swap in FakeEncoder and point the default index files at an empty tmp_path; returns tmp_path."""
+    from backend_app.rag import vector_service
+
+    monkeypatch.setattr(vector_service, "SentenceTransformer", FakeEncoder)
+    monkeypatch.setattr(vector_service, "DEFAULT_INDEX_PATH", str(tmp_path / "index.bin"))
+    monkeypatch.setattr(vector_service, "DEFAULT_ENTRIES_PATH", str(tmp_path / "chunks.bin"))
+    monkeypatch.setattr(vector_service, "LEGACY_ENTRIES_PATH", str(tmp_path / "entries.json"))
+    return tmp_path
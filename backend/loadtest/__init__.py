@@ -0,0 +1,13 @@
+"""Load-test harness for the FastAPI backend.
+
+Drives a weighted mix of scenarios (lesson cache hits and misses, attention-log
+floods, analytics reads, tutor questions, login storms) either in-process
+through an ASGI transport or against a local uvicorn server, with the LLM
+replaced by the deterministic stub provider. Per-route p50/p95/p99 latency and
+throughput are written as JSON so runs can be compared before and after a change.
+
+  cd backend
+  python -m loadtest run --duration 30 --concurrency 16 --out loadtest/results/baseline.json
+  python -m loadtest run --spawn-server --duration 30 --out loadtest/results/uvicorn.json
+  python -m loadtest compare loadtest/results/baseline.json loadtest/results/after.json
+"""
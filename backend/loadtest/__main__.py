@@ -0,0 +1,233 @@
+"""CLI: `python -m loadtest run ...`, `python -m loadtest compare BEFORE AFTER` and `python -m loadtest startup`."""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from loadtest.scenarios import DEFAULT_MIX, SCENARIOS, describe, parse_mix, setup
+from loadtest.startup import measure as measure_startup
+from loadtest.stats import compare, summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def drive(client: httpx.AsyncClient, state, mix: Dict[str, float], duration: float, concurrency: int,
+                max_requests: Optional[int], seed: int) -> Dict[str, Any]:
+    """Closed-loop load: `concurrency` workers issue requests back to back until time or count runs out."""
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    latencies: Dict[str, List[float]] = {n: [] for n in names}
+    errors: Dict[str, int] = {n: 0 for n in names}
+    status_codes: Dict[str, int] = {}
+    issued = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        nonlocal issued
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+            issued += 1
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                resp = await SCENARIOS[name](client, state, rng)
+                code = str(resp.status_code)
+                failed = resp.status_code >= 400
+            except httpx.HTTPError as e:
+                code = type(e).__name__
+                failed = True
+            latencies[name].append(time.perf_counter() - started)
+            errors[name] += failed
+            status_codes[code] = status_codes.get(code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    routes = {n: summarize(latencies[n], errors[n], elapsed) for n in names if latencies[n]}
+    overall = summarize([v for n in names for v in latencies[n]], sum(errors.values()), elapsed)
+    return {"elapsed_seconds": round(elapsed, 2), "routes": routes, "overall": overall, "status_codes": status_codes}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def in_process_client(timeout: float):
+    """Import the app with the current environment and drive it through an ASGI transport."""
+    sys.path.insert(0, BACKEND_DIR)
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            yield client
+
+
+@contextlib.asynccontextmanager
+async def spawned_server_client(timeout: float, workers: int):
+    """Start `uvicorn main:app` on a free local port and wait until it answers."""
+    port = _free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    server = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=dict(os.environ))
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=timeout,
+                                     limits=httpx.Limits(max_connections=None)) as client:
+            ready_by = time.perf_counter() + 180
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+                with contextlib.suppress(httpx.HTTPError):
+                    if (await client.get("/")).status_code == 200:
+                        break
+                if time.perf_counter() > ready_by:
+                    raise RuntimeError("uvicorn did not become ready in time")
+                await asyncio.sleep(0.5)
+            yield client
+    finally:
+        server.terminate()
+        with contextlib.suppress(subprocess.TimeoutExpired):
+            server.wait(timeout=10)
+
+
+@contextlib.asynccontextmanager
+async def remote_client(base_url: str, timeout: float):
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout,
+                                 limits=httpx.Limits(max_connections=None)) as client:
+        yield client
+
+
+def _git_commit() -> Optional[str]:
+    with contextlib.suppress(Exception):
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    return None
+
+
+async def run(args) -> Dict[str, Any]:
+    mix = parse_mix(args.mix) if args.mix else dict(DEFAULT_MIX)
+    if args.base_url:
+        mode, client_cm = "remote", remote_client(args.base_url, args.timeout)
+    elif args.spawn_server:
+        mode, client_cm = "uvicorn", spawned_server_client(args.timeout, args.workers)
+    else:
+        mode, client_cm = "in-process", in_process_client(args.timeout)
+
+    async with client_cm as client:
+        print(f"Setting up ({mode})...")
+        state = await setup(client, users=args.users)
+        print(f"Running {args.duration:.0f}s at concurrency {args.concurrency}: {describe(mix)}")
+        result = await drive(client, state, mix, args.duration, args.concurrency, args.max_requests, args.seed)
+
+    result["meta"] = {
+        "started_at": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "git_commit": _git_commit(),
+        "mode": mode,
+        "duration_seconds": args.duration,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "mix": describe(mix),
+        "llm_provider": os.environ.get("LLM_PROVIDER"),
+        "llm_stub_latency_ms": os.environ.get("LLM_STUB_LATENCY_MS"),
+        "llm_stub_tokens_per_second": os.environ.get("LLM_STUB_TOKENS_PER_SECOND"),
+    }
+    return result
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    header = f"{'route':<16}{'reqs':>7}{'errs':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, row in list(result["routes"].items()) + [("overall", result["overall"])]:
+        print(f"{name:<16}{row['requests']:>7}{row['errors']:>6}{row['throughput_rps']:>9}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+    print(f"status codes: {result['status_codes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="Backend load-test harness")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run a load test and save the results as JSON")
+    target = run_parser.add_mutually_exclusive_group()
+    target.add_argument("--spawn-server", action="store_true", help="Start a local uvicorn instead of in-process")
+    target.add_argument("--base-url", help="Target an already running server (its own LLM settings apply)")
+    run_parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --spawn-server")
+    run_parser.add_argument("--duration", type=float, default=30, help="Seconds of load after setup")
+    run_parser.add_argument("--concurrency", type=int, default=16, help="Concurrent virtual users")
+    run_parser.add_argument("--max-requests", type=int, help="Stop after this many requests")
+    run_parser.add_argument("--mix", help="Scenario weights, e.g. lesson_hit=50,attention_log=30,login=20")
+    run_parser.add_argument("--users", type=int, default=8, help="Registered test users")
+    run_parser.add_argument("--seed", type=int, default=1, help="Random seed for the request mix")
+    run_parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout (s)")
+    run_parser.add_argument("--llm-latency-ms", type=float, default=300, help="Stub LLM first-token latency")
+    run_parser.add_argument("--llm-tokens-per-second", type=float, default=400, help="Stub LLM token rate")
+    run_parser.add_argument("--database-url", help="Database to use (default: a fresh temporary SQLite file)")
+    run_parser.add_argument("--out", help="Write the JSON report here")
+
+    compare_parser = commands.add_parser("compare", help="Show per-route changes between two saved runs")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+
+    startup_parser = commands.add_parser("startup", help="Measure import time and time until live/ready")
+    startup_parser.add_argument("--runs", type=int, default=3, help="Repetitions (the median is reported)")
+    startup_parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    startup_parser.add_argument("--imports-only", action="store_true", help="Skip spawning uvicorn")
+    startup_parser.add_argument("--database-url", help="Database to use (default: a fresh temporary SQLite file)")
+    startup_parser.add_argument("--out", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.before, "r", encoding="utf-8") as f:
+            before = json.load(f)
+        with open(args.after, "r", encoding="utf-8") as f:
+            after = json.load(f)
+        print(json.dumps(compare(before, after), indent=2))
+        return
+
+    if args.command == "startup" or not args.base_url:
+        # Settings are read at import time, so configure the app before main is imported (or spawned)
+        os.environ.setdefault("LLM_PROVIDER", "stub")
+        if args.command == "run":
+            os.environ["LLM_STUB_LATENCY_MS"] = str(args.llm_latency_ms)
+            os.environ["LLM_STUB_TOKENS_PER_SECOND"] = str(args.llm_tokens_per_second)
+        os.environ.setdefault("GROQ_API_KEY", "loadtest")
+        db_dir = tempfile.mkdtemp(prefix="loadtest-")
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(db_dir, 'loadtest.db')}"
+
+    if args.command == "startup":
+        result = measure_startup(args.runs, args.top, serve=not args.imports_only)
+        result["meta"] = {
+            "started_at": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_commit": _git_commit(),
+            "runs": args.runs,
+        }
+        print(json.dumps({k: v for k, v in result.items() if k != "meta"}, indent=2))
+    else:
+        result = asyncio.run(run(args))
+        print_report(result)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Request scenarios for the load-test mix.
+
+Each scenario is an async callable (client, state, rng) -> httpx.Response and
+is reported under its own name. setup() registers users, logs them in and
+warms the caches so "hit" scenarios really hit.
+"""
+import random
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+CHAPTER_ID = "chapter_2"
+PASSWORD = "loadtest-password"
+HIT_TOPICS = ["zeroes of a polynomial", "cubic polynomials", "division algorithm",
+              "relationship between zeroes and coefficients", "graph of a quadratic"]
+TUTOR_CONTEXTS = [
+    {"title": "Zeroes of a polynomial", "bullets": ["p(k) = 0 means k is a zero"], "formula": "p(x)", "narration": ""},
+    {"title": "Division algorithm", "bullets": ["p(x) = g(x)q(x) + r(x)"], "formula": "", "narration": ""},
+]
+TUTOR_QUESTIONS = ["What is a zero?", "Can you give an example?", "Why does this work?",
+                   "How do I find the remainder?", "What does the formula mean?"]
+
+
+class LoadState:
+    """Data shared by all workers once setup() has run."""
+
+    def __init__(self, emails: List[str], tokens: List[str], lesson_ids: List[str]):
+        self.emails = emails
+        self.tokens = tokens
+        self.lesson_ids = lesson_ids
+
+    def auth(self, rng: random.Random) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {rng.choice(self.tokens)}"}
+
+
+async def lesson_hit(client: httpx.AsyncClient, state: LoadState, rng: random.Random) -> httpx.Response:
+    return await client.get(f"/lessons/{CHAPTER_ID}/generate", params={"topic": rng.choice(HIT_TOPICS)},
+                            headers=state.auth(rng))
+
+
+async def lesson_miss(client: httpx.AsyncClient, state: LoadState, rng: random.Random) -> httpx.Response:
+    topic = f"loadtest topic {uuid.UUID(int=rng.getrandbits(128)).hex[:12]}"
+    return await client.get(f"/lessons/{CHAPTER_ID}/generate", params={"topic": topic}, headers=state.auth(rng))
+
+
+async def attention_log(client: httpx.AsyncClient, state: LoadState, rng: random.Random) -> httpx.Response:
+    payload = {"lesson_id": rng.choice(state.lesson_ids), "attention_score": rng.choice([0.0, 1.0, 1.0, 1.0])}
+    return await client.post("/lessons/attention-log", json=payload, headers=state.auth(rng))
+
+
+async def analytics_read(client: httpx.AsyncClient, state: LoadState, rng: random.Random) -> httpx.Response:
+    return await client.get(f"/analytics/lesson/{rng.choice(state.lesson_ids)}")
+
+
+async def tutor_ask(client: httpx.AsyncClient, state: LoadState, rng: random.Random) -> httpx.Response:
+    payload = {"question": rng.choice(TUTOR_QUESTIONS), "context": rng.choice(TUTOR_CONTEXTS)}
+    return await client.post("/ai/ask", json=payload)
+
+
+async def login(client: httpx.AsyncClient, state: LoadState, rng: random.Random) -> httpx.Response:
+    return await client.post("/users/login", data={"username": rng.choice(state.emails), "password": PASSWORD})
+
+
+Scenario = Callable[[httpx.AsyncClient, LoadState, random.Random], Awaitable[httpx.Response]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "lesson_hit": lesson_hit,
+    "lesson_miss": lesson_miss,
+    "attention_log": attention_log,
+    "analytics_read": analytics_read,
+    "tutor_ask": tutor_ask,
+    "login": login,
+}
+
+# Relative weights of the default mix
+DEFAULT_MIX: Dict[str, float] = {
+    "lesson_hit": 35,
+    "lesson_miss": 5,
+    "attention_log": 25,
+    "analytics_read": 15,
+    "tutor_ask": 15,
+    "login": 5,
+}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse "lesson_hit=50,login=10" into weights, rejecting unknown scenario names."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def setup(client: httpx.AsyncClient, users: int = 8, lessons: int = 10, seed_logs: int = 20) -> LoadState:
+    """Create users and tokens, warm the lesson and tutor caches, and seed attention logs."""
+    emails = [f"loadtest-{i}@example.com" for i in range(users)]
+    tokens = []
+    for email in emails:
+        await client.post("/users/register", json={"email": email, "password": PASSWORD, "full_name": "Load Test"})
+        resp = await client.post("/users/login", data={"username": email, "password": PASSWORD})
+        resp.raise_for_status()
+        tokens.append(resp.json()["access_token"])
+
+    state = LoadState(emails, tokens, lesson_ids=[f"loadtest-lesson-{i}" for i in range(lessons)])
+    rng = random.Random(0)
+    for topic in HIT_TOPICS:
+        resp = await client.get(f"/lessons/{CHAPTER_ID}/generate", params={"topic": topic}, headers=state.auth(rng))
+        resp.raise_for_status()
+    for context in TUTOR_CONTEXTS:
+        for question in TUTOR_QUESTIONS:
+            await client.post("/ai/ask", json={"question": question, "context": context})
+    for lesson_id in state.lesson_ids:
+        for i in range(seed_logs):
+            await client.post("/lessons/attention-log",
+                              json={"lesson_id": lesson_id, "attention_score": float(i % 4 != 0)})
+    return state
+
+
+def describe(mix: Dict[str, Any]) -> Dict[str, Any]:
+    total = sum(mix.values())
+    return {name: round(weight / total, 3) for name, weight in mix.items()}
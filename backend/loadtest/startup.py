@@ -0,0 +1,110 @@
+"""Startup cost of the app, to track across releases.
+
+- import: `python -X importtime -c "import main"` in a fresh interpreter; total
+  import time of main and the modules with the largest self time.
+- serve: spawn `uvicorn main:app` and time (from spawn) until /health/live and
+  /health/ready first answer 200, plus the app's own "startup" metrics.
+
+Each is repeated and reported as the median over the runs.
+"""
+import asyncio
+import contextlib
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of `-X importtime` output as {module, depth, self_ms, cumulative_ms}."""
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append({
+                "module": module,
+                "depth": len(indent) // 2,
+                "self_ms": int(self_us) / 1000.0,
+                "cumulative_ms": int(cumulative_us) / 1000.0,
+            })
+    return rows
+
+
+def import_profile(top: int = 10) -> Dict[str, Any]:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR,
+                          env=dict(os.environ), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    main_row = next(row for row in rows if row["module"] == "main" and row["depth"] == 0)
+    slowest = sorted(rows, key=lambda row: -row["self_ms"])[:top]
+    return {
+        "import_main_ms": round(main_row["cumulative_ms"], 1),
+        "slowest_modules": [{"module": row["module"], "self_ms": round(row["self_ms"], 1)} for row in slowest],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def serve_timeline(timeout: float = 300) -> Dict[str, Any]:
+    """Seconds from spawning uvicorn until it is live and until it is ready."""
+    port = _free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--log-level", "warning"]
+    started = time.perf_counter()
+    server = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=dict(os.environ))
+    live: Optional[float] = None
+    ready: Optional[float] = None
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=5) as client:
+            while ready is None:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError("server did not become ready in time")
+                with contextlib.suppress(httpx.HTTPError):
+                    if live is None and (await client.get("/health/live")).status_code == 200:
+                        live = time.perf_counter() - started
+                    if live is not None:
+                        resp = await client.get("/health/ready")
+                        if resp.status_code == 200:
+                            ready = time.perf_counter() - started
+                        elif resp.json().get("status") == "failed":
+                            raise RuntimeError(f"warm-up failed: {resp.json()['components']}")
+                await asyncio.sleep(0.05)
+            app_metrics = (await client.get("/metrics")).json().get("startup", {})
+    finally:
+        server.terminate()
+        with contextlib.suppress(subprocess.TimeoutExpired):
+            server.wait(timeout=10)
+    return {"live_seconds": round(live, 3), "ready_seconds": round(ready, 3), "app": app_metrics}
+
+
+def measure(runs: int = 3, top: int = 10, serve: bool = True) -> Dict[str, Any]:
+    imports = [import_profile(top) for _ in range(runs)]
+    by_import = sorted(imports, key=lambda profile: profile["import_main_ms"])
+    result: Dict[str, Any] = {
+        "import": {**by_import[len(by_import) // 2], "runs_ms": [p["import_main_ms"] for p in imports]},
+    }
+    if serve:
+        timelines = [asyncio.run(serve_timeline()) for _ in range(runs)]
+        result["serve"] = {
+            "live_seconds": round(statistics.median(t["live_seconds"] for t in timelines), 3),
+            "ready_seconds": round(statistics.median(t["ready_seconds"] for t in timelines), 3),
+            "runs": timelines,
+        }
+    return result
@@ -0,0 +1,44 @@
+"""Latency aggregation for load-test results."""
+import math
+from typing import Any, Dict, List
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Count, error count, throughput and latency percentiles (milliseconds) for one route."""
+    values = sorted(latencies)
+    to_ms = lambda seconds: round(seconds * 1000.0, 2)  # noqa: E731
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": to_ms(sum(values) / len(values)) if values else 0.0,
+        "p50_ms": to_ms(percentile(values, 50)),
+        "p95_ms": to_ms(percentile(values, 95)),
+        "p99_ms": to_ms(percentile(values, 99)),
+        "max_ms": to_ms(values[-1]) if values else 0.0,
+    }
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Per-route deltas between two saved runs (after - before; negative latency is better)."""
+    rows = []
+    for route in sorted(set(before["routes"]) | set(after["routes"])):
+        old, new = before["routes"].get(route), after["routes"].get(route)
+        row = {"route": route}
+        for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            if old is None or new is None:
+                row[metric] = None
+                continue
+            change = new[metric] - old[metric]
+            row[metric] = {"before": old[metric], "after": new[metric],
+                           "change_pct": round(change / old[metric] * 100, 1) if old[metric] else None}
+        rows.append(row)
+    return rows
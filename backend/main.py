@@ -1,6 +1,13 @@
+import time
+from contextlib import asynccontextmanager
+
+# Imported first: its clock is the reference for import_seconds and ready_after_seconds
+from backend_app.core.startup import readiness, record_timing, seconds_since_import, warm_in_background
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from sqlalchemy import text
 
 # Import DB Base and engine for initialization on startup
 from backend_app.db.base import Base
@@ -13,10 +20,42 @@ from backend_app.api.lesson import router as lesson_router
 from backend_app.api.attention import router as attention_router
 from backend_app.api.analytics import router as analytics_router
 from backend_app.api.ai_tutor import router as ai_tutor_router
+from backend_app.api.admin import router as admin_router
 from backend_app.core.config import settings
+from backend_app.core.metrics import collect_metrics
+from backend_app.ai.llm_service import close_client as close_llm_client
+from backend_app.services.chapter_content_migration import ensure_chapter_content_schema
+from backend_app.services.lesson_storage_migration import ensure_lesson_storage_schema
+from backend_app.rag.context_packer import load_encoding
+from backend_app.rag.vector_service import start_snapshot_watcher, stop_snapshot_watcher, warm_vector_manager
+
+record_timing("import_seconds", seconds_since_import())
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create database tables, start warming the vector store and token encoding and watching for
+    new index snapshots, and release LLM connections on shutdown."""
+    started = time.perf_counter()
+    Base.metadata.create_all(bind=engine)
+    ensure_lesson_storage_schema(engine)
+    ensure_chapter_content_schema(engine)
+    print("Database connected")
+    # The embedding model and index take seconds to load: serve (and answer /health/live) meanwhile
+    if settings.VECTOR_WARM_ON_STARTUP:
+        warm_in_background("vector_store", warm_vector_manager)
+    # Lesson prompts are packed to a token budget; the BPE file may need a download
+    warm_in_background("token_encoding", load_encoding)
+    # Newly ingested content is served without restarting workers
+    if settings.VECTOR_RELOAD_POLL_SECONDS > 0:
+        start_snapshot_watcher(settings.VECTOR_RELOAD_POLL_SECONDS)
+    record_timing("startup_seconds", time.perf_counter() - started)
+    yield
+    stop_snapshot_watcher()
+    await close_llm_client()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS - allow all origins for now (MVP)
 app.add_middleware(
@@ -27,19 +66,13 @@ app.add_middleware(
 )
 
 
-@app.on_event("startup")
-async def on_startup():
-    """Create database tables (if they don't exist) and print status."""
-    Base.metadata.create_all(bind=engine)
-    print("Database connected")
-
-
 app.include_router(user_router)
 app.include_router(subject_router)
 app.include_router(lesson_router, prefix="/lessons", tags=["Lessons"])
 app.include_router(attention_router, prefix="/lessons", tags=["Lessons"])
 app.include_router(analytics_router, prefix="/analytics", tags=["Analytics"])
 app.include_router(ai_tutor_router, prefix="/ai", tags=["AI Tutor"])
+app.include_router(admin_router)
 
 
 @app.get("/", response_class=JSONResponse)
@@ -48,6 +81,45 @@ async def root():
     return {"message": "Backend running"}
 
 
+@app.get("/health/live", response_class=JSONResponse)
+async def health_live():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "alive"}
+
+
+def _database_reachable() -> bool:
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        return False
+
+
+@app.get("/health/ready", response_class=JSONResponse)
+async def health_ready():
+    """Readiness: 200 once the database answers and background warm-ups have finished, else 503."""
+    warmed, components = readiness()
+    database = await run_in_threadpool(_database_reachable)
+    ready = warmed and database
+    if ready:
+        status = "ready"
+    elif any(c["state"] == "failed" for c in components.values()):
+        status = "failed"
+    else:
+        status = "starting"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": status, "database": database, "components": components},
+    )
+
+
+@app.get("/metrics", response_class=JSONResponse)
+async def metrics():
+    """In-process cache and service counters for this worker."""
+    return collect_metrics()
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,89 @@
+"""
+Tests for directory/manifest ingestion with a process pool and bulk writes.
+
+Run: cd backend && python -m pytest -q test_bulk_ingest.py
+"""
+import json
+
+import fitz
+import pytest
+
+from backend_app.models.chapter_content import ChapterContent
+from backend_app.rag import ingest_ncert, vector_service
+
+
+def write_pdf(path, chapter, pages):
+    doc = fitz.open()
+    for p in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800),
+                            " ".join(f"Chapter {chapter} page {p} sentence {i} about polynomials." for i in range(25)))
+    doc.save(str(path))
+    doc.close()
+
+
+@pytest.fixture
+def workspace(fake_vector_model, monkeypatch, db_engine, session_factory):
+    tmp_path = fake_vector_model
+    # The remaining relative default paths (the embedding cache, ...) resolve inside tmp_path too
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ingest_ncert, "engine", db_engine)
+    monkeypatch.setattr(ingest_ncert, "SessionLocal", session_factory)
+    pdfs = tmp_path / "pdfs"
+    pdfs.mkdir()
+    write_pdf(pdfs / "1.pdf", 1, 3)
+    write_pdf(pdfs / "2.pdf", 2, 4)
+    return tmp_path, ingest_ncert.SessionLocal
+
+
+def test_directory_ingest_in_parallel_and_again_is_a_no_op(workspace):
+    tmp_path, session_factory = workspace
+    jobs = ingest_ncert.jobs_from_directory(str(tmp_path / "pdfs"))
+    assert [job["chapter_id"] for job in jobs] == ["1", "2"]
+
+    totals = ingest_ncert.ingest_many(jobs, workers=2, batch_size=64)
+    assert (totals["pdfs"], totals["pages"]) == (2, 7)
+    assert totals["encoded"] == totals["chunks"] == totals["rows_inserted"] > 0
+    assert totals["pages_per_second"] > 0 and totals["chunks_per_second"] > 0
+
+    again = ingest_ncert.ingest_many(jobs, workers=2)
+    assert again["encoded"] == again["rows_inserted"] == 0
+
+    manager = vector_service.VectorStoreManager()
+    assert manager.index.ntotal == totals["chunks"]
+    assert manager.chapter_ids() == ["1", "2"]
+    db = session_factory()
+    assert db.query(ChapterContent).count() == totals["chunks"]
+    db.close()
+
+
+def test_manifest_paths_are_relative_to_it(workspace):
+    tmp_path, _ = workspace
+    manifest = tmp_path / "pdfs" / "grade10.json"
+    manifest.write_text(json.dumps([{"path": "2.pdf", "chapter_id": 2, "start": 2, "end": 3}]))
+    jobs = ingest_ncert.load_manifest(str(manifest))
+    assert jobs == [{"path": str(tmp_path / "pdfs" / "2.pdf"), "chapter_id": "2", "start": 2, "end": 3}]
+    assert ingest_ncert.ingest_many(jobs)["pages"] == 2
+
+
+def test_replace_with_several_pdfs_of_one_chapter_keeps_them_all(workspace):
+    tmp_path, session_factory = workspace
+    jobs = [{"path": str(tmp_path / "pdfs" / "1.pdf"), "chapter_id": "2"},
+            {"path": str(tmp_path / "pdfs" / "2.pdf"), "chapter_id": "chapter_2"}]
+    first = ingest_ncert.ingest_many(jobs[:1])
+    totals = ingest_ncert.ingest_many(jobs, workers=2, replace=True)
+
+    manager = vector_service.VectorStoreManager()
+    assert manager.index.ntotal == totals["chunks"] > first["chunks"]
+    db = session_factory()
+    assert db.query(ChapterContent).count() == totals["chunks"]
+    db.close()
+
+
+def test_cli_with_no_pdfs_publishes_nothing(workspace, monkeypatch, capsys):
+    tmp_path, _ = workspace
+    (tmp_path / "empty").mkdir()
+    monkeypatch.setattr("sys.argv", ["ingest_ncert", "--dir", str(tmp_path / "empty")])
+    ingest_ncert.main()
+    assert "No PDFs to ingest" in capsys.readouterr().out
+    assert not (tmp_path / "backend").exists()
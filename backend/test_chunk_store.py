@@ -0,0 +1,62 @@
+"""
+Tests for the memory-mapped chunk store and mmap loading of the FAISS index.
+
+Run: cd backend && python -m pytest -q test_chunk_store.py
+"""
+import json
+
+import pytest
+
+from backend_app.rag import vector_service
+from backend_app.rag.chunk_store import ChunkStore, load_entries
+
+ENTRIES = [{"text": f"chunk {i} — x² + {i}", "metadata": {"chapter_id": str(i % 2), "chunk_index": i}}
+           for i in range(6)]
+
+
+def test_store_round_trip_and_append(tmp_path):
+    path = str(tmp_path / "chunks.bin")
+    ChunkStore(ENTRIES[:4], meta={"partitions": {"0": [[0, 1]]}}).save(path)
+
+    store = ChunkStore.open(path)
+    assert len(store) == 4
+    assert store[3] == ENTRIES[3]
+    assert store[-1] == ENTRIES[3]
+    assert store.meta == {"partitions": {"0": [[0, 1]]}}
+    with pytest.raises(IndexError):
+        store[4]
+
+    # New entries live in memory until saved; mapped records are copied as-is
+    store.append(ENTRIES[4])
+    store.append(ENTRIES[5])
+    store.save(path)
+    assert list(ChunkStore.open(path)) == ENTRIES
+
+
+def test_legacy_json_entries_are_still_readable(tmp_path):
+    path = tmp_path / "faiss_entries.json"
+    path.write_text(json.dumps(ENTRIES), encoding="utf-8")
+    store = load_entries(str(path))
+    assert store.mapped_count == 0
+    assert list(store) == ENTRIES
+
+
+def test_mapped_index_serves_searches_and_grows_after_a_copy(fake_vector_model):
+    index_path, entries_path = vector_service.DEFAULT_INDEX_PATH, vector_service.DEFAULT_ENTRIES_PATH
+
+    writer = vector_service.VectorStoreManager(mmap=False)
+    writer.add_documents([e["text"] for e in ENTRIES[:4]], [e["metadata"] for e in ENTRIES[:4]])
+    writer.save_index(index_path, entries_path)
+
+    reader = vector_service.VectorStoreManager(mmap=True)
+    assert reader._index_mapped
+    assert reader.entries.mapped_count == 4
+    assert reader.partitions == {"0": [(0, 1), (2, 3)], "1": [(1, 2), (3, 4)]}
+    assert reader.search(ENTRIES[2]["text"], top_k=1, chapter_id="chapter_0")[0]["text"] == ENTRIES[2]["text"]
+
+    reader.add_documents([e["text"] for e in ENTRIES[4:]], [e["metadata"] for e in ENTRIES[4:]])
+    assert not reader._index_mapped
+    reader.save_index(index_path, entries_path)
+    reloaded = vector_service.VectorStoreManager(mmap=True)
+    assert list(reloaded.entries) == ENTRIES
+    assert reloaded.search(ENTRIES[5]["text"], top_k=1)[0]["text"] == ENTRIES[5]["text"]
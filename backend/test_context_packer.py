@@ -0,0 +1,57 @@
+"""
+Tests for token-budgeted packing of retrieved chunks into the lesson prompt.
+
+Run: cd backend && python -m pytest -q test_context_packer.py
+"""
+from backend_app.rag import context_packer
+from backend_app.rag.context_packer import count_tokens, merge_adjacent_chunks, pack_context
+
+OVERLAP = "shared overlap text. "
+
+
+def chunk(index, body, score, chapter="2"):
+    # Mimic the splitter: each chunk starts with the tail of the previous one
+    text = (OVERLAP if index else "") + f"Chunk {index}: {body} " + OVERLAP
+    return {"text": text.strip(), "metadata": {"chapter_id": chapter, "chunk_index": index}, "score": score}
+
+
+def test_adjacent_chunks_merge_without_repeating_overlap():
+    merged = merge_adjacent_chunks([chunk(1, "beta", 0.5), chunk(0, "alpha", 0.9), chunk(3, "delta", 0.7)])
+    first = merged[0]
+    assert (first["metadata"]["chunk_start"], first["metadata"]["chunk_end"]) == (0, 1)
+    assert first["text"].count(OVERLAP.strip()) == 2  # once between the chunks, once at the tail
+    assert first["score"] == 0.9 and len(first["parts"]) == 2
+    assert merged[1]["metadata"]["chunk_start"] == 3
+
+
+def test_pack_respects_budget_and_document_order():
+    results = [chunk(i, "word " * 40, score) for i, score in enumerate([0.2, 0.9, 0.1, 0.8, 0.3])]
+    one_chunk = count_tokens(results[1]["text"])
+    packed = pack_context(results, token_budget=one_chunk * 2 + 5)
+
+    assert packed["tokens"] <= packed["budget"]
+    assert packed["chunks_used"] == 2 and packed["chunks_total"] == 5
+    # The two best chunks are kept whole, in source order
+    assert packed["text"].index("Chunk 1:") < packed["text"].index("Chunk 3:")
+    assert "Chunk 0:" not in packed["text"] and "Chunk 4:" not in packed["text"]
+
+
+def test_pack_trims_best_chunk_when_nothing_fits():
+    results = [{"text": "line one is here\nline two is here\nline three", "metadata": {}, "score": 1.0}]
+    packed = pack_context(results, token_budget=count_tokens("line one is here"))
+    assert packed["text"] == "line one is here"
+    assert pack_context([], token_budget=10)["text"] == ""
+
+
+def test_trim_counts_each_line_once(monkeypatch):
+    calls = []
+
+    def counting(text):
+        calls.append(text)
+        return count_tokens(text)
+
+    monkeypatch.setattr(context_packer, "count_tokens", counting)
+    text = "\n".join(f"line {i} of a long passage" for i in range(200))
+    trimmed = context_packer._trim_to_budget(text, budget=count_tokens("line 0 of a long passage") * 3)
+    assert trimmed.split("\n") == text.split("\n")[:3]
+    assert len(calls) <= 201
@@ -0,0 +1,76 @@
+"""
+Tests for the selectable embedding backends and their benchmark's agreement measure.
+
+Run: cd backend && python -m pytest -q test_embedding_backends.py
+"""
+import numpy as np
+import pytest
+
+from backend_app.rag import vector_service
+from backend_app.rag.chunk_embeddings import ChunkEmbeddingCache
+from backend_app.rag.embedding_backend_benchmark import agreement
+from backend_app.rag.embedding_backends import load_embedding_model
+
+DIM = 8
+
+
+class RecordingModel:
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+        self.kwargs = kwargs
+
+    def get_sentence_embedding_dimension(self):
+        return DIM
+
+    def encode(self, texts, convert_to_numpy=True, show_progress_bar=False):
+        return np.ones((len(texts), DIM), dtype="float32")
+
+
+def test_backends_load_the_same_model_differently():
+    assert load_embedding_model(RecordingModel, "m", "torch").kwargs == {}
+    assert load_embedding_model(RecordingModel, "m", "onnx").kwargs == {"backend": "onnx"}
+    onnx_int8 = load_embedding_model(RecordingModel, "m", "onnx_int8", onnx_file="onnx/model_qint8_arm64.onnx")
+    assert onnx_int8.kwargs == {"backend": "onnx", "model_kwargs": {"file_name": "onnx/model_qint8_arm64.onnx"}}
+    with pytest.raises(ValueError):
+        load_embedding_model(RecordingModel, "m", "fp16")
+
+
+def test_index_rejects_queries_from_another_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_service, "SentenceTransformer", RecordingModel)
+    built = vector_service.VectorStoreManager(model_name="model-a")
+    built.add_documents(["a", "b"], [{"chapter_id": "1"}, {"chapter_id": "1"}])
+    built.save_index(str(tmp_path / "i.bin"), str(tmp_path / "e.chunks"))
+
+    # Same model on another backend is fine; a different model is not
+    vector_service.VectorStoreManager(model_name="model-a", embedding_backend="onnx").load_index(
+        str(tmp_path / "i.bin"), str(tmp_path / "e.chunks"))
+    with pytest.raises(ValueError, match="model-a"):
+        vector_service.VectorStoreManager(model_name="model-b").load_index(
+            str(tmp_path / "i.bin"), str(tmp_path / "e.chunks"))
+
+
+def test_short_and_hub_model_names_match(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_service, "SentenceTransformer", RecordingModel)
+    built = vector_service.VectorStoreManager(model_name="all-MiniLM-L6-v2")
+    built.add_documents(["a", "b"], [{"chapter_id": "1"}, {"chapter_id": "1"}])
+    built.save_index(str(tmp_path / "i.bin"), str(tmp_path / "e.chunks"))
+    vector_service.VectorStoreManager(model_name="sentence-transformers/all-MiniLM-L6-v2").load_index(
+        str(tmp_path / "i.bin"), str(tmp_path / "e.chunks"))
+
+    ChunkEmbeddingCache("all-MiniLM-L6-v2", {"h": np.ones(4, dtype="float32")}).save(str(tmp_path / "c.npz"))
+    assert "h" in ChunkEmbeddingCache.load(str(tmp_path / "c.npz"), "sentence-transformers/all-MiniLM-L6-v2")
+
+
+def test_agreement_measures_top_k_overlap_with_reference():
+    rng = np.random.default_rng(0)
+    corpus = rng.standard_normal((200, 16)).astype("float32")
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = corpus[:20] + 0.05 * rng.standard_normal((20, 16)).astype("float32")
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    reference = {"corpus": corpus, "queries": queries}
+
+    assert agreement(reference, reference, k=5) == {"top5_overlap": 1.0, "top1_agreement": 1.0,
+                                                    "mean_query_cosine": pytest.approx(1.0, abs=1e-5)}
+    noisy = queries + 0.5 * rng.standard_normal(queries.shape).astype("float32")
+    noisy /= np.linalg.norm(noisy, axis=1, keepdims=True)
+    assert agreement(reference, {"queries": noisy}, k=5)["top5_overlap"] < 1.0
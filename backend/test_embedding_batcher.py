@@ -0,0 +1,88 @@
+"""
+Tests for micro-batching of concurrent embedding requests.
+
+Run: cd backend && python -m pytest -q test_embedding_batcher.py
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from backend_app.rag.embedding_batcher import EmbeddingBatcher
+
+
+class SlowEncoder:
+    """Vectors encode the text's number, so callers can check they got their own rows."""
+
+    def __init__(self, seconds=0.01):
+        self.seconds = seconds
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+            time.sleep(self.seconds)
+        return np.asarray([[float(t.split()[-1]), 1.0] for t in texts], dtype="float32")
+
+
+def test_concurrent_requests_share_batches_and_get_their_own_rows():
+    encoder = SlowEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=16, max_wait_ms=5)
+    try:
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            results = list(pool.map(lambda i: batcher.encode([f"query {i}", f"query {i + 1000}"]), range(64)))
+    finally:
+        batcher.close()
+
+    for i, vectors in enumerate(results):
+        assert vectors[:, 0].tolist() == [i, i + 1000]
+    stats = batcher.stats()
+    assert stats["requests"] == 64 and stats["texts"] == 128
+    assert stats["batches"] == len(encoder.batches) < 64
+    assert max(len(b) for b in encoder.batches) <= 16 + 1
+
+
+def test_encoder_errors_reach_every_caller_in_the_batch():
+    def broken(texts):
+        raise RuntimeError("model unavailable")
+
+    batcher = EmbeddingBatcher(broken, max_wait_ms=1)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(batcher.encode, [f"q {i}"]) for i in range(4)]
+            for future in futures:
+                with pytest.raises(RuntimeError, match="model unavailable"):
+                    future.result()
+        # The dispatcher keeps serving after a failed batch
+        batcher._encode = SlowEncoder(0)
+        assert batcher.encode(["q 7"])[0, 0] == 7
+    finally:
+        batcher.close()
+
+
+class Abort(BaseException):
+    pass
+
+
+def test_base_exceptions_do_not_kill_the_dispatcher():
+    def aborting(texts):
+        raise Abort()
+
+    batcher = EmbeddingBatcher(aborting, max_wait_ms=1)
+    try:
+        with pytest.raises(Abort):
+            batcher.encode(["q 1"])
+        batcher._encode = SlowEncoder(0)
+        assert batcher.encode(["q 2"])[0, 0] == 2
+
+        # A dispatcher that died anyway is replaced instead of leaving callers waiting
+        dead = threading.Thread(target=lambda: None)
+        dead.start()
+        dead.join()
+        batcher._thread = dead
+        assert batcher.encode(["q 3"])[0, 0] == 3
+    finally:
+        batcher.close()
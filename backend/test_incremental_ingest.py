@@ -0,0 +1,98 @@
+"""
+Tests for incremental, idempotent ingestion keyed by chunk content hash.
+
+Run: cd backend && python -m pytest -q test_incremental_ingest.py
+"""
+import hashlib
+
+import numpy as np
+import pytest
+
+from backend_app.models.chapter_content import ChapterContent
+from backend_app.rag import vector_service
+from backend_app.rag.chunk_embeddings import ChunkEmbeddingCache
+from backend_app.rag.ingest_ncert import ingest_chunks
+
+DIM = 16
+
+
+class CountingEncoder:
+    encoded = 0
+
+    def __init__(self, model_name):
+        pass
+
+    def get_sentence_embedding_dimension(self):
+        return DIM
+
+    def encode(self, texts, convert_to_numpy=True, show_progress_bar=False, batch_size=32):
+        CountingEncoder.encoded += len(texts)
+        seeds = [int(hashlib.md5(t.encode("utf-8")).hexdigest()[:8], 16) for t in texts]
+        return np.asarray([np.random.default_rng(s).standard_normal(DIM) for s in seeds], dtype="float32")
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch, db_session):
+    monkeypatch.setattr(vector_service, "SentenceTransformer", CountingEncoder)
+    monkeypatch.setattr(vector_service, "DEFAULT_INDEX_PATH", str(tmp_path / "index.bin"))
+    monkeypatch.setattr(vector_service, "DEFAULT_ENTRIES_PATH", str(tmp_path / "entries.chunks"))
+    CountingEncoder.encoded = 0
+    manager = vector_service.VectorStoreManager()
+    return manager, ChunkEmbeddingCache(manager.model_name), db_session
+
+
+def book(edition=1):
+    # Six chunks; a new edition only changes the one on page 3
+    return [f"page {p} of chapter two, edition {edition if p == 3 else 1}" for p in range(6)]
+
+
+def test_reingesting_the_same_chunks_adds_nothing(env):
+    manager, cache, db = env
+    first = ingest_chunks(manager, cache, db, book(), "2", "maths.pdf")
+    again = ingest_chunks(manager, cache, db, book() + book()[:2], "2", "maths.pdf")
+    assert (first["added"], first["encoded"]) == (6, 6)
+    assert (again["added"], again["encoded"], again["rows_inserted"]) == (0, 0, 0)
+    assert manager.index.ntotal == 6
+    assert db.query(ChapterContent).count() == 6
+
+
+def test_additive_ingest_numbers_new_chunks_after_existing_ones(env):
+    manager, cache, db = env
+    ingest_chunks(manager, cache, db, book(), "2", "maths.pdf")
+    ingest_chunks(manager, cache, db, ["exercise 2.1 answers", "exercise 2.2 answers"], "chapter_2", "answers.pdf")
+    indexes = sorted(entry["metadata"]["chunk_index"] for entry in manager.entries)
+    assert indexes == list(range(8))
+    assert manager.next_chunk_index("2") == 8 and manager.next_chunk_index("3") == 0
+
+
+def test_replace_only_embeds_changed_chunks(env):
+    manager, cache, db = env
+    ingest_chunks(manager, cache, db, ["chapter one text"], "1", "one.pdf")
+    ingest_chunks(manager, cache, db, book(1), "2", "maths.pdf")
+    CountingEncoder.encoded = 0
+
+    stats = ingest_chunks(manager, cache, db, book(2), "2", "maths.pdf", replace=True)
+    assert (stats["unchanged"], stats["added"], stats["removed"], stats["encoded"]) == (5, 1, 1, 1)
+    assert CountingEncoder.encoded == 1
+    assert manager.index.ntotal == 7
+    chapter = sorted(manager.entries[i]["text"] for i in manager.chapter_hashes("2").values())
+    assert chapter == sorted(book(2))
+    assert manager.search("page 3 of chapter two, edition 2", top_k=1, chapter_id="2")[0]["text"] == book(2)[3]
+    assert manager.search("chapter one text", top_k=1)[0]["text"] == "chapter one text"
+    rows = sorted(r.content for r in db.query(ChapterContent).filter(ChapterContent.chapter_id == "2"))
+    assert rows == sorted(book(2))
+
+
+def test_cache_and_index_survive_save(env, tmp_path):
+    manager, cache, db = env
+    ingest_chunks(manager, cache, db, book(), "2", "maths.pdf")
+    manager.save_index(str(tmp_path / "i.bin"), str(tmp_path / "e.chunks"))
+    cache.save(str(tmp_path / "cache.npz"))
+
+    reloaded = ChunkEmbeddingCache.load(str(tmp_path / "cache.npz"), manager.model_name)
+    assert len(reloaded) == 6
+    assert len(ChunkEmbeddingCache.load(str(tmp_path / "cache.npz"), "another-model")) == 0
+    manager.load_index(str(tmp_path / "i.bin"), str(tmp_path / "e.chunks"))
+    CountingEncoder.encoded = 0
+    assert ingest_chunks(manager, reloaded, db, book(), "2", "maths.pdf", replace=True)["encoded"] == 0
+    assert manager.index.ntotal == 6
@@ -0,0 +1,166 @@
+"""
+Tests for versioned index snapshots, hot reload and reader/writer safety of the vector store.
+
+Run: cd backend && python -m pytest -q test_index_snapshots.py
+"""
+import os
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend_app.api import admin
+from backend_app.core.config import settings
+from backend_app.core.rwlock import ReadWriteLock
+from backend_app.core.security import get_current_admin
+from backend_app.rag import vector_service
+from backend_app.rag.index_snapshots import SnapshotWatcher, current_snapshot, list_snapshots
+
+@pytest.fixture
+def store(fake_vector_model, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_SNAPSHOT_KEEP", 2)
+    return fake_vector_model
+
+
+def edition(n, size=20):
+    return [f"edition {n} chunk {i} on quadratic equations" for i in range(size)]
+
+
+def publish(writer, texts):
+    writer.add_documents(texts, [{"chapter_id": "4"}] * len(texts))
+    return writer.publish_snapshot()
+
+
+def test_reload_swaps_in_published_snapshots(store):
+    writer = vector_service.VectorStoreManager()
+    first = publish(writer, edition(1))
+    assert current_snapshot(vector_service.snapshot_root()) == first
+
+    server = vector_service.VectorStoreManager()
+    assert server.stats()["snapshot"] == first
+    assert server.reload_index() is False
+
+    second = publish(writer, edition(2))
+    version = server.version
+    assert server.reload_index() is True
+    assert server.stats()["snapshot"] == second and server.version > version
+    assert server.index.ntotal == 40
+    assert server.search(edition(2)[3], top_k=1)[0]["text"] == edition(2)[3]
+
+    publish(writer, edition(3))
+    assert len(list_snapshots(vector_service.snapshot_root())) == 2
+    assert not any(name.endswith(".tmp") for name in os.listdir(vector_service.snapshot_root()))
+
+
+def test_reload_closes_the_replaced_chunk_store(store):
+    writer = vector_service.VectorStoreManager()
+    publish(writer, edition(1))
+    server = vector_service.VectorStoreManager()
+    first_entries = server.entries
+    assert first_entries._map is not None
+    meta = dict(first_entries.meta)
+    server.save_index(str(store / "copy.bin"), str(store / "copy.chunks"))
+    assert first_entries.meta == meta  # saving writes a copy of the metadata
+
+    publish(writer, edition(2))
+    assert server.reload_index() is True
+    assert first_entries._map is None and first_entries._file is None
+    assert server.search(edition(2)[5], top_k=1)[0]["text"] == edition(2)[5]
+
+
+def test_searches_stay_consistent_during_reloads_and_adds(store, monkeypatch):
+    # No result cache, so every search reads the index and entries
+    monkeypatch.setattr(settings, "VECTOR_RESULT_CACHE_SIZE", 0)
+    first, second = vector_service.VectorStoreManager(), vector_service.VectorStoreManager()
+    publish(first, edition(1))
+    # The same chunks at other positions: index and entries from different snapshots would disagree
+    publish(second, edition(2) + edition(1))
+    snapshots = list_snapshots(vector_service.snapshot_root())
+    server = vector_service.VectorStoreManager()
+    errors = []
+    stop = threading.Event()
+
+    def search():
+        i = 0
+        while not stop.is_set():
+            query = edition(1)[i % 20]
+            try:
+                top = server.search(query, top_k=3, chapter_id="4" if i % 2 else None)[0]
+                assert top["text"] == query and top["score"] > 0.99, (query, top)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+                return
+            i += 1
+
+    threads = [threading.Thread(target=search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for n in range(200):
+        server.reload_index(snapshots[n % 2])
+        if n % 10 == 5:
+            server.add_documents(edition(3)[:2], [{"chapter_id": "4"}] * 2)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_write_lock_waits_for_readers_and_holds_off_new_ones():
+    lock = ReadWriteLock()
+    events = []
+    reading = threading.Event()
+    release = threading.Event()
+
+    def reader():
+        with lock.read():
+            reading.set()
+            release.wait()
+            events.append("first read done")
+
+    def writer():
+        with lock.write():
+            events.append("write")
+
+    def late_reader():
+        with lock.read():
+            events.append("late read")
+
+    first = threading.Thread(target=reader)
+    first.start()
+    reading.wait()
+    threads = [threading.Thread(target=writer)]
+    threads[0].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=late_reader))
+    threads[1].start()
+    time.sleep(0.05)
+    assert events == []
+    release.set()
+    for thread in [first] + threads:
+        thread.join()
+    assert events == ["first read done", "write", "late read"]
+
+
+def test_watcher_and_admin_endpoint_report_new_snapshots(store, monkeypatch):
+    writer = vector_service.VectorStoreManager()
+    first = publish(writer, edition(1))
+    server = vector_service.VectorStoreManager()
+    seen = []
+    watcher = SnapshotWatcher(vector_service.snapshot_root, seen.append, interval_seconds=60, active=first)
+    assert watcher.poll() is False
+
+    second = publish(writer, edition(2))
+    assert watcher.poll() is True and seen == [second]
+
+    app = FastAPI()
+    app.include_router(admin.router)
+    app.dependency_overrides[get_current_admin] = lambda: None
+    monkeypatch.setattr(admin, "get_vector_manager", lambda: server)
+    client = TestClient(app)
+    assert client.get("/admin/index").json()["snapshot"] == first
+    body = client.post("/admin/index/reload").json()
+    assert body["reloaded"] is True
+    assert body["snapshot"] == body["published_snapshot"] == second
+    assert client.post("/admin/index/reload").json()["reloaded"] is False
@@ -0,0 +1,59 @@
+"""
+Tests for the in-process lesson cache tier in front of lesson_content.
+
+Run: cd backend && python -m pytest -q test_lesson_memory_cache.py
+"""
+import asyncio
+import time
+
+from backend_app.core.cache import TTLLRUCache
+from backend_app.models.lesson_content import LessonContent
+from backend_app.services import lesson_service
+
+
+def test_ttl_lru_cache_eviction_and_expiry():
+    cache = TTLLRUCache(max_entries=2, ttl_seconds=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1          # a is now most recently used
+    cache.set("c", 3)                   # evicts b
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_memory_tier_hits_and_invalidation(db_session, monkeypatch):
+    db = db_session
+    generations = []
+
+    async def stub_generate(chapter_title, retrieved_context, topic=None):
+        generations.append(topic)
+        return {"slides": [{"title": f"v{len(generations)}"}], "is_fallback": len(generations) == 1,
+                "quality_score": 1.0}
+
+    monkeypatch.setattr(lesson_service, "generate_lesson_slides", stub_generate)
+
+    def get(force_refresh=False):
+        return asyncio.run(lesson_service.generate_lesson_cached(
+            db, "chapter_2", "chapter_2", None, retriever=lambda q: [], force_refresh=force_refresh))
+
+    # A fallback result is stored but never served from memory, so the next call regenerates
+    assert get() == [{"title": "v1"}]
+    assert get() == [{"title": "v2"}]
+    assert len(generations) == 2
+
+    # Hot hit: served without touching the database
+    db.query(LessonContent).delete()
+    db.commit()
+    assert get() == [{"title": "v2"}]
+    assert len(generations) == 2
+
+    # force_refresh replaces the memory entry
+    assert get(force_refresh=True) == [{"title": "v3"}]
+    assert get() == [{"title": "v3"}]
+
+    # clear-cache empties both tiers
+    assert lesson_service.clear_lessons(db) == 1
+    assert get() == [{"title": "v4"}]
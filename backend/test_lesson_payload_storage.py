@@ -0,0 +1,69 @@
+"""
+Tests for compressed, pre-serialized lesson storage and the legacy-row migration.
+
+Run: cd backend && python -m pytest -q test_lesson_payload_storage.py
+"""
+import json
+import zlib
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from backend_app.models.lesson_content import LessonContent
+from backend_app.services import lesson_service
+from backend_app.services.lesson_storage_migration import backfill_lesson_payloads, ensure_lesson_storage_schema
+
+SLIDES = [{"title": "Zeroes", "bullets": ["p(k) = 0 ⇒ k is a zero"], "formula": "p(x)=ax+b"}]
+
+
+def test_saved_lesson_is_compressed_and_served_raw(db_session):
+    db = db_session
+    lesson_service.save_lesson(db, "chapter_2::zeroes", {"slides": SLIDES * 20, "is_fallback": False})
+    row = db.query(LessonContent).one()
+    assert row.content_json == ""
+    assert len(row.content_blob) < len(json.dumps(SLIDES * 20)) / 4
+
+    # A database hit decodes the stored bytes without parsing them
+    lesson_service._lesson_memory.clear()
+    payload = lesson_service.get_cached_payload(db, "chapter_2::zeroes")
+    assert payload._slides is None
+    assert json.loads(payload.response_body("chapter_2::zeroes")) == {
+        "chapter_title": "chapter_2::zeroes", "slides": SLIDES * 20}
+    assert lesson_service.get_cached_slides(db, "chapter_2::zeroes") == SLIDES * 20
+
+
+def test_empty_lessons_are_never_served_from_the_cache(db_session):
+    db = db_session
+    lesson_service.save_lesson(db, "chapter_2::graphs", {"slides": [], "is_fallback": False})
+    assert db.query(LessonContent).count() == 0
+    assert lesson_service.get_cached_payload(db, "chapter_2::graphs") is None
+
+    # A row written before empty lessons were skipped reads as a miss
+    db.add(LessonContent(chapter_id="chapter_2::graphs", content_json="", content_blob=zlib.compress(b"[]")))
+    db.commit()
+    assert lesson_service.get_cached_payload(db, "chapter_2::graphs") is None
+
+
+def test_legacy_rows_are_migrated(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}", connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE lesson_content (id INTEGER PRIMARY KEY, chapter_id VARCHAR UNIQUE NOT NULL, "
+            "content_json TEXT NOT NULL, is_fallback BOOLEAN, quality_score FLOAT, created_at DATETIME)"))
+        conn.execute(text("INSERT INTO lesson_content (chapter_id, content_json, is_fallback) VALUES "
+                          "('chapter_2', :good, 0), ('chapter_3', '{broken', 0)"), {"good": json.dumps(SLIDES)})
+
+    assert ensure_lesson_storage_schema(engine) is True
+    assert ensure_lesson_storage_schema(engine) is False
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    # Legacy rows stay readable before the backfill runs
+    assert lesson_service.get_cached_slides(db, "chapter_2") == SLIDES
+    stats = backfill_lesson_payloads(db, batch_size=1)
+    assert (stats["migrated"], stats["unreadable"]) == (1, 1)
+    assert backfill_lesson_payloads(db)["migrated"] == 0
+
+    lesson_service._lesson_memory.clear()
+    assert lesson_service.get_cached_slides(db, "chapter_2") == SLIDES
+    assert lesson_service.get_cached_slides(db, "chapter_3") is None
+    db.close()
@@ -0,0 +1,91 @@
+"""
+Concurrency test for lesson cache-miss coalescing.
+
+Fires N concurrent lesson requests (asyncio tasks) for the same cache key
+against a temporary SQLite database with a stubbed (slow) LLM, and checks that
+exactly one generation runs and every request receives the same slides.
+
+Run: cd backend && python -m pytest -q test_lesson_singleflight.py
+"""
+import asyncio
+
+from backend_app.models.lesson_content import LessonContent
+from backend_app.services import lesson_service
+
+N_REQUESTS = 20
+
+
+def test_concurrent_misses_generate_once(session_factory, monkeypatch):
+    SessionFactory = session_factory
+    calls = []
+
+    async def stub_generate(chapter_title, retrieved_context, topic=None):
+        calls.append(topic)
+        await asyncio.sleep(0.3)  # keep the leader in flight while the others arrive
+        return {
+            "topic": topic,
+            "slides": [{"title": f"Intro to {topic}", "bullets": [], "formula": "", "example_steps": [],
+                        "practice_questions": [], "narration": ""}],
+            "is_fallback": False,
+            "quality_score": 1.0,
+        }
+
+    monkeypatch.setattr(lesson_service, "generate_lesson_slides", stub_generate)
+
+    async def request():
+        db = SessionFactory()
+        try:
+            return await lesson_service.generate_lesson_cached(
+                db, "chapter_2", "chapter_2::zeroes", "zeroes", retriever=lambda q: []
+            )
+        finally:
+            db.close()
+
+    async def burst():
+        return await asyncio.gather(*(request() for _ in range(N_REQUESTS)))
+
+    results = asyncio.run(burst())
+
+    assert len(calls) == 1
+    assert all(r == results[0] for r in results)
+    assert results[0][0]["title"] == "Intro to zeroes"
+
+    db = SessionFactory()
+    try:
+        assert db.query(LessonContent).filter(LessonContent.chapter_id == "chapter_2::zeroes").count() == 1
+    finally:
+        db.close()
+
+    # Once stored, later requests are plain cache hits
+    asyncio.run(request())
+    assert len(calls) == 1
+
+
+def test_leader_error_propagates_to_followers(session_factory, monkeypatch):
+    SessionFactory = session_factory
+    calls = []
+
+    async def failing_generate(chapter_title, retrieved_context, topic=None):
+        calls.append(topic)
+        await asyncio.sleep(0.2)
+        raise RuntimeError("LLM down")
+
+    monkeypatch.setattr(lesson_service, "generate_lesson_slides", failing_generate)
+
+    async def request():
+        db = SessionFactory()
+        try:
+            await lesson_service.generate_lesson_cached(db, "chapter_2", "chapter_2", None, retriever=lambda q: [])
+            return None
+        except RuntimeError as e:
+            return str(e)
+        finally:
+            db.close()
+
+    async def burst():
+        return await asyncio.gather(*(request() for _ in range(5)))
+
+    errors = asyncio.run(burst())
+
+    assert len(calls) == 1
+    assert errors == ["LLM down"] * 5
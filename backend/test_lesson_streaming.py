@@ -0,0 +1,105 @@
+"""
+Tests for streamed lesson generation.
+
+- SlideArrayParser emits each slide as soon as its JSON object closes, whatever
+  the token boundaries are.
+- stream_lesson_cached streams slides from a stubbed LLM token stream, persists
+  the lesson, and shares the generation with concurrent non-streaming requests.
+
+Run: cd backend && python -m pytest -q test_lesson_streaming.py
+"""
+import asyncio
+import json
+
+from backend_app.ai.slide_parser import SlideArrayParser
+from backend_app.services import lesson_service
+
+SLIDES = [
+    {"title": "Zeroes {of} p(x)", "bullets": ["a \"quoted\" } brace"], "formula": "\\frac{1}{2}",
+     "example_steps": [], "practice_questions": [], "narration": "n1"},
+    {"title": "Sum of zeroes", "bullets": [], "formula": "-\\frac{b}{a}",
+     "example_steps": ["s1"], "practice_questions": ["q1"], "narration": "n2"},
+]
+RAW = "```json\n" + json.dumps(SLIDES, indent=2) + "\n```"
+
+
+def test_parser_emits_slides_at_any_chunk_size():
+    for size in (1, 3, 7, 64, len(RAW)):
+        parser = SlideArrayParser()
+        out = []
+        for i in range(0, len(RAW), size):
+            out.extend(parser.feed(RAW[i:i + size]))
+        assert out == SLIDES
+
+
+def test_parser_emits_first_slide_before_array_closes():
+    parser = SlideArrayParser()
+    first_end = RAW.index('"n1"') + len('"n1"')
+    assert parser.feed(RAW[:first_end]) == []
+    assert parser.feed("\n  },") == [SLIDES[0]]
+
+
+def test_stream_persists_and_coalesces_with_plain_requests(session_factory, monkeypatch):
+    SessionFactory = session_factory
+    monkeypatch.setattr(lesson_service, "SessionLocal", SessionFactory)
+
+    stream_calls = []
+
+    async def stub_stream(chapter_title, retrieved_context, topic=None):
+        stream_calls.append(topic)
+        for slide in SLIDES:
+            await asyncio.sleep(0.1)
+            yield slide
+
+    async def no_generate(*args, **kwargs):
+        raise AssertionError("non-streaming generation should not run")
+
+    monkeypatch.setattr(lesson_service, "stream_lesson_slides", stub_stream)
+    monkeypatch.setattr(lesson_service, "generate_lesson_slides", no_generate)
+
+    async def consume_stream():
+        return [e async for e in lesson_service.stream_lesson_cached(
+            "chapter_2", "chapter_2::zeroes", "zeroes", retriever=lambda q: [])]
+
+    async def plain_request():
+        await asyncio.sleep(0.05)  # arrive while the stream is in flight
+        db = SessionFactory()
+        try:
+            return await lesson_service.generate_lesson_cached(
+                db, "chapter_2", "chapter_2::zeroes", "zeroes", retriever=lambda q: [])
+        finally:
+            db.close()
+
+    async def scenario():
+        return await asyncio.gather(consume_stream(), plain_request(), plain_request())
+
+    events, plain_a, plain_b = asyncio.run(scenario())
+
+    assert stream_calls == ["zeroes"]
+    assert [data for event, data in events if event == "slide"] == SLIDES
+    assert events[-1][0] == "done"
+    assert plain_a == SLIDES and plain_b == SLIDES
+
+    db = SessionFactory()
+    try:
+        assert lesson_service.get_cached_slides(db, "chapter_2::zeroes") == SLIDES
+    finally:
+        db.close()
+
+
+def test_stream_without_usable_slides_falls_back(session_factory, monkeypatch):
+    monkeypatch.setattr(lesson_service, "SessionLocal", session_factory)
+
+    async def empty_stream(chapter_title, retrieved_context, topic=None):
+        return
+        yield
+
+    monkeypatch.setattr(lesson_service, "stream_lesson_slides", empty_stream)
+
+    async def consume():
+        return [e async for e in lesson_service.stream_lesson_cached("chapter_2", "chapter_2", None, lambda q: [])]
+
+    events = asyncio.run(consume())
+    slides = [data for event, data in events if event == "slide"]
+    assert slides and events[-1] == ("done", {"chapter_title": "chapter_2", "slide_count": len(slides),
+                                              "streamed": True})
@@ -0,0 +1,50 @@
+"""
+Tests for the lesson warm-up job: chapter ids and cache keys match what the API reads.
+
+Run: cd backend && python -m pytest -q test_lesson_warmup.py
+"""
+import asyncio
+
+from backend_app.models.chapter_content import ChapterContent
+from backend_app.services import lesson_service, lesson_warmup
+
+
+def test_targets_use_api_chapter_ids(db_session):
+    db_session.add_all([ChapterContent(chapter_id="2", content="zeroes"),
+                        ChapterContent(chapter_id="chapter_3", content="pairs of lines")])
+    db_session.commit()
+
+    chapter_ids = lesson_warmup.collect_chapter_ids(db_session, ["2", "4"])
+    assert chapter_ids == ["chapter_2", "chapter_3", "chapter_4"]
+    # Partition keys from the index ("2", never "chapter_2") come back in API form too
+    assert lesson_warmup.collect_chapter_ids(db_session, []) == ["chapter_2", "chapter_3"]
+    targets = lesson_warmup.build_targets(["2"], {"2": ["Zeroes"], "chapter_2": ["graphs"], "5": ["ratios"]})
+    assert targets == [("chapter_2", None), ("chapter_2", "zeroes"), ("chapter_2", "graphs"), ("chapter_5", "ratios")]
+
+
+def test_warmed_lesson_is_a_cache_hit_for_the_api_chapter_id(db_session, session_factory, monkeypatch):
+    generated = []
+
+    async def stub_generate(chapter_title, retrieved_context, topic=None):
+        generated.append((chapter_title, topic))
+        return {"slides": [{"title": f"{chapter_title} {topic}"}], "is_fallback": False, "quality_score": 1.0}
+
+    async def no_generate(*args, **kwargs):
+        raise AssertionError("the warmed lesson should be served from the cache")
+
+    monkeypatch.setattr(lesson_warmup, "generate_lesson_slides", stub_generate)
+    monkeypatch.setattr(lesson_warmup, "SessionLocal", session_factory)
+    monkeypatch.setattr(lesson_service, "generate_lesson_slides", no_generate)
+
+    targets = lesson_warmup.build_targets(lesson_warmup.collect_chapter_ids(db_session, ["2"]), ["Zeroes"])
+    stats = asyncio.run(lesson_warmup.run_warmup(targets, retriever=lambda query, chapter_id: [],
+                                                 requests_per_minute=0))
+    assert stats["generated"] == 2
+    assert set(generated) == {("chapter_2", None), ("chapter_2", "zeroes")}
+
+    # What GET /lessons/chapter_2/generate?topic=Zeroes does
+    lesson_service._lesson_memory.clear()
+    clean_topic, cache_key = lesson_service.lesson_cache_key("chapter_2", "Zeroes")
+    payload = asyncio.run(lesson_service.generate_lesson_payload(
+        db_session, "chapter_2", cache_key, clean_topic, retriever=lambda query: []))
+    assert payload.slides == [{"title": "chapter_2 zeroes"}]
@@ -0,0 +1,61 @@
+"""
+Tests for the offline LLM providers (stub and record/replay cassette).
+
+Run: cd backend && python -m pytest -q test_llm_providers.py
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+from backend_app.ai import llm_service, providers
+from backend_app.ai.providers import CassetteMiss, CassetteProvider, StubProvider
+
+MESSAGES = [{"role": "user", "content": "What is a zero?"}]
+
+
+def collect(provider, messages=MESSAGES, max_tokens=250):
+    async def run():
+        return [t async for t in provider.stream(messages, 0.4, max_tokens)]
+    return asyncio.run(run())
+
+
+def test_stub_is_deterministic_and_paced():
+    stub = StubProvider(latency_seconds=0.05, tokens_per_second=200)
+    started = time.perf_counter()
+    tokens = collect(stub)
+    took = time.perf_counter() - started
+    assert "".join(tokens) == "".join(collect(stub))
+    assert took >= 0.05 + (len(tokens) - 1) / 200 * 0.9
+
+
+def test_providers_must_implement_the_interface():
+    class StreamOnly(providers.LLMProvider):
+        async def stream(self, messages, temperature, max_tokens):
+            yield "x"
+
+    with pytest.raises(TypeError):
+        StreamOnly()
+    stub = StubProvider(latency_seconds=0, tokens_per_second=0)
+    assert asyncio.run(stub.complete(MESSAGES, 0.4, 50)) == "".join(collect(stub))
+
+
+def test_lesson_generation_runs_on_stub(monkeypatch):
+    monkeypatch.setattr(providers, "_provider", StubProvider(latency_seconds=0, tokens_per_second=0, slides=2))
+    result = asyncio.run(llm_service.generate_lesson_slides("chapter_2", [], topic="zeroes"))
+    assert result["is_fallback"] is False
+    assert [s["title"] for s in result["slides"]] == ["Zeroes - part 1", "Zeroes - part 2"]
+
+
+def test_cassette_records_then_replays_offline(tmp_path):
+    path = str(tmp_path / "cassette.json")
+    recorder = CassetteProvider(path, mode="record", upstream=StubProvider(latency_seconds=0, tokens_per_second=0))
+    recorded = collect(recorder)
+    assert len(json.load(open(path))) == 1
+
+    player = CassetteProvider(path, mode="replay")
+    assert collect(player) == recorded
+    assert asyncio.run(player.complete(MESSAGES, 0.4, 250)) == "".join(recorded)
+    with pytest.raises(CassetteMiss):
+        collect(player, messages=[{"role": "user", "content": "Something new"}])
@@ -0,0 +1,133 @@
+"""
+Tests for LLM deadlines, hedged requests and the circuit breaker.
+
+Run: cd backend && python -m pytest -q test_llm_resilience.py
+"""
+import asyncio
+import time
+
+import pytest
+
+from backend_app.ai import llm_service, providers
+from backend_app.ai.providers import StubProvider
+from backend_app.core.resilience import CircuitBreaker, CircuitOpenError, hedged
+from backend_app.services import lesson_service
+
+MESSAGES = [{"role": "user", "content": "What is a zero?"}]
+
+
+def test_breaker_opens_and_probes_after_reset():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=lambda: now[0])
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.allow()          # the single half-open probe
+    assert not breaker.allow()
+    breaker.record_failure()        # probe failed: open again
+    assert breaker.state == "open"
+
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.stats()["opened"] == 2 and breaker.stats()["rejected"] == 2
+
+
+def test_hedged_takes_first_answer():
+    calls = []
+
+    async def call():
+        calls.append(time.perf_counter())
+        await asyncio.sleep(0.5 if len(calls) == 1 else 0.05)
+        return len(calls)
+
+    started = time.perf_counter()
+    assert asyncio.run(hedged(call, hedge_after=0.05)) == 2
+    assert time.perf_counter() - started < 0.4 and len(calls) == 2
+
+
+def test_deadline_falls_back_then_circuit_skips_provider(monkeypatch):
+    slow = StubProvider(latency_seconds=1.0, tokens_per_second=0)
+    monkeypatch.setattr(providers, "_provider", slow)
+    monkeypatch.setattr(llm_service, "_breaker", CircuitBreaker(failure_threshold=1, reset_seconds=60))
+    monkeypatch.setattr(llm_service.settings, "LLM_DEADLINE_SECONDS", 0.1)
+
+    started = time.perf_counter()
+    result = asyncio.run(llm_service.generate_lesson_slides("chapter_2", [], topic="zeroes"))
+    assert result["is_fallback"] is True
+    assert time.perf_counter() - started < 0.5
+    assert llm_service.llm_stats()["breaker"]["state"] == "open"
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(llm_service.chat_completion(MESSAGES))
+
+
+def test_open_circuit_serves_stored_fallback_lesson(db_session, monkeypatch):
+    db = db_session
+    lesson_service.save_lesson(db, "chapter_2", {"slides": [{"title": "stored"}], "is_fallback": True})
+
+    async def no_generate(*args, **kwargs):
+        raise AssertionError("should not generate while the circuit is open")
+
+    monkeypatch.setattr(lesson_service, "generate_lesson_slides", no_generate)
+    monkeypatch.setattr(lesson_service, "llm_available", lambda: False)
+    slides = asyncio.run(lesson_service.generate_lesson_cached(db, "chapter_2", "chapter_2", None, retriever=lambda q: []))
+    assert slides == [{"title": "stored"}]
+
+
+def test_deadline_covers_queueing_and_hedges(monkeypatch):
+    monkeypatch.setattr(providers, "_provider", StubProvider(latency_seconds=1.0, tokens_per_second=0))
+    monkeypatch.setattr(llm_service, "_breaker", CircuitBreaker(failure_threshold=5, reset_seconds=60))
+    monkeypatch.setattr(llm_service.settings, "LLM_DEADLINE_SECONDS", 0.3)
+
+    async def queued():
+        # One slot, held by another call: the queued call gets no fresh deadline once it is let in
+        monkeypatch.setattr(llm_service.settings, "LLM_MAX_CONCURRENCY", 1)
+        semaphore = llm_service._get_semaphore()
+        await semaphore.acquire()
+        asyncio.get_running_loop().call_later(0.2, semaphore.release)
+        with pytest.raises(llm_service.LLMDeadlineExceeded):
+            await llm_service.chat_completion(MESSAGES)
+
+    started = time.perf_counter()
+    asyncio.run(queued())
+    assert time.perf_counter() - started < 0.45
+
+    # A hedge fired at 0.2s only gets the 0.1s left of the same deadline
+    monkeypatch.setattr(llm_service.settings, "LLM_MAX_CONCURRENCY", 4)
+    monkeypatch.setattr(llm_service, "_hedge_delay", lambda max_tokens: 0.2)
+    started = time.perf_counter()
+    with pytest.raises(llm_service.LLMDeadlineExceeded):
+        asyncio.run(llm_service.chat_completion(MESSAGES))
+    assert time.perf_counter() - started < 0.45
+
+
+def test_deadline_spent_queueing_does_not_trip_the_breaker(monkeypatch):
+    monkeypatch.setattr(llm_service, "_breaker", CircuitBreaker(failure_threshold=1, reset_seconds=60))
+    monkeypatch.setattr(llm_service.settings, "LLM_MAX_CONCURRENCY", 0)
+
+    async def both():
+        with pytest.raises(llm_service.LLMDeadlineExceeded):
+            await llm_service.chat_completion(MESSAGES, deadline=0.05)
+        with pytest.raises(llm_service.LLMDeadlineExceeded):
+            [t async for t in llm_service.stream_chat_completion(MESSAGES, deadline=0.05)]
+
+    asyncio.run(both())
+    assert llm_service.llm_stats()["breaker"]["state"] == "closed"
+
+
+def test_concurrency_limit_works_across_event_loops(monkeypatch):
+    monkeypatch.setattr(providers, "_provider", StubProvider(latency_seconds=0.02, tokens_per_second=0))
+    monkeypatch.setattr(llm_service, "_breaker", CircuitBreaker())
+    monkeypatch.setattr(llm_service.settings, "LLM_MAX_CONCURRENCY", 2)
+
+    async def burst():
+        # More calls than slots, so callers queue on the semaphore
+        return await asyncio.gather(*(llm_service.chat_completion(MESSAGES) for _ in range(12)))
+
+    for _ in range(2):  # separate asyncio.run calls, as in the warm-up CLI and the load test
+        assert len(asyncio.run(burst())) == 12
@@ -0,0 +1,35 @@
+"""
+Tests for the load-test report math (percentiles and run comparison).
+
+Run: cd backend && python -m pytest -q test_loadtest_stats.py
+"""
+import pytest
+
+from loadtest.scenarios import parse_mix
+from loadtest.stats import compare, percentile, summarize
+
+
+def test_percentiles_use_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert percentile([], 95) == 0.0
+
+    summary = summarize(values, errors=2, elapsed=2.0)
+    assert summary["requests"] == 100 and summary["errors"] == 2
+    assert summary["throughput_rps"] == 50.0
+    assert (summary["p50_ms"], summary["p95_ms"], summary["max_ms"]) == (50.0, 95.0, 100.0)
+
+
+def test_compare_reports_relative_change():
+    before = {"routes": {"login": summarize([0.2] * 10, 0, 1.0)}}
+    after = {"routes": {"login": summarize([0.1] * 10, 0, 1.0), "analytics_read": summarize([0.01], 0, 1.0)}}
+    rows = {row["route"]: row for row in compare(before, after)}
+    assert rows["login"]["p95_ms"] == {"before": 200.0, "after": 100.0, "change_pct": -50.0}
+    assert rows["analytics_read"]["p50_ms"] is None
+
+
+def test_parse_mix_rejects_unknown_scenarios():
+    assert parse_mix("lesson_hit=3, login") == {"lesson_hit": 3.0, "login": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("lesson_hitt=1")
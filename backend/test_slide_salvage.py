@@ -0,0 +1,77 @@
+"""
+Tests for salvaging usable slides from truncated or partly malformed LLM output.
+
+Run: cd backend && python -m pytest -q test_slide_salvage.py
+"""
+import asyncio
+
+from backend_app.ai import llm_service, providers
+from backend_app.ai.providers import StreamingProvider
+from backend_app.ai.slide_parser import salvage_slides
+from backend_app.core.resilience import CircuitBreaker
+from backend_app.models.lesson_content import LessonContent
+from backend_app.services import lesson_service
+
+TRUNCATED = (
+    '```json\n[{"title": "Zeroes", "bullets": ["p(k) = 0"], "formula": "\\( p(x) \\)",},'
+    ' {"title": "Graphs", "bullets": "not a list"},'
+    ' {"title": "Degree", "narration": "The highest power'
+)
+
+
+class FixedProvider(StreamingProvider):
+    def __init__(self, text):
+        self.text = text
+
+    async def stream(self, messages, temperature, max_tokens):
+        for i in range(0, len(self.text), 7):
+            yield self.text[i:i + 7]
+
+
+def test_salvage_keeps_valid_complete_slides():
+    slides, report = salvage_slides(TRUNCATED)
+    assert [s["title"] for s in slides] == ["Zeroes"]
+    assert slides[0]["formula"] == "\\( p(x) \\)"  # repaired LaTeX escape and trailing comma
+    assert report == {"recovered": 1, "rejected": 1, "repaired": 1, "complete": False}
+
+    slides, report = salvage_slides('[{"title": "A", "bullets": ["x"]}, {"title": "B", "formula": "y"}]')
+    assert len(slides) == 2 and report["complete"] and report["rejected"] == 0
+
+
+def test_salvage_accepts_a_bare_object_with_list_fields():
+    slides, report = salvage_slides('{"title": "A", "bullets": ["x"], "narration": "n"}')
+    assert [s["title"] for s in slides] == ["A"] and report["complete"] is True
+
+    slides, report = salvage_slides('```json\n{"title": "A", "bullets": ["x", "y"], "narration": "The hi')
+    assert slides == [] and report["complete"] is False
+
+
+def test_truncated_generation_is_stored_as_partial_not_fallback(db_session, monkeypatch):
+    monkeypatch.setattr(providers, "_provider", FixedProvider(TRUNCATED))
+    monkeypatch.setattr(llm_service, "_breaker", CircuitBreaker())
+    db = db_session
+
+    slides = asyncio.run(lesson_service.generate_lesson_cached(db, "chapter_2", "chapter_2", None, retriever=lambda q: []))
+    assert [s["title"] for s in slides] == ["Zeroes"]
+    row = db.query(LessonContent).one()
+    assert (row.is_fallback, row.is_partial, row.quality_score) == (False, True, llm_service.PARTIAL_QUALITY_SCORE)
+
+    # Served from the cache afterwards instead of being regenerated
+    lesson_service._lesson_memory.clear()
+    assert lesson_service.get_cached_slides(db, "chapter_2") == slides
+
+
+def test_truncated_stream_keeps_streamed_slides(session_factory, monkeypatch):
+    monkeypatch.setattr(providers, "_provider", FixedProvider(TRUNCATED))
+    monkeypatch.setattr(llm_service, "_breaker", CircuitBreaker())
+    SessionFactory = session_factory
+    monkeypatch.setattr(lesson_service, "SessionLocal", SessionFactory)
+
+    async def consume():
+        return [e async for e in lesson_service.stream_lesson_cached("chapter_2", "chapter_2", None, lambda q: [])]
+
+    events = asyncio.run(consume())
+    assert [data["title"] for event, data in events if event == "slide"] == ["Zeroes"]
+    db = SessionFactory()
+    assert db.query(LessonContent).one().is_partial is True
+    db.close()
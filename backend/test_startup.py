@@ -0,0 +1,78 @@
+"""
+Tests for background warm-up, readiness and the /health endpoints.
+
+Run: cd backend && python -m pytest -q test_startup.py
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import main
+from backend_app.core import startup
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    startup.reset()
+    monkeypatch.setattr(main, "_database_reachable", lambda: True)
+    yield
+    startup.reset()
+
+
+def _ready_response():
+    resp = asyncio.run(main.health_ready())
+    return resp.status_code, json.loads(resp.body)
+
+
+def test_ready_only_after_warm_up_finishes():
+    release = threading.Event()
+    thread = startup.warm_in_background("vector_store", release.wait)
+    code, body = _ready_response()
+    assert code == 503
+    assert body["status"] == "starting"
+    assert body["components"]["vector_store"]["state"] == "loading"
+
+    release.set()
+    thread.join()
+    code, body = _ready_response()
+    assert code == 200
+    assert body["components"]["vector_store"]["state"] == "ready"
+    assert startup.startup_stats()["components"]["vector_store"]["seconds"] >= 0
+
+
+def test_failed_warm_up_is_not_ready():
+    def load():
+        raise OSError("model files missing")
+
+    startup.warm_in_background("vector_store", load).join()
+    code, body = _ready_response()
+    assert code == 503
+    assert body["status"] == "failed"
+    assert body["components"]["vector_store"]["error"] == "model files missing"
+
+
+def test_unreachable_database_is_not_ready(monkeypatch):
+    monkeypatch.setattr(main, "_database_reachable", lambda: False)
+    code, body = _ready_response()
+    assert code == 503 and body["database"] is False
+
+
+def test_live_does_not_wait_for_warm_up():
+    release = threading.Event()
+    thread = startup.warm_in_background("vector_store", release.wait)
+    assert asyncio.run(main.health_live()) == {"status": "alive"}
+    release.set()
+    thread.join()
+
+
+def test_importing_the_app_does_not_load_the_model():
+    # Fresh interpreter: the model (and torch) must wait for the warm-up or the first search
+    code = "import sys, main; print('sentence_transformers' in sys.modules, 'torch' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert out.stdout.split() == ["False", "False"]
@@ -0,0 +1,75 @@
+"""
+Tests for page-by-page streaming ingestion: chunking across page breaks and batched writes.
+
+Run: cd backend && python -m pytest -q test_streaming_ingest.py
+"""
+import hashlib
+
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from backend_app.models.chapter_content import ChapterContent
+from backend_app.rag import vector_service
+from backend_app.rag.chunk_embeddings import ChunkEmbeddingCache
+from backend_app.rag.ingest_ncert import ingest_chunks, iter_chunks
+
+DIM = 16
+
+
+class BatchRecordingEncoder:
+    batches = []
+
+    def __init__(self, model_name):
+        pass
+
+    def get_sentence_embedding_dimension(self):
+        return DIM
+
+    def encode(self, texts, convert_to_numpy=True, show_progress_bar=False, batch_size=32):
+        BatchRecordingEncoder.batches.append(len(texts))
+        seeds = [int(hashlib.md5(t.encode("utf-8")).hexdigest()[:8], 16) for t in texts]
+        return np.asarray([np.random.default_rng(s).standard_normal(DIM) for s in seeds], dtype="float32")
+
+
+def pages(count=7, lines=25):
+    return [(p, " ".join(f"Page {p} line {i}." for i in range(lines))) for p in range(1, count + 1)]
+
+
+def test_chunks_span_page_breaks_like_whole_text_splitting():
+    streamed = list(iter_chunks(pages()))
+    whole = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=150).split_text(
+        "\n\n".join(text for _, text in pages()))
+
+    assert [text for text, _ in streamed] == whole
+    # Each chunk is tagged with the page it starts on, and some run onto the next page
+    assert [page for _, page in streamed] == [1, 3, 5, 7]
+    assert "Page 2 line 24." in streamed[0][0]
+
+
+def test_chunks_are_produced_before_later_pages_are_read():
+    read = []
+
+    def lazy_pages():
+        for number, text in pages(count=20, lines=60):
+            read.append(number)
+            yield number, text
+
+    chunks = iter_chunks(lazy_pages())
+    first = next(chunks)
+    assert first[1] == 1 and read == [1]
+
+
+def test_streamed_batches_record_page_numbers(db_session, monkeypatch):
+    monkeypatch.setattr(vector_service, "SentenceTransformer", BatchRecordingEncoder)
+    BatchRecordingEncoder.batches = []
+    db = db_session
+    manager = vector_service.VectorStoreManager()
+    chunks = list(iter_chunks(pages(count=12, lines=60)))
+
+    stats = ingest_chunks(manager, ChunkEmbeddingCache(manager.model_name), db, iter(chunks), "3", "book.pdf",
+                          batch_size=5)
+    assert stats["chunks"] == stats["rows_inserted"] == len(chunks)
+    assert max(BatchRecordingEncoder.batches) <= 5
+    rows = db.query(ChapterContent.content, ChapterContent.page_number).order_by(ChapterContent.id).all()
+    assert [tuple(row) for row in rows] == chunks
+    assert [entry["metadata"]["page_number"] for entry in manager.entries] == [page for _, page in chunks]
@@ -0,0 +1,84 @@
+"""
+Tests for semantic topic canonicalization of lesson cache keys.
+
+Uses a tiny bag-of-words encoder in place of the SentenceTransformer so the
+similarity scores are predictable.
+
+Run: cd backend && python -m pytest -q test_topic_index.py
+"""
+import asyncio
+
+import numpy as np
+
+from backend_app.services import lesson_service
+from backend_app.services.topic_index import TopicIndex
+
+VOCAB = ["cubic", "polynomial", "zero", "quadratic", "graph"]
+
+
+def bag_of_words(texts):
+    vectors = np.zeros((len(texts), len(VOCAB)), dtype="float32")
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            word = word.rstrip("s")
+            if word in VOCAB:
+                vectors[row, VOCAB.index(word)] += 1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def test_near_duplicate_topic_reuses_cached_lesson(db_session, monkeypatch):
+    db = db_session
+    monkeypatch.setattr(lesson_service, "_topic_index", TopicIndex(bag_of_words, threshold=0.9))
+
+    slides = [{"title": "Cubic polynomials"}]
+    lesson_service.save_lesson(db, "chapter_2::cubic polynomial", {"slides": slides, "is_fallback": False})
+
+    def resolve(topic):
+        clean_topic, cache_key = lesson_service.lesson_cache_key("chapter_2", topic)
+        return asyncio.run(lesson_service.resolve_lesson_key(db, "chapter_2", clean_topic, cache_key))
+
+    assert resolve("Cubic Polynomials") == ("cubic polynomial", "chapter_2::cubic polynomial")
+    assert resolve("graph of a quadratic") == ("graph of a quadratic", "chapter_2::graph of a quadratic")
+    # Other chapters never borrow this chapter's lessons
+    assert asyncio.run(lesson_service.resolve_lesson_key(
+        db, "chapter_3", "cubic polynomials", "chapter_3::cubic polynomials"))[1] == "chapter_3::cubic polynomials"
+
+    # New lessons join a loaded chapter's index; fallback content leaves it
+    lesson_service.save_lesson(db, "chapter_2::quadratic graph", {"slides": slides, "is_fallback": False})
+    assert resolve("graphs of quadratics")[1] == "chapter_2::quadratic graph"
+    lesson_service.save_lesson(db, "chapter_2::quadratic graph", {"slides": slides, "is_fallback": True})
+    assert resolve("graphs of quadratics")[1] == "chapter_2::graphs of quadratics"
+
+
+def test_encoder_failure_does_not_fail_the_save(db_session, monkeypatch):
+    db = db_session
+    topic_index = TopicIndex(bag_of_words, threshold=0.9)
+    monkeypatch.setattr(lesson_service, "_topic_index", topic_index)
+    slides = [{"title": "Cubic polynomials"}]
+    lesson_service.save_lesson(db, "chapter_2::cubic polynomial", {"slides": slides, "is_fallback": False})
+    asyncio.run(lesson_service.resolve_lesson_key(db, "chapter_2", "cubic polynomials", "chapter_2::cubic polynomials"))
+
+    def broken_encoder(texts):
+        raise RuntimeError("encoder unavailable")
+
+    monkeypatch.setattr(topic_index, "_encode", broken_encoder)
+    payload = lesson_service.save_lesson(db, "chapter_2::quadratic graph", {"slides": slides, "is_fallback": False})
+    assert payload.slides == slides
+    assert lesson_service.get_cached_payload(db, "chapter_2::quadratic graph").slides == slides
+
+
+def test_close_but_distinct_topics_stay_apart_by_default(db_session, monkeypatch):
+    db = db_session
+    # An encoder that cannot tell "sum" from "product": any threshold would merge them
+    def blind_encoder(texts):
+        return np.ones((len(texts), 4), dtype="float32") / 2.0
+
+    monkeypatch.setattr(lesson_service, "_topic_index", None)
+    lesson_service.configure_topic_index(blind_encoder)
+    slides = [{"title": "Sum of zeroes"}]
+    lesson_service.save_lesson(db, "chapter_2::sum of zeroes", {"slides": slides, "is_fallback": False})
+
+    clean_topic, cache_key = lesson_service.lesson_cache_key("chapter_2", "Product of zeroes")
+    resolved = asyncio.run(lesson_service.resolve_lesson_key(db, "chapter_2", clean_topic, cache_key))
+    assert resolved == ("product of zeroes", "chapter_2::product of zeroes")
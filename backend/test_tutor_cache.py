@@ -0,0 +1,172 @@
+"""
+Tests for the /ai/ask answer cache and the /ai/ask/stream endpoint.
+
+Mounts the tutor router on a bare FastAPI app backed by a temporary SQLite
+database, with a stubbed LLM and a bag-of-words encoder for similarity matching.
+
+Run: cd backend && python -m pytest -q test_tutor_cache.py
+"""
+import json
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend_app.api import ai_tutor
+from backend_app.db.session import get_db
+from backend_app.models.tutor_answer import TutorAnswer
+from backend_app.services.tutor_cache import TutorAnswerCache, context_hash, normalize_question
+
+CONTEXT = {"title": "Zeroes of a polynomial", "bullets": ["p(k) = 0"], "formula": "p(x)", "narration": ""}
+VOCAB = ["what", "zero", "polynomial", "define", "graph"]
+
+
+def bag_of_words(texts):
+    vectors = np.zeros((len(texts), len(VOCAB)), dtype="float32")
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            word = word.rstrip("s")
+            if word in VOCAB:
+                vectors[row, VOCAB.index(word)] += 1.0
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+def make_client(SessionFactory, monkeypatch, cache):
+    def override_get_db():
+        db = SessionFactory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    calls = []
+
+    async def stub_chat(messages, temperature=0.4, max_tokens=250):
+        calls.append(messages[-1]["content"])
+        return f"answer #{len(calls)}"
+
+    monkeypatch.setattr(ai_tutor, "chat_completion", stub_chat)
+    monkeypatch.setattr(ai_tutor, "tutor_cache", cache)
+    app = FastAPI()
+    app.include_router(ai_tutor.router, prefix="/ai")
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app), calls, SessionFactory
+
+
+def ask(client, question, context=CONTEXT, **extra):
+    resp = client.post("/ai/ask", json={"question": question, "context": context, **extra})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def test_normalize_question():
+    assert normalize_question("  What is a ZERO of a polynomial?? ") == "what is a zero of a polynomial"
+
+
+def test_exact_repeat_is_served_from_cache(session_factory, monkeypatch):
+    cache = TutorAnswerCache(semantic_threshold=0)
+    client, calls, SessionFactory = make_client(session_factory, monkeypatch, cache)
+
+    assert ask(client, "What is a zero of a polynomial?") == {"answer": "answer #1", "cached": False}
+    assert ask(client, "what is a zero of a polynomial") == {"answer": "answer #1", "cached": True}
+    # Same question on a different slide is a different cache entry
+    assert ask(client, "What is a zero of a polynomial?", context={**CONTEXT, "title": "Graphs"})["cached"] is False
+    # Bypass asks the LLM again and refreshes the stored answer
+    assert ask(client, "What is a zero of a polynomial?", bypass_cache=True)["answer"] == "answer #3"
+    cache.clear_memory()
+    assert ask(client, "What is a zero of a polynomial?")["answer"] == "answer #3"
+
+    assert len(calls) == 3
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1 and stats["exact_hits"] == 1 and stats["bypassed"] == 1
+
+
+def test_similar_question_matches_when_enabled(session_factory, monkeypatch):
+    cache = TutorAnswerCache(semantic_threshold=0.9)
+    cache.configure_encoder(bag_of_words)
+    client, calls, _ = make_client(session_factory, monkeypatch, cache)
+
+    ask(client, "What is a zero of a polynomial?")
+    assert ask(client, "what are the zeros of polynomials") == {"answer": "answer #1", "cached": True}
+    assert ask(client, "define the graph")["cached"] is False
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_prune_evicts_least_recently_used(session_factory, monkeypatch):
+    cache = TutorAnswerCache(max_rows=2, semantic_threshold=0, prune_every=1000)
+    client, calls, SessionFactory = make_client(session_factory, monkeypatch, cache)
+    for q in ("q one", "q two", "q three"):
+        ask(client, q)
+    cache.clear_memory()
+    ask(client, "q one")  # refresh q one's last_used_at
+
+    db = SessionFactory()
+    try:
+        assert cache.prune(db) == 1
+        assert sorted(r.question for r in db.query(TutorAnswer).all()) == ["q one", "q three"]
+    finally:
+        db.close()
+
+
+def test_stream_forwards_tokens_and_fills_cache(session_factory, monkeypatch):
+    cache = TutorAnswerCache(semantic_threshold=0)
+    client, calls, SessionFactory = make_client(session_factory, monkeypatch, cache)
+    monkeypatch.setattr(ai_tutor, "SessionLocal", SessionFactory)
+
+    async def stub_stream(messages, temperature=0.4, max_tokens=250):
+        for token in ["A zero ", "is where ", "p(x) = 0."]:
+            yield token
+
+    monkeypatch.setattr(ai_tutor, "stream_chat_completion", stub_stream)
+
+    def stream(question):
+        resp = client.post("/ai/ask/stream", json={"question": question, "context": CONTEXT})
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        frames = [f for f in resp.text.split("\n\n") if f]
+        return [(f.split("\n")[0][len("event: "):], json.loads(f.split("\n")[1][len("data: "):])) for f in frames]
+
+    events = stream("What is a zero?")
+    assert [data["text"] for event, data in events if event == "token"] == ["A zero ", "is where ", "p(x) = 0."]
+    assert events[-1] == ("done", {"answer": "A zero is where p(x) = 0.", "cached": False})
+
+    # The streamed answer is cached for both endpoints
+    assert ask(client, "what is a zero") == {"answer": "A zero is where p(x) = 0.", "cached": True}
+    assert stream("What is a zero?")[-1] == ("done", {"answer": "A zero is where p(x) = 0.", "cached": True})
+
+
+def test_failed_store_still_returns_the_answer(session_factory, monkeypatch):
+    cache = TutorAnswerCache(semantic_threshold=0)
+    client, calls, _ = make_client(session_factory, monkeypatch, cache)
+
+    def locked(*args, **kwargs):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(cache, "store", locked)
+    assert ask(client, "What is a zero?") == {"answer": "answer #1", "cached": False}
+
+
+def test_cache_hits_do_not_write(session_factory, monkeypatch):
+    cache = TutorAnswerCache(semantic_threshold=0)
+    client, calls, SessionFactory = make_client(session_factory, monkeypatch, cache)
+    ask(client, "q one")
+
+    db = SessionFactory()
+    try:
+        commits = []
+        monkeypatch.setattr(db, "commit", lambda: commits.append(1))
+        for _ in range(3):
+            assert cache.lookup(db, "unused", "q one") is None  # different slide: a miss
+        ctx_hash = context_hash(CONTEXT["title"], CONTEXT["bullets"], CONTEXT["formula"], CONTEXT["narration"])
+        for _ in range(3):
+            assert cache.lookup(db, ctx_hash, "q one") == "answer #1"
+        assert commits == []
+    finally:
+        db.close()
+
+    # The hits are written with the next store
+    ask(client, "q two")
+    db = SessionFactory()
+    try:
+        assert db.query(TutorAnswer).filter(TutorAnswer.question == "q one").one().hit_count == 3
+    finally:
+        db.close()
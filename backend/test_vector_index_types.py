@@ -0,0 +1,62 @@
+"""
+Tests for the configurable FAISS index types and their benchmark.
+
+Run: cd backend && python -m pytest -q test_vector_index_types.py
+"""
+import pytest
+
+from backend_app.rag import vector_service
+from backend_app.rag.index_benchmark import benchmark_size
+from backend_app.rag.index_factory import INDEX_TYPES, index_spec, index_type_of
+
+pytestmark = pytest.mark.usefixtures("fake_vector_model")
+
+
+def _ingest(manager):
+    for chapter in ("1", "2", "3"):
+        texts = [f"chapter {chapter} chunk {i}" for i in range(100)]
+        manager.add_documents(texts, [{"chapter_id": chapter, "chunk_index": i} for i in range(100)])
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_each_index_type_trains_searches_and_persists(index_type, tmp_path):
+    manager = vector_service.VectorStoreManager(index_type=index_type)
+    _ingest(manager)
+    assert index_type_of(manager.index) == index_type
+    assert manager.index.ntotal == 300
+
+    assert manager.search("chapter 2 chunk 7", top_k=3)[0]["text"] == "chapter 2 chunk 7"
+    scoped = manager.search("chapter 3 chunk 42", top_k=3, chapter_id="chapter_3")
+    assert scoped[0]["text"] == "chapter 3 chunk 42"
+    assert {r["metadata"]["chapter_id"] for r in scoped} == {"3"}
+
+    manager.save_index(str(tmp_path / "i.bin"), str(tmp_path / "e.chunks"))
+    loaded = vector_service.VectorStoreManager(index_type="flat")
+    loaded.load_index(str(tmp_path / "i.bin"), str(tmp_path / "e.chunks"))
+    assert index_type_of(loaded.index) == index_type
+    assert loaded.search("chapter 1 chunk 99", top_k=1)[0]["text"] == "chapter 1 chunk 99"
+
+
+def test_rebuild_index_switches_type():
+    manager = vector_service.VectorStoreManager(index_type="flat")
+    _ingest(manager)
+    manager.rebuild_index("ivf_flat")
+    assert index_type_of(manager.index) == "ivf_flat"
+    assert manager.index.ntotal == 300
+    assert manager.search("chapter 1 chunk 5", top_k=1)[0]["text"] == "chapter 1 chunk 5"
+
+
+def test_index_spec_fits_small_corpora():
+    assert index_spec("ivf_flat", 384, 27) == "IVF1,Flat"
+    assert index_spec("ivf_flat", 384, 10000) == "IVF256,Flat"
+    # PQ sub-quantizers must divide the dimension; nbits is capped by the corpus size
+    assert index_spec("ivf_pq", 384, 100, pq_m=50, pq_nbits=8) == "IVF2,PQ48x6"
+
+
+def test_benchmark_reports_recall_against_flat():
+    rows = benchmark_size(2000, ["flat", "ivf_flat", "hnsw"], k=5, dim=32, n_queries=20, nprobes=[64])
+    by_type = {row["index_type"]: row for row in rows}
+    assert by_type["flat"]["recall_at_5"] == 1.0
+    assert by_type["ivf_flat"]["recall_at_5"] >= 0.95
+    assert by_type["hnsw"]["recall_at_5"] >= 0.9
+    assert by_type["hnsw"]["memory_mb"] > by_type["flat"]["memory_mb"]
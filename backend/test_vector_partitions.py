@@ -0,0 +1,47 @@
+"""
+Tests for chapter-partitioned FAISS search.
+
+The fake_vector_model fixture (conftest.py) stands in for the SentenceTransformer
+and points the default index paths at an empty temp dir.
+
+Run: cd backend && python -m pytest -q test_vector_partitions.py
+"""
+import pytest
+
+from backend_app.rag import vector_service
+
+@pytest.fixture
+def manager(fake_vector_model):
+    manager = vector_service.VectorStoreManager()
+    # Interleave chapters so partitions span several runs of positions
+    for batch in range(3):
+        for chapter in ("1", "2", "3"):
+            texts = [f"chapter {chapter} batch {batch} chunk {i}" for i in range(10)]
+            manager.add_documents(texts, [{"chapter_id": chapter, "chunk_index": batch * 10 + i} for i in range(10)])
+    return manager
+
+
+def test_chapter_search_only_returns_that_chapter(manager):
+    results = manager.search("chapter 2 batch 1 chunk 4", top_k=5, chapter_id="chapter_2")
+    assert len(results) == 5
+    assert {r["metadata"]["chapter_id"] for r in results} == {"2"}
+    assert results[0]["text"] == "chapter 2 batch 1 chunk 4"
+    assert manager.chapter_ids() == ["1", "2", "3"]
+    assert manager.partitions["2"] == [(10, 20), (40, 50), (70, 80)]
+
+
+def test_chapter_search_matches_exact_search_within_chapter(manager):
+    query = "how do zeroes relate to coefficients"
+    scoped = manager.search(query, top_k=4, chapter_id="3")
+    assert scoped == manager.search(query, top_k=4, chapter_id="chapter_3")
+
+    q = manager.embed([query])[0]
+    chapter = [e for e in manager.entries if e["metadata"]["chapter_id"] == "3"]
+    expected = sorted(chapter, key=lambda e: -float(manager.embed([e["text"]])[0] @ q))[:4]
+    assert [r["text"] for r in scoped] == [e["text"] for e in expected]
+
+
+def test_partitions_survive_save_and_load(manager, tmp_path):
+    manager.save_index(str(tmp_path / "saved.bin"), str(tmp_path / "saved.chunks"))
+    manager.load_index(str(tmp_path / "saved.bin"), str(tmp_path / "saved.chunks"))
+    assert manager.partitions["1"] == [(0, 10), (30, 40), (60, 70)]
@@ -0,0 +1,74 @@
+"""
+Tests for the query embedding and search result caches in VectorStoreManager.
+
+Run: cd backend && python -m pytest -q test_vector_search_cache.py
+"""
+import hashlib
+
+import numpy as np
+import pytest
+
+from backend_app.rag import vector_service
+
+DIM = 16
+
+
+class CountingEncoder:
+    calls = []
+
+    def __init__(self, model_name):
+        pass
+
+    def get_sentence_embedding_dimension(self):
+        return DIM
+
+    def encode(self, texts, convert_to_numpy=True, show_progress_bar=False):
+        CountingEncoder.calls.append(list(texts))
+        seeds = [int(hashlib.md5(t.encode("utf-8")).hexdigest()[:8], 16) for t in texts]
+        return np.asarray([np.random.default_rng(s).standard_normal(DIM) for s in seeds], dtype="float32")
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_service, "SentenceTransformer", CountingEncoder)
+    monkeypatch.setattr(vector_service, "DEFAULT_INDEX_PATH", str(tmp_path / "index.bin"))
+    monkeypatch.setattr(vector_service, "DEFAULT_ENTRIES_PATH", str(tmp_path / "chunks.bin"))
+    manager = vector_service.VectorStoreManager()
+    texts = [f"chunk {i}" for i in range(20)]
+    manager.add_documents(texts, [{"chapter_id": "2", "chunk_index": i} for i in range(20)])
+    CountingEncoder.calls = []
+    return manager
+
+
+def test_repeated_search_skips_the_model(manager):
+    first = manager.search("chunk 3", top_k=3, chapter_id="chapter_2")
+    first[0]["metadata"]["mutated"] = True
+    again = manager.search("chunk 3", top_k=3, chapter_id="2")
+    assert again[0]["text"] == "chunk 3"
+    assert "mutated" not in again[0]["metadata"]
+    assert CountingEncoder.calls == [["chunk 3"]]
+
+    # A different top_k misses the result cache but reuses the embedding
+    manager.search("chunk 3", top_k=5, chapter_id="2")
+    assert CountingEncoder.calls == [["chunk 3"]]
+    stats = manager.stats()
+    assert stats["result_cache"]["hits"] == 1
+    assert stats["embedding_cache"]["hits"] == 1
+
+
+def test_index_changes_invalidate_results(manager):
+    before = manager.search("chunk 21", top_k=1)
+    version = manager.version
+    manager.add_documents(["chunk 21"], [{"chapter_id": "2", "chunk_index": 21}])
+    assert manager.version == version + 1
+    after = manager.search("chunk 21", top_k=1)
+    assert before[0]["text"] != "chunk 21"
+    assert after[0]["text"] == "chunk 21"
+
+
+def test_embed_queries_encodes_only_unseen_texts(manager):
+    manager.embed_queries(["a", "b"])
+    vectors = manager.embed_queries(["b", "c", "a", "c"])
+    assert CountingEncoder.calls == [["a", "b"], ["c"]]
+    assert np.allclose(vectors[0], manager.embed(["b"])[0])
+    assert np.allclose(vectors[1], vectors[3])